@@ -1,42 +1,72 @@
-from flask import Flask, request, jsonify, session, redirect, url_for
+from flask import Flask, Blueprint, request, jsonify, session, redirect, url_for, g, make_response, Response, stream_with_context, current_app
+from functools import wraps
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, date, timedelta
-from sqlalchemy import func, extract, UniqueConstraint # <-- 確保這裡有 UniqueConstraint
+from sqlalchemy import func, extract, tuple_, case, event, inspect, UniqueConstraint # <-- 確保這裡有 UniqueConstraint
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import click
 import os
+import json
+import hashlib
+import csv
+import io
+import base64
+import types
 from dotenv import load_dotenv
 import re
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from urllib.parse import urlsplit
+from werkzeug.test import EnvironBuilder
+from flask_jwt_extended import JWTManager, create_access_token, get_jwt_identity, get_jwt
+from flask_jwt_extended import jwt_required as flask_jwt_required
 from sqlalchemy.orm import joinedload # <-- 在這裡新增這行！
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+import migrations
+import cache
+import dbpool
+import passwords
+import metrics
 
 # 載入 .env 檔案中的環境變數
 load_dotenv()
 
-app = Flask(__name__)
-app.config['SESSION_COOKIE_SAMESITE'] = "None"
-app.config['SESSION_COOKIE_SECURE'] = True
-# --- Flask 配置 ---
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your_development_secret_key_please_change_me') # 確保這裡的值在 .env 中設置
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///site.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config.update(
-    SESSION_COOKIE_SAMESITE='None',
-    SESSION_COOKIE_SECURE=True
-)
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your_jwt_secret_key')
-jwt = JWTManager(app)
-# 啟用 CORS，允許前端應用程式訪問
-# 在開發階段，可以允許所有來源。生產環境中，請限制為你的前端域名。
-#CORS(app, supports_credentials=True, origins=["https://accounting-website-j8a3.vercel.app"]) # supports_credentials=True 允許發送 cookie/會話憑證
-#, origins=["https://accounting-website-j8a3.vercel.app/"]
-# --- 資料庫初始化 ---
-CORS(app, supports_credentials=True, origins=re.compile(r"https://accounting-website-.*\.vercel\.app"))
-
-db = SQLAlchemy(app)    
-
-
+# 擴充套件先建立但不綁定 app，由 create_app() 呼叫 init_app (見檔案最後)；
+# 路由、hook 與 CLI 指令都註冊在 api 這個 blueprint 上，import 時不會建立 app 或連線資料庫。
+jwt = JWTManager()
+db = SQLAlchemy()
+api = Blueprint('api', __name__, cli_group=None) # cli_group=None：指令維持 flask db-upgrade，不加 blueprint 前綴
+
+# --- 金額 ---
+# 金額以定點數 Numeric(14, 2) 儲存 (原本是 Float，長期加總會累積二進位的捨入誤差)，
+# Python 端一律使用 Decimal；JSON 仍輸出數字，前端不需修改。
+# 輸入依 CURRENCY 的小數位數四捨五入 (欄位最多保存 AMOUNT_DECIMALS 位)。
+AMOUNT_DECIMALS = 2
+CURRENCY_DECIMALS = {'TWD': 2, 'USD': 2, 'EUR': 2, 'CNY': 2, 'HKD': 2, 'JPY': 0, 'KRW': 0}
+CURRENCY = os.getenv('CURRENCY', 'TWD').upper()
+AMOUNT_QUANTUM = Decimal(1).scaleb(-min(CURRENCY_DECIMALS.get(CURRENCY, AMOUNT_DECIMALS), AMOUNT_DECIMALS))
+AMOUNT_LIMIT = Decimal(10) ** (14 - AMOUNT_DECIMALS)
+
+def parse_amount(value):
+    """把請求中的金額 (數字或字串) 轉成 Decimal；不合法時拋出 ValueError"""
+    if value is None or isinstance(value, bool):
+        raise ValueError("Invalid amount")
+    try:
+        amount = Decimal(str(value)) # 經過 str 才不會把 float 的二進位誤差帶進來
+        if not amount.is_finite():
+            raise ValueError("Invalid amount")
+        amount = amount.quantize(AMOUNT_QUANTUM, rounding=ROUND_HALF_UP) # 位數超過精度 (例如 1e400) 時拋出 InvalidOperation
+    except InvalidOperation:
+        raise ValueError("Invalid amount")
+    if abs(amount) >= AMOUNT_LIMIT:
+        raise ValueError("Invalid amount")
+    return amount
+
+def amount_to_json(value):
+    return float(value) if value is not None else 0
 
 # server/app.py (在 User 模型內部)
 class User(UserMixin, db.Model):
@@ -56,10 +86,13 @@ class User(UserMixin, db.Model):
     recorded_group_transactions = db.relationship('GroupTransaction', foreign_keys='GroupTransaction.created_by_user_id', backref='creator', lazy=True)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return passwords.verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return passwords.needs_rehash(self.password_hash)
 
     @property
     def is_authenticated(self):
@@ -109,11 +142,16 @@ class Category(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     type = db.Column(db.String(10), nullable=False) # 'income' or 'expense'
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True) # NULL：所有使用者共用的預設類別
+    template_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True) # 由哪個預設類別複製而來 (copy-on-write)
+    hidden = db.Column(db.Boolean, nullable=False, default=False) # 使用者刪除了預設類別：只對自己遮蔽
 
     transactions = db.relationship('Transaction', back_populates='category_obj', lazy=True)
     group_transactions_with_category = db.relationship('GroupTransaction', backref='category', lazy=True)
 
+    # get_categories / add_category 的同名檢查都以 user_id (+ name) 篩選
+    __table_args__ = (db.Index('ix_category_user_name', 'user_id', 'name'),)
+
     def __repr__(self):
         return f"Category('{self.name}', '{self.type}', User_id: {self.user_id})"
 
@@ -123,12 +161,13 @@ class Category(db.Model):
             'id': self.id,
             'name': self.name,
             'type': self.type,
-            'user_id': self.user_id
+            'user_id': self.user_id,
+            'is_default': self.user_id is None
         }
 
 class Transaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.Numeric(14, AMOUNT_DECIMALS), nullable=False)
     type = db.Column(db.String(10), nullable=False) # 'income' or 'expense'
     description = db.Column(db.String(255), nullable=True)
     date = db.Column(db.Date, nullable=False)
@@ -138,13 +177,20 @@ class Transaction(db.Model):
 
     category_obj = db.relationship('Category', back_populates='transactions', lazy=True)
 
+    __table_args__ = (
+        # 列表、摘要與 cursor 分頁都是「某使用者 + 日期區間」並依 (date, created_at, id) 排序
+        db.Index('ix_transaction_user_date', 'user_id', 'date', 'created_at', 'id'),
+        # delete_category 檢查類別是否仍被使用
+        db.Index('ix_transaction_category', 'category_id'),
+    )
+
     def __repr__(self):
         return f"Transaction('{self.amount}', '{self.type}', '{self.date}', User_id: {self.user_id})"
 
     def to_dict(self):
         return {
             'id': self.id,
-            'amount': self.amount,
+            'amount': amount_to_json(self.amount),
             'type': self.type,
             'description': self.description,
             'date': self.date.isoformat() if self.date else None,
@@ -169,6 +215,8 @@ class Group(db.Model):
     group_transactions = db.relationship('GroupTransaction', backref='group', lazy=True)
     # creator: 創建該群組的使用者 (backref='created_groups' 已在 User 模型中定義)
 
+    __table_args__ = (db.Index('ix_group_created_by', 'created_by_user_id'),) # delete_user_account 的檢查
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -190,7 +238,11 @@ class GroupMember(db.Model):
     # 關係定義：
     # member_user: 這個成員記錄對應的使用者 (backref='group_memberships' 已在 User 模型中定義)
 
-    __table_args__ = (UniqueConstraint('group_id', 'user_id', name='_group_user_uc'),) # 確保一個使用者在一個群組中只能有一條記錄
+    __table_args__ = (
+        UniqueConstraint('group_id', 'user_id', name='_group_user_uc'), # 確保一個使用者在一個群組中只能有一條記錄
+        db.Index('ix_group_member_user_status', 'user_id', 'status'), # 「我加入的群組」
+        db.Index('ix_group_member_group_status_role', 'group_id', 'status', 'role'), # 成員數、管理員數的計算
+    )
 
     def to_dict(self):
         return {
@@ -218,7 +270,11 @@ class Invitation(db.Model):
     # sender: 發送邀請的使用者 (backref='sent_invitations' 已在 User 模型中定義)
     # receiver: 接收邀請的使用者 (backref='received_invitations' 已在 User 模型中定義)
 
-    __table_args__ = (UniqueConstraint('group_id', 'invited_user_id', name='_group_invited_user_uc'),) # 確保一個使用者在一個群組中只能有一條未處理的邀請
+    __table_args__ = (
+        UniqueConstraint('group_id', 'invited_user_id', name='_group_invited_user_uc'), # 確保一個使用者在一個群組中只能有一條未處理的邀請
+        db.Index('ix_invitation_invited_user_status', 'invited_user_id', 'status'), # 「我收到的待處理邀請」
+        db.Index('ix_invitation_invited_by', 'invited_by_user_id'),
+    )
 
     def to_dict(self):
         return {
@@ -237,7 +293,7 @@ class Invitation(db.Model):
 class GroupTransaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     group_id = db.Column(db.Integer, db.ForeignKey('group.id'), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    amount = db.Column(db.Numeric(14, AMOUNT_DECIMALS), nullable=False)
     type = db.Column(db.String(10), nullable=False) # 'income' or 'expense'
     description = db.Column(db.String(255), nullable=True)
     date = db.Column(db.Date, nullable=False)
@@ -250,11 +306,17 @@ class GroupTransaction(db.Model):
     # creator: 記錄這筆交易的使用者 (backref='recorded_group_transactions' 已在 User 模型中定義)
     # category: 交易的類別 (backref='group_transactions_with_category' 將在 Category 模型中定義)
 
+    __table_args__ = (
+        db.Index('ix_group_transaction_group_date', 'group_id', 'date', 'created_at', 'id'),
+        db.Index('ix_group_transaction_category', 'category_id'),
+        db.Index('ix_group_transaction_created_by', 'created_by_user_id'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
             'group_id': self.group_id,
-            'amount': self.amount,
+            'amount': amount_to_json(self.amount),
             'type': self.type,
             'description': self.description,
             'date': self.date.isoformat() if self.date else None,
@@ -267,15 +329,978 @@ class GroupTransaction(db.Model):
         }
 
 
-# --- 數據庫初始化 (在應用程式首次請求前創建所有表) ---
-# --- 數據庫初始化 (在應用程式首次請求前創建所有表) ---
-# 使用一個旗標確保只在首次請求時執行 db.create_all()
-# 因為 @app.before_first_request 在 Flask 2.3+ 中已被移除
-with app.app_context():
-    db.create_all()
-# 這裡不再需要 @app.before_first_request 裝飾器
-# 而是直接在應用上下文(app context)中執行 db.create_all()
-# 這樣確保在 app.run() 之前就創建好表
+# --- 每日彙總表 (Rollup) ---
+# 以 (擁有者, 日期, 類別, 類型) 為鍵，預先累計金額與筆數。
+# 儀表板的總覽、趨勢與類別分佈都改讀這張表，成本只跟「有交易的天數」有關，而非交易筆數。
+# 個人交易的擁有者為 ('user', user_id)，群組交易為 ('group', group_id)。
+class DailyRollup(db.Model):
+    __tablename__ = 'daily_rollup'
+    owner_type = db.Column(db.String(10), primary_key=True) # 'user' or 'group'
+    owner_id = db.Column(db.Integer, primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, primary_key=True) # 不設外鍵，刪除類別時不需先處理彙總表
+    type = db.Column(db.String(10), primary_key=True) # 'income' or 'expense'
+    amount = db.Column(db.Numeric(16, AMOUNT_DECIMALS), nullable=False, default=0) # 當日該類別的金額總和
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"DailyRollup('{self.owner_type}', {self.owner_id}, '{self.date}', {self.category_id}, '{self.type}', {self.amount})"
+
+ROLLUP_KEY_COLUMNS = ('owner_type', 'owner_id', 'date', 'category_id', 'type')
+ROLLUP_SOURCE_COLUMNS = {
+    Transaction: ('user_id', 'date', 'category_id', 'type'),
+    GroupTransaction: ('group_id', 'date', 'category_id', 'type'),
+}
+
+def rollup_key(obj, values=None):
+    values = values or {}
+    get = lambda name: values[name] if name in values else getattr(obj, name)
+    if isinstance(obj, Transaction):
+        owner = ('user', int(get('user_id')))
+    else:
+        owner = ('group', int(get('group_id')))
+    return owner + (get('date'), int(get('category_id')), get('type'))
+
+def previous_values(obj, names):
+    # 在 flush 中取得屬性修改前的值 (沒被修改的屬性則回傳目前的值)
+    state = inspect(obj)
+    values = {}
+    for name in names:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.unchanged:
+            values[name] = history.unchanged[0]
+        else:
+            values[name] = getattr(obj, name)
+    return values
+
+def upsert_increment(conn, table, key, increments):
+    """以主鍵 key 找到該列並把 increments 中的欄位累加上去，列不存在則新增"""
+    if conn.dialect.name in ('postgresql', 'sqlite'):
+        # 同一個鍵可能被多個請求同時更新，用 INSERT ... ON CONFLICT 原子地累加
+        insert_fn = postgresql_insert if conn.dialect.name == 'postgresql' else sqlite_insert
+        stmt = insert_fn(table).values(**key, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + stmt.excluded[name] for name in increments}
+        )
+        conn.execute(stmt)
+    else:
+        where = [table.c[name] == value for name, value in key.items()]
+        result = conn.execute(table.update().where(*where).values(
+            **{name: table.c[name] + value for name, value in increments.items()}
+        ))
+        if result.rowcount == 0:
+            conn.execute(table.insert().values(**key, **increments))
+
+def apply_rollup_deltas(conn, deltas):
+    """把 {rollup 鍵: [金額變化, 筆數變化]} 累加進彙總表，並清掉筆數歸零的列"""
+    table = DailyRollup.__table__
+    touched_owners = set()
+    for key, (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+        touched_owners.add(key[:2])
+        upsert_increment(conn, table, dict(zip(ROLLUP_KEY_COLUMNS, key)), {'amount': amount, 'transaction_count': count})
+
+    for owner_type, owner_id in touched_owners:
+        conn.execute(table.delete().where(
+            table.c.owner_type == owner_type,
+            table.c.owner_id == owner_id,
+            table.c.transaction_count <= 0
+        ))
+
+def rollup_deltas_from_query(query):
+    """針對即將被批次刪除 (query.delete()) 的交易，先彙總出要扣回的數值"""
+    model = query.column_descriptions[0]['entity']
+    owner_col = model.user_id if model is Transaction else model.group_id
+    owner_type = 'user' if model is Transaction else 'group'
+    rows = query.with_entities(
+        owner_col, model.date, model.category_id, model.type,
+        func.sum(model.amount), func.count(model.id)
+    ).group_by(owner_col, model.date, model.category_id, model.type).all()
+    return {
+        (owner_type, int(owner_id), day, category_id, tx_type): [-(amount or 0), -count]
+        for owner_id, day, category_id, tx_type, amount, count in rows
+    }
+
+@event.listens_for(db.session, 'after_flush')
+def maintain_daily_rollups(session, flush_context):
+    # 與交易的 INSERT/UPDATE/DELETE 在同一個資料庫交易中更新彙總表
+    deltas = defaultdict(lambda: [0, 0])
+    tracked = (Transaction, GroupTransaction)
+    for obj in session.new:
+        if isinstance(obj, tracked):
+            key = rollup_key(obj)
+            deltas[key][0] += obj.amount
+            deltas[key][1] += 1
+    for obj in session.deleted:
+        if isinstance(obj, tracked):
+            old = previous_values(obj, ('amount',) + ROLLUP_SOURCE_COLUMNS[type(obj)])
+            key = rollup_key(obj, old)
+            deltas[key][0] -= old['amount']
+            deltas[key][1] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, tracked) and session.is_modified(obj):
+            old = previous_values(obj, ('amount',) + ROLLUP_SOURCE_COLUMNS[type(obj)])
+            old_key, new_key = rollup_key(obj, old), rollup_key(obj)
+            deltas[old_key][0] -= old['amount']
+            deltas[old_key][1] -= 1
+            deltas[new_key][0] += obj.amount
+            deltas[new_key][1] += 1
+    if deltas:
+        apply_rollup_deltas(session.connection(), deltas)
+
+def rollup_query(owner_type, owner_id):
+    return DailyRollup.query.filter(DailyRollup.owner_type == owner_type, DailyRollup.owner_id == int(owner_id))
+
+
+# --- 擁有者資料版本 ---
+# 每個使用者 / 群組一個遞增的版本號，與資料寫入在同一個資料庫交易中遞增。
+# 回應快取把版本號放進鍵值，寫入後版本改變，舊的快取自然失效 (多個 worker 之間也一致)。
+class OwnerVersion(db.Model):
+    __tablename__ = 'owner_version'
+    owner_type = db.Column(db.String(20), primary_key=True) # 'user' or 'group'
+    owner_id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+def bump_owner_versions(conn, owners):
+    table = OwnerVersion.__table__
+    for owner_type, owner_id in sorted(owners):
+        upsert_increment(conn, table, {'owner_type': owner_type, 'owner_id': int(owner_id)}, {'version': 1})
+
+def owner_version(owner_type, owner_id):
+    # 同一個請求內 (ETag 與回應快取) 只查一次
+    versions = g.setdefault('owner_versions', {})
+    key = (owner_type, int(owner_id))
+    if key not in versions:
+        versions[key] = db.session.query(OwnerVersion.version).filter_by(
+            owner_type=owner_type, owner_id=int(owner_id)
+        ).scalar() or 0
+    return versions[key]
+
+USER_PAYLOAD_FIELDS = ('username', 'is_active') # User.to_dict() 中會變動的欄位；群組的回應只用到 username
+
+def owners_affected_by(session, obj):
+    """回傳此物件的變更會影響到哪些擁有者的統計資料"""
+    if isinstance(obj, Transaction):
+        return {('user', int(obj.user_id))}
+    if isinstance(obj, GroupTransaction):
+        return {('group', int(obj.group_id))}
+    if isinstance(obj, Category):
+        owners = {('user', int(obj.user_id))} if obj.user_id is not None else set()
+        if obj.id is not None and obj not in session.new:
+            # 類別名稱會出現在群組的類別分佈中，使用到此類別的群組也要失效
+            group_ids = session.connection().execute(
+                db.select(GroupTransaction.group_id).where(GroupTransaction.category_id == obj.id).distinct()
+            ).scalars()
+            owners |= {('group', group_id) for group_id in group_ids}
+        return owners
+    if isinstance(obj, Group):
+        return {('group', int(obj.id))}
+    if isinstance(obj, GroupMember):
+        # 成員數、角色會出現在群組列表與群組詳情中；成員版本號用來判斷 token 內的 claims 是否過期
+        return {('group', int(obj.group_id)), ('membership', int(obj.user_id))}
+    if isinstance(obj, User):
+        changed = None # 新增或刪除
+        if obj not in session.new and obj not in session.deleted:
+            # 密碼雜湊 (登入時重新雜湊、修改密碼) 不會出現在任何回應中，只看回應中用到的欄位
+            state = inspect(obj)
+            changed = {name for name in USER_PAYLOAD_FIELDS if state.attrs[name].history.has_changes()}
+            if not changed:
+                return set()
+        owners = {('user', int(obj.id))}
+        if obj not in session.new and (changed is None or 'username' in changed):
+            # 使用者名稱會出現在其所屬群組的成員列表與交易記錄者欄位
+            group_ids = session.connection().execute(
+                db.select(GroupMember.group_id).where(GroupMember.user_id == obj.id)
+            ).scalars()
+            owners |= {('group', group_id) for group_id in group_ids}
+        return owners
+    return set()
+
+@event.listens_for(db.session, 'after_flush')
+def bump_versions_on_flush(session, flush_context):
+    owners = set()
+    for obj in list(session.new) + list(session.deleted):
+        owners |= owners_affected_by(session, obj)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            owners |= owners_affected_by(session, obj)
+    if owners:
+        bump_owner_versions(session.connection(), owners)
+
+
+# --- 回應快取 ---
+response_cache = cache.create_cache(
+    os.getenv('CACHE_URL'),
+    max_entries=int(os.getenv('CACHE_MAX_ENTRIES', 1024)),
+    ttl=int(os.getenv('CACHE_TTL', 300))
+)
+
+def response_cache_key(owner_type, owner_id):
+    # 擁有者 + 資料版本 + 路徑 + 查詢參數
+    args = '&'.join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    return f"{owner_type}:{int(owner_id)}:v{owner_version(owner_type, owner_id)}:{request.path}?{args}"
+
+
+# --- 群組成員權限 ---
+# 每個群組 API 都要確認使用者是成員 (及其角色)。結果連同當時的成員版本號 (owner_version('membership'))
+# 放在快取中；成員異動 (接受邀請、退出、移除、變更角色、刪除群組) 會在同一交易中提高資料庫裡的版本號，
+# 所以每次使用前以一次主鍵查詢比對版本，其他 worker 的行程內快取也不會沿用已被撤銷的角色。
+membership_cache = cache.create_cache(
+    os.getenv('MEMBERSHIP_CACHE_URL', os.getenv('CACHE_URL')),
+    max_entries=int(os.getenv('MEMBERSHIP_CACHE_MAX_ENTRIES', 4096)),
+    ttl=int(os.getenv('MEMBERSHIP_CACHE_TTL', 30))
+)
+
+def membership_cache_key(group_id, user_id):
+    return f"membership:{int(group_id)}:{int(user_id)}"
+
+def group_role(group_id, user_id=None):
+    """回傳使用者在群組中的角色 ('admin' / 'member')，不是活躍成員時回傳 None"""
+    user_id = int(user_id if user_id is not None else get_jwt_identity())
+    roles = g.setdefault('group_roles', {}) # 同一個請求內只解析一次
+    key = (int(group_id), user_id)
+    if key not in roles:
+        role = role_from_token(*key)
+        if role is cache.MISSING:
+            version = membership_version(user_id)
+            cached = membership_cache.get(membership_cache_key(*key))
+            if isinstance(cached, list) and cached[0] == version: # 舊格式 (只有角色) 的項目視為未命中
+                role = cached[1]
+            else:
+                # 先取版本號再查角色；期間若有異動，存入的版本號只會較舊，下次使用時自然重新查詢
+                role = db.session.query(GroupMember.role).filter_by(
+                    group_id=key[0], user_id=user_id, status='accepted'
+                ).scalar()
+                membership_cache.set(membership_cache_key(*key), [version, role]) # 非成員 (None) 也快取
+        roles[key] = role
+    return roles[key]
+
+def invalidate_memberships(group_id, user_ids):
+    # 版本號已讓舊的項目失效，這裡只是順便釋放本行程的快取並清掉本請求內已解析的結果
+    roles = g.setdefault('group_roles', {})
+    versions = g.setdefault('owner_versions', {})
+    for user_id in user_ids:
+        membership_cache.delete(membership_cache_key(group_id, user_id))
+        roles.pop((int(group_id), int(user_id)), None)
+        versions.pop(('membership', int(user_id)), None)
+        if str(user_id) == get_jwt_identity():
+            g.reissue_access_token = True # 自己的成員身份改變了，回應時附上新的 token
+
+# --- JWT 成員權限 claims ---
+# access token 內附帶所屬群組的角色與成員版本號 (mv)。版本號仍是最新時，
+# 群組 API 直接以 token 授權，不需查詢 GroupMember；版本過期 (成員異動) 時退回快取 / 資料庫，
+# 並在回應的 X-Access-Token 標頭附上重新簽發的 token。
+JWT_MEMBERSHIP_CLAIMS = os.getenv('JWT_MEMBERSHIP_CLAIMS', 'true').lower() == 'true'
+JWT_MEMBERSHIP_CLAIMS_MAX_GROUPS = int(os.getenv('JWT_MEMBERSHIP_CLAIMS_MAX_GROUPS', 100)) # 避免 token 過大
+
+def membership_version(user_id):
+    # 不放進快取：只有資料庫中的版本號能反映其他 worker 的成員異動 (同一請求內只查一次)
+    return owner_version('membership', user_id)
+
+def membership_claims(user_id):
+    if not JWT_MEMBERSHIP_CLAIMS:
+        return {}
+    # 先取版本號再查成員；若期間有異動，token 的版本號只會較舊，使用時自然會退回資料庫
+    version = owner_version('membership', user_id)
+    rows = db.session.query(GroupMember.group_id, GroupMember.role).filter_by(
+        user_id=int(user_id), status='accepted'
+    ).all()
+    if len(rows) > JWT_MEMBERSHIP_CLAIMS_MAX_GROUPS:
+        return {}
+    return {'mv': version, 'groups': {str(group_id): role for group_id, role in rows}}
+
+def issue_access_token(user_id):
+    return create_access_token(identity=str(user_id), additional_claims=membership_claims(user_id))
+
+def role_from_token(group_id, user_id):
+    """token 內的成員版本號仍是最新時，直接從 claims 取得角色；無法判斷時回傳 MISSING"""
+    claims = get_jwt()
+    if 'mv' not in claims or str(user_id) != get_jwt_identity():
+        return cache.MISSING
+    current = membership_version(user_id)
+    if claims['mv'] != current:
+        # token 較舊才重新簽發；比讀到的版本還新 (例如讀到落後的副本) 時不重發，以免換成較舊的 claims
+        if claims['mv'] < current:
+            g.reissue_access_token = True
+        return cache.MISSING
+    return claims['groups'].get(str(group_id))
+
+@api.after_app_request
+def attach_reissued_access_token(response):
+    if JWT_MEMBERSHIP_CLAIMS and g.get('reissue_access_token'):
+        response.headers['X-Access-Token'] = issue_access_token(get_jwt_identity())
+    return response
+
+# 批次子請求 (POST /api/batch) 的 environ 帶有此標記：外層請求已驗證過 JWT，
+# claims 放在共用 app context 的 g 中，子請求直接沿用，不再解碼與驗證同一個 token
+BATCH_JWT_ENVIRON_KEY = 'accweb.batch_jwt_verified'
+
+def jwt_required(*args, **kwargs):
+    """flask_jwt_extended.jwt_required；批次子請求沿用外層請求已驗證的 JWT"""
+    reuse_batch_jwt = not args and not kwargs # 只有預設的 access token 檢查與外層請求相同
+    def decorator(view):
+        verified_view = flask_jwt_required(*args, **kwargs)(view)
+        @wraps(view)
+        def wrapper(*view_args, **view_kwargs):
+            if reuse_batch_jwt and request.environ.get(BATCH_JWT_ENVIRON_KEY):
+                return current_app.ensure_sync(view)(*view_args, **view_kwargs)
+            return verified_view(*view_args, **view_kwargs)
+        return wrapper
+    return decorator
+
+def group_member_required(role=None, error="群組未找到或您不是該群組成員", status_code=404):
+    """確認目前使用者是 URL 中 group_id 的活躍成員；指定 role 時還需具備該角色"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            member_role = group_role(kwargs['group_id'])
+            if member_role is None or (role is not None and member_role != role):
+                return jsonify({"error": error}), status_code
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- 條件式 GET (ETag / If-None-Match) ---
+# ETag 由擁有者的資料版本號計算，不需執行查詢或序列化 JSON 就能判斷資料是否改變。
+# 部署新版本時回應格式可能不同，ETAG_SALT (預設為 Render 提供的 commit) 也會納入計算。
+ETAG_SALT = os.getenv('ETAG_SALT', os.getenv('RENDER_GIT_COMMIT', ''))
+
+def membership_data_tag(user_id):
+    # 群組列表 / 使用者資訊的內容取決於：自己的資料版本 + 所屬的各群組及其版本
+    rows = db.session.query(GroupMember.group_id, GroupMember.role, OwnerVersion.version).outerjoin(
+        OwnerVersion, db.and_(OwnerVersion.owner_type == 'group', OwnerVersion.owner_id == GroupMember.group_id)
+    ).filter(GroupMember.user_id == user_id, GroupMember.status == 'accepted').order_by(GroupMember.group_id).all()
+    groups = ','.join(f"{group_id}:{role}:{version or 0}" for group_id, role, version in rows)
+    return f"user-{int(user_id)}-v{owner_version('user', user_id)}-groups[{groups}]"
+
+def data_tag(owner_type, view_kwargs):
+    if owner_type == 'user':
+        return f"user-{int(get_jwt_identity())}-v{owner_version('user', get_jwt_identity())}"
+    if owner_type == 'group':
+        group_id = view_kwargs['group_id']
+        return f"group-{group_id}-v{owner_version('group', group_id)}"
+    return membership_data_tag(get_jwt_identity())
+
+def compute_etag(tag):
+    raw = f"{ETAG_SALT}|{tag}|{request.full_path}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+def conditional_get(owner_type):
+    """為 GET API 加上以資料版本計算的 ETag，內容沒變時直接回 304"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.if_none_match:
+                # 群組資料必須先確認是成員，才能回覆 304
+                if owner_type != 'group' or group_role(kwargs['group_id']) is not None:
+                    etag = compute_etag(data_tag(owner_type, kwargs))
+                    if request.if_none_match.contains_weak(etag):
+                        response = make_response('', 304)
+                        response.set_etag(etag, weak=True)
+                        response.headers['Cache-Control'] = 'private, no-cache'
+                        return response
+
+            # 先取得版本號再執行查詢；若期間有寫入，得到的資料只會比 ETag 更新，下次請求自然不相符
+            tag = data_tag(owner_type, kwargs)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200: # 群組 API 回傳 200 代表已通過成員檢查
+                response.set_etag(compute_etag(tag), weak=True)
+                response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+# --- 效能量測 (METRICS_ENABLED=true 時才啟用，見 metrics.py) ---
+def cache_metric_samples(field):
+    return [({'cache': name}, stats.get(field, 0))
+            for name, stats in (('responses', response_cache.stats()), ('memberships', membership_cache.stats()))]
+
+def pool_metric_samples(field):
+    stats = dbpool.stats(db.engine)
+    return [({}, stats[field])] if field in stats else []
+
+if metrics.METRICS_ENABLED:
+    for field in ('hits', 'misses', 'evictions'):
+        metrics.register_collector(f'accweb_cache_{field}_total', 'counter', f'Cache {field}.',
+                                   lambda field=field: cache_metric_samples(field))
+    for name, field in (('size', 'pool_size'), ('checked_out', 'checked_out'), ('overflow', 'overflow')):
+        metrics.register_collector(f'accweb_db_pool_{name}', 'gauge', f'Connection pool {name}.',
+                                   lambda field=field: pool_metric_samples(field))
+    for name, field in (('connects', 'connects'), ('checkouts', 'checkouts'), ('invalidations', 'invalidations'),
+                        ('timeouts', 'timeouts'), ('wait_seconds', 'wait_seconds_total')):
+        metrics.register_collector(f'accweb_db_pool_{name}_total', 'counter', f'Connection pool {name}.',
+                                   lambda field=field: pool_metric_samples(field))
+
+# --- 數據庫初始化 ---
+# 不再於 import 時執行 db.create_all()，改用 migrations.py 的版本化遷移。
+# 部署時 (或本機第一次啟動前) 執行：flask --app app db-upgrade
+@api.cli.command('db-upgrade')
+def db_upgrade_command():
+    """套用所有尚未執行的資料庫遷移"""
+    applied = migrations.upgrade(db.engine, db.metadata)
+    print(f"Applied migrations: {applied}" if applied else "Database schema is up to date.")
+
+@api.cli.command('rebuild-rollups')
+@click.option('--owner-type', type=click.Choice(['user', 'group']), default=None, help='只重建指定類型的擁有者')
+@click.option('--owner-id', type=int, default=None, help='只重建指定的使用者或群組 ID')
+def rebuild_rollups_command(owner_type, owner_id):
+    """從交易明細重新計算每日彙總表 (回填既有資料或修正偏差)"""
+    with db.engine.begin() as conn:
+        count = migrations.backfill_daily_rollups(conn, db.metadata, owner_type, owner_id, replace=True)
+    print(f"Rebuilt {count} rollup rows.")
+
+# --- 分頁輔助函數 (Keyset / Cursor 分頁) ---
+# 傳統 page/per_page 分頁使用 OFFSET，頁數越深越慢，且每頁都要額外跑一次 COUNT(*)。
+# cursor 模式沿用列表的排序 (date DESC, created_at DESC, id DESC)，
+# 以上一頁最後一筆的排序鍵作為起點，任何深度都只需掃描 per_page + 1 筆。
+
+def encode_cursor(item):
+    payload = json.dumps([item.date.isoformat(), item.created_at.isoformat(), item.id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        date_str, created_at_str, item_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return date.fromisoformat(date_str), datetime.fromisoformat(created_at_str), int(item_id)
+    except (ValueError, TypeError, UnicodeEncodeError):
+        raise ValueError("Invalid cursor")
+
+def wants_cursor_pagination():
+    # 只有明確帶上 cursor 參數 (第一頁可為空字串) 或 pagination=cursor 時才啟用，原有 page/per_page 行為不變
+    return 'cursor' in request.args or request.args.get('pagination') == 'cursor'
+
+def keyset_paginate(query, model, cursor, per_page, include_total=False):
+    """以 (date, created_at, id) 為鍵的 cursor 分頁，回傳 (items, next_cursor, total)；per_page 由呼叫端檢查需 >= 1"""
+    # COUNT(*) 只在呼叫端要求時才執行
+    total = query.order_by(None).count() if include_total else None
+
+    if cursor:
+        cursor_key = decode_cursor(cursor)
+        query = query.filter(tuple_(model.date, model.created_at, model.id) < cursor_key)
+
+    rows = query.order_by(None).order_by(
+        model.date.desc(), model.created_at.desc(), model.id.desc()
+    ).limit(per_page + 1).all() # 多取一筆以判斷是否還有下一頁
+
+    items = rows[:per_page]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > per_page else None
+    return items, next_cursor, total
+
+# --- 交易篩選 ---
+
+def filter_transactions(query, model):
+    """依查詢參數 type / category_id / start_date / end_date / search_term 篩選交易；日期格式錯誤時拋出 ValueError"""
+    transaction_type = request.args.get('type') # 'income' or 'expense'
+    category_id = request.args.get('category_id', type=int)
+    start_date_str = request.args.get('start_date') # YYYY-MM-DD
+    end_date_str = request.args.get('end_date')     # YYYY-MM-DD
+    search_term = request.args.get('search_term')
+
+    if transaction_type in ['income', 'expense']:
+        query = query.filter(model.type == transaction_type)
+    if category_id:
+        query = query.filter(model.category_id == category_id)
+    if start_date_str:
+        try:
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError("Invalid start_date format. Use YYYY-MM-DD.")
+        query = query.filter(model.date >= start_date)
+    if end_date_str:
+        try:
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError("Invalid end_date format. Use YYYY-MM-DD.")
+        query = query.filter(model.date <= end_date)
+    if search_term:
+        # 檢查 description 是否包含 search_term 的每個詞 (不區分大小寫)；sort=relevance 時依相關度排序
+        query = search_descriptions(query, model, search_term, ranked=request.args.get('sort') == 'relevance')
+    return query
+
+
+# --- 交易說明搜尋 ---
+# PostgreSQL：pg_trgm GIN 索引 (ILIKE 可直接使用) + word_similarity 排序
+# SQLite：FTS5 trigram 虛擬表 + bm25 排序
+# 兩者都是「子字串」比對，多個詞之間為 AND；索引不存在時退回原本的 ILIKE。
+_search_backends = {}
+
+def description_search_backend():
+    engine = db.engine
+    if engine.url not in _search_backends:
+        backend = None
+        with engine.connect() as conn:
+            if engine.dialect.name == 'postgresql':
+                if conn.execute(db.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first():
+                    backend = 'pg_trgm'
+            elif engine.dialect.name == 'sqlite':
+                if conn.execute(db.text("SELECT 1 FROM sqlite_master WHERE name = 'transaction_fts'")).first():
+                    backend = 'sqlite_fts'
+        _search_backends[engine.url] = backend
+    return _search_backends[engine.url]
+
+def search_descriptions(query, model, search_term, ranked=False):
+    words = search_term.split()
+    if not words:
+        return query
+    backend = description_search_backend()
+
+    if backend == 'sqlite_fts':
+        # trigram 分詞至少需要 3 個字元，較短的詞仍用 LIKE 篩選 (在 FTS 命中的結果內)
+        indexed = [w for w in words if len(w) >= 3]
+        words = [w for w in words if len(w) < 3]
+        if indexed:
+            fts_name = f"{model.__tablename__}_fts"
+            fts = db.table(fts_name, db.column('rowid'), db.column('rank'))
+            match = ' AND '.join('"%s"' % w.replace('"', '""') for w in indexed)
+            hits = db.select(fts.c.rowid, fts.c.rank).where(
+                db.literal_column(fts_name).op('MATCH')(match)
+            ).subquery()
+            query = query.join(hits, model.id == hits.c.rowid)
+            if ranked:
+                query = query.order_by(hits.c.rank) # bm25 分數越小越相關
+    elif backend == 'pg_trgm' and ranked:
+        query = query.order_by(func.word_similarity(search_term, model.description).desc())
+
+    for word in words:
+        query = query.filter(model.description.ilike(f"%{word}%"))
+    return query
+
+
+# --- 串流匯出 ---
+EXPORT_BATCH_SIZE = 1000
+# 匯出整個帳本時排序與逐批 FETCH 可能超過一般請求的 DB_STATEMENT_TIMEOUT_MS (預設 30 秒)，
+# 只在匯出的資料庫交易內以 SET LOCAL 放寬 (0 表示不限制)，交易結束後自動恢復
+EXPORT_STATEMENT_TIMEOUT_MS = int(os.getenv('EXPORT_STATEMENT_TIMEOUT_MS', 600000))
+
+def export_columns(model):
+    columns = [
+        ('id', model.id),
+        ('date', model.date),
+        ('type', model.type),
+        ('amount', model.amount),
+        ('category_id', model.category_id),
+        ('category_name', Category.name),
+        ('description', model.description),
+        ('created_at', model.created_at),
+    ]
+    if model is GroupTransaction:
+        columns += [('created_by_user_id', model.created_by_user_id), ('created_by_username', User.username)]
+    return columns
+
+def export_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return amount_to_json(value)
+    return value
+
+def stream_transactions_export(model, query, filename):
+    """以伺服器端游標逐批讀取，邊讀邊輸出 CSV / NDJSON，記憶體用量不隨資料量增加"""
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({"error": "Invalid format. Must be 'csv' or 'ndjson'."}), 400
+
+    columns = export_columns(model)
+    names = [name for name, _ in columns]
+    stmt = query.with_entities(*[col for _, col in columns]).outerjoin(
+        Category, model.category_id == Category.id
+    )
+    if model is GroupTransaction:
+        stmt = stmt.outerjoin(User, model.created_by_user_id == User.id)
+    stmt = stmt.order_by(model.date.desc(), model.created_at.desc(), model.id.desc()).statement
+
+    def generate():
+        if db.session.connection().dialect.name == 'postgresql':
+            db.session.execute(db.text(f'SET LOCAL statement_timeout = {EXPORT_STATEMENT_TIMEOUT_MS:d}'))
+        # yield_per 會啟用 stream_results (PostgreSQL 上為具名的伺服器端游標)
+        result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        if export_format == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            buffer.write('\ufeff') # 讓 Excel 以 UTF-8 開啟中文內容
+            writer.writerow(names)
+            for partition in result.partitions():
+                writer.writerows([export_value(v) for v in row] for row in partition)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+            yield buffer.getvalue()
+        else:
+            for partition in result.partitions():
+                yield ''.join(
+                    json.dumps(dict(zip(names, map(export_value, row))), ensure_ascii=False) + '\n'
+                    for row in partition
+                )
+
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}.{export_format}'
+    return response
+
+
+# --- 列表欄位選擇 (fields= / format=compact) ---
+# 指定 fields 時只 SELECT 這些欄位，不建立 ORM 物件，也不 JOIN 用不到的類別 / 使用者表；
+# format=compact 則把每筆交易輸出成陣列，欄位名稱只在 "fields" 中出現一次。
+# 兩者都沒帶時維持原本的 to_dict() 輸出。
+
+def list_field_columns(model):
+    """列表可選的欄位 -> SQL 欄位，順序與 to_dict() 相同"""
+    columns = {'id': model.id}
+    if model is GroupTransaction:
+        columns['group_id'] = model.group_id
+    columns.update({
+        'amount': model.amount,
+        'type': model.type,
+        'description': model.description,
+        'date': model.date,
+        'created_at': model.created_at,
+        'category_id': model.category_id,
+        'category_name': Category.name,
+    })
+    if model is GroupTransaction:
+        columns['created_by_user_id'] = model.created_by_user_id
+        columns['created_by_username'] = User.username
+    else:
+        columns['user_id'] = model.user_id
+    return columns
+
+def requested_list_fields(model):
+    """解析 fields / format 參數；都沒指定時回傳 None，欄位名稱錯誤時拋出 ValueError"""
+    fields_arg = request.args.get('fields')
+    compact = request.args.get('format') == 'compact'
+    if not fields_arg and not compact:
+        return None
+    available = list_field_columns(model)
+    if not fields_arg:
+        return list(available)
+    fields = list(dict.fromkeys(name.strip() for name in fields_arg.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in available]
+    if unknown or not fields:
+        raise ValueError(f"Invalid fields: {', '.join(unknown)}. Allowed: {', '.join(available)}")
+    return fields
+
+def select_list_fields(query, model, fields):
+    """只查詢指定的欄位；排序鍵 (date, created_at, id) 一律帶上，cursor 分頁需要"""
+    columns = list_field_columns(model)
+    selected = list(dict.fromkeys(fields + ['id', 'date', 'created_at']))
+    query = query.with_entities(*[columns[name].label(name) for name in selected])
+    if 'category_name' in fields:
+        query = query.outerjoin(Category, model.category_id == Category.id)
+    if 'created_by_username' in fields:
+        query = query.outerjoin(User, model.created_by_user_id == User.id)
+    return query
+
+def list_payload(items, fields):
+    if fields is None:
+        return {"transactions": [t.to_dict() for t in items]}
+    if request.args.get('format') == 'compact':
+        return {"fields": fields, "rows": [[export_value(getattr(row, name)) for name in fields] for row in items]}
+    return {"transactions": [{name: export_value(getattr(row, name)) for name in fields} for row in items]}
+
+
+# --- 批次匯入輔助函數 ---
+BATCH_IMPORT_MAX_ROWS = int(os.getenv('BATCH_IMPORT_MAX_ROWS', 50000))
+BATCH_INSERT_CHUNK_SIZE = 1000
+
+def iter_batch_payload():
+    """逐筆讀出批次匯入的內容：JSON 陣列 (或 {"transactions": [...]})，或 NDJSON (每行一筆)"""
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        # NDJSON 以串流方式逐行解析，不需先把整個請求本文讀進記憶體
+        index = 0
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield index, json.loads(line)
+            except ValueError:
+                yield index, None
+            index += 1
+        return
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('transactions')
+    if not isinstance(data, list):
+        raise ValueError("Request body must be a JSON array or NDJSON stream")
+    yield from enumerate(data)
+
+def parse_transaction_row(data):
+    """驗證單筆交易並轉成欄位值，規則與 add_transaction 相同；不合法時拋出 ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("Invalid JSON object")
+    try:
+        amount = parse_amount(data.get('amount'))
+    except ValueError:
+        raise ValueError("Invalid amount or date format")
+    transaction_type = data.get('type')
+    category_id = data.get('category_id')
+    date_str = data.get('date')
+    if not all([amount, transaction_type, category_id, date_str]):
+        raise ValueError("Missing required fields (amount, type, category_id, date)")
+    if transaction_type not in ['income', 'expense']:
+        raise ValueError("Invalid transaction type")
+    try:
+        category_id = int(category_id)
+        transaction_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise ValueError("Invalid amount or date format")
+    return {
+        'amount': amount,
+        'type': transaction_type,
+        'description': data.get('description'),
+        'date': transaction_date,
+        'category_id': category_id,
+    }
+
+def bulk_import_transactions(model, owner_values, allowed_category_ids):
+    """
+    驗證並以分批 executemany 寫入交易，所有資料在同一個資料庫交易中提交。
+    回傳 (成功筆數, 每筆錯誤列表)。
+    """
+    rows, errors = [], []
+    parsed = []
+    for index, data in iter_batch_payload():
+        if index >= BATCH_IMPORT_MAX_ROWS:
+            raise ValueError(f"Too many rows (max {BATCH_IMPORT_MAX_ROWS})")
+        try:
+            parsed.append((index, parse_transaction_row(data)))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+
+    # 所有類別 ID 只用一次查詢驗證
+    category_ids = {values['category_id'] for _, values in parsed}
+    valid_category_ids = allowed_category_ids(category_ids) if category_ids else set()
+
+    now = datetime.utcnow()
+    deltas = defaultdict(lambda: [0, 0])
+    owner = ('user', int(owner_values['user_id'])) if model is Transaction else ('group', int(owner_values['group_id']))
+    for index, values in parsed:
+        if values['category_id'] not in valid_category_ids:
+            errors.append({'index': index, 'error': "Category not found or not owned by user"})
+            continue
+        rows.append(dict(values, created_at=now, **owner_values))
+        key = owner + (values['date'], values['category_id'], values['type'])
+        deltas[key][0] += values['amount']
+        deltas[key][1] += 1
+
+    if rows:
+        table = model.__table__
+        for start in range(0, len(rows), BATCH_INSERT_CHUNK_SIZE):
+            db.session.execute(table.insert(), rows[start:start + BATCH_INSERT_CHUNK_SIZE])
+        # Core 批次寫入不會觸發 flush 事件，彙總表與資料版本在同一交易中手動更新
+        conn = db.session.connection()
+        apply_rollup_deltas(conn, deltas)
+        bump_owner_versions(conn, {owner})
+        db.session.commit()
+
+    errors.sort(key=lambda e: e['index'])
+    return len(rows), errors
+
+def batch_import_response(inserted, errors):
+    body = {"inserted": inserted, "failed": len(errors), "errors": errors}
+    return jsonify(body), (201 if inserted else 400)
+
+# --- 統計輔助函數 ---
+
+def income_expense_sums(model):
+    """以條件加總一次掃描同時算出收入與支出，取代各跑一次 func.sum 的兩個查詢"""
+    return (
+        func.sum(case((model.type == 'income', model.amount), else_=0)).label('income'),
+        func.sum(case((model.type == 'expense', model.amount), else_=0)).label('expense'),
+    )
+
+TREND_INTERVALS = ('day', 'week', 'month', 'quarter', 'year')
+# 沒有資料的期別也會補 0，過大的範圍 (例如 interval=day 跨數百年) 會產生巨大的回應，超過時回 400
+TREND_MAX_PERIODS = int(os.getenv('TREND_MAX_PERIODS', 5000))
+
+def period_start(day, interval):
+    if interval == 'day':
+        return day
+    if interval == 'week':
+        return day - timedelta(days=day.weekday()) # ISO 週從星期一開始
+    if interval == 'month':
+        return day.replace(day=1)
+    if interval == 'quarter':
+        return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+    return date(day.year, 1, 1)
+
+def next_period_start(start, interval):
+    if interval == 'day':
+        return start + timedelta(days=1)
+    if interval == 'week':
+        return start + timedelta(days=7)
+    if interval == 'year':
+        return date(start.year + 1, 1, 1)
+    months = 1 if interval == 'month' else 3
+    month_index = start.month - 1 + months
+    return date(start.year + month_index // 12, month_index % 12 + 1, 1)
+
+def check_period_count(first, last, interval):
+    # first / last 為期別的起始日，first <= last
+    if interval == 'day':
+        count = (last - first).days + 1
+    elif interval == 'week':
+        count = (last - first).days // 7 + 1
+    else:
+        months = (last.year - first.year) * 12 + last.month - first.month
+        count = {'month': months, 'quarter': months // 3, 'year': last.year - first.year}[interval] + 1
+    if count > TREND_MAX_PERIODS:
+        raise ValueError(f"Date range too large for interval '{interval}' ({count} periods, "
+                         f"at most {TREND_MAX_PERIODS}). Narrow start_date / end_date or use a longer interval.")
+
+def period_label(start, interval):
+    # 與原本 to_char 的格式相同：YYYY-MM-DD / IYYY-IW / YYYY-MM，另外新增 YYYY-Qn / YYYY
+    if interval == 'day':
+        return start.isoformat()
+    if interval == 'week':
+        iso_year, iso_week, _ = start.isocalendar()
+        return f"{iso_year}-{iso_week:02d}"
+    if interval == 'month':
+        return start.strftime('%Y-%m')
+    if interval == 'quarter':
+        return f"{start.year}-Q{(start.month - 1) // 3 + 1}"
+    return str(start.year)
+
+def parse_date_arg(name):
+    value = (request.args.get(name) or '').strip()
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid {name} format. Use YYYY-MM-DD.")
+
+def parse_trend_args():
+    """查詢參數 interval / start_date / end_date；不合法時拋出 ValueError (訊息可直接回傳給前端)"""
+    interval = request.args.get('interval', 'month')
+    if interval not in TREND_INTERVALS:
+        raise ValueError("Invalid interval. Must be 'day', 'week', 'month', 'quarter', or 'year'.")
+    start_date = parse_date_arg('start_date')
+    end_date = parse_date_arg('end_date')
+    if start_date and end_date:
+        if start_date > end_date:
+            raise ValueError("start_date must be on or before end_date.")
+        check_period_count(period_start(start_date, interval), period_start(end_date, interval), interval)
+    return interval, start_date, end_date
+
+def bucket_trend(daily_rows, interval, start_date=None, end_date=None):
+    """把 (日期, 收入, 支出) 依 interval 分期加總，期間內沒有資料的期別補 0；期別過多時拋出 ValueError"""
+    buckets = {}
+    for day, income, expense in daily_rows:
+        bucket = buckets.setdefault(period_start(day, interval), [0, 0])
+        bucket[0] += income or 0
+        bucket[1] += expense or 0
+
+    if buckets:
+        first = period_start(start_date or min(buckets), interval)
+        last = period_start(end_date or max(buckets), interval)
+    elif start_date and end_date:
+        first, last = period_start(start_date, interval), period_start(end_date, interval)
+    else:
+        return []
+
+    if first > last: # 下面的迴圈以 current == last 結束，不能讓 first 超過 last
+        return []
+    check_period_count(first, last, interval)
+
+    rows = []
+    current = first
+    while True:
+        income, expense = buckets.get(current, (0, 0))
+        rows.append((period_label(current, interval), income, expense))
+        if current == last: # 先判斷再往後推，9999 年的最後一期不會算出超出範圍的日期
+            return rows
+        current = next_period_start(current, interval)
+
+def trend_for_owner(owner_type, owner_id):
+    """個人與群組的趨勢 API 共用；參數錯誤或期別過多時拋出 ValueError"""
+    interval, start_date, end_date = parse_trend_args()
+    query = rollup_query(owner_type, owner_id) # 從每日彙總表計算
+    if start_date:
+        query = query.filter(DailyRollup.date >= start_date)
+    if end_date:
+        query = query.filter(DailyRollup.date <= end_date)
+
+    # 一次 GROUP BY 取得每日的收入與支出 (每日彙總表上的列數只與天數有關)；
+    # 分期在 Python 中進行 (不依賴 PostgreSQL 的 to_char)，SQLite 與 PostgreSQL 結果一致
+    daily_data = query.with_entities(
+        DailyRollup.date,
+        *income_expense_sums(DailyRollup)
+    ).group_by(DailyRollup.date).order_by(DailyRollup.date).all()
+    return build_trend_data(bucket_trend(daily_data, interval, start_date, end_date))
+
+def build_trend_data(rows):
+    # rows: (period, income, expense)，已依 period 排序
+    trend_data = []
+    for period, income, expense in rows:
+        income = income or 0
+        expense = expense or 0
+        trend_data.append({
+            'period': period,
+            'income': amount_to_json(income),
+            'expense': amount_to_json(expense),
+            'balance': amount_to_json(income - expense)
+        })
+    return trend_data
+
+# --- 儀表板 ---
+# 儀表板原本分別呼叫 summary、trend、兩次 category_breakdown 與交易列表，每個請求各自驗證 JWT、
+# 檢查成員並掃描一次彙總表。這裡只讀取一次該擁有者的每日彙總 (日期 x 類別 x 類型)，
+# 在 Python 中同時算出總計 (不受日期篩選)、趨勢與收支類別分布，再加上最近幾筆交易。
+DASHBOARD_RECENT_MAX = 50
+
+def build_dashboard(owner_type, owner_id, transactions_query, model):
+    """查詢參數 interval / start_date / end_date / recent；參數錯誤時拋出 ValueError"""
+    interval, start_date, end_date = parse_trend_args()
+    recent = min(max(request.args.get('recent', 5, type=int), 0), DASHBOARD_RECENT_MAX)
+
+    category_join = DailyRollup.category_id == Category.id
+    if owner_type == 'user':
+        category_join = db.and_(category_join, db.or_(Category.user_id == int(owner_id), Category.user_id.is_(None)))
+    query = rollup_query(owner_type, owner_id).outerjoin(Category, category_join)
+    category_name = Category.name
+    if owner_type == 'group':
+        query, category_name, _ = group_category_columns(query)
+    rows = query.with_entities(DailyRollup.date, DailyRollup.type, DailyRollup.amount, category_name).all()
+
+    totals = {'income': 0, 'expense': 0}
+    daily = {}
+    breakdown = {'income': {}, 'expense': {}}
+    for day, kind, amount, category_name in rows:
+        totals[kind] += amount
+        if (start_date and day < start_date) or (end_date and day > end_date):
+            continue
+        daily.setdefault(day, {'income': 0, 'expense': 0})[kind] += amount
+        if category_name is not None:
+            breakdown[kind][category_name] = breakdown[kind].get(category_name, 0) + amount
+
+    daily_rows = [(day, sums['income'], sums['expense']) for day, sums in daily.items()]
+    recent_transactions = transactions_query.order_by(
+        model.date.desc(), model.created_at.desc(), model.id.desc()
+    ).limit(recent).all() if recent else []
+
+    return {
+        'summary': {
+            'total_income': amount_to_json(totals['income']),
+            'total_expense': amount_to_json(totals['expense']),
+            'balance': amount_to_json(totals['income'] - totals['expense']),
+        },
+        'trend': build_trend_data(bucket_trend(daily_rows, interval, start_date, end_date)),
+        'category_breakdown': {
+            kind: [{'category_name': name, 'type': kind, 'total_amount': amount_to_json(total)}
+                   for name, total in sorted(by_name.items(), key=lambda item: item[1], reverse=True)]
+            for kind, by_name in breakdown.items()
+        },
+        'recent_transactions': [t.to_dict() for t in recent_transactions],
+    }
 
 # Flask-Login 的 login_view 設置
 
@@ -284,7 +1309,7 @@ with app.app_context():
 # ...existing code...
 # app.py
 
-@app.route('/api/register', methods=['POST'])
+@api.route('/api/register', methods=['POST'])
 def register():
     data = request.get_json()
     username = data.get('username')
@@ -298,12 +1323,14 @@ def register():
 
     new_user = User(username=username)
     new_user.set_password(password)
+    new_user.group_memberships = [] # 新使用者還沒有群組，to_dict() 不需再查詢
     db.session.add(new_user)
     try:
-        db.session.commit() # 提交用戶，以便獲取 new_user.id
-
-        # 為新用戶添加預設類別 (這部分保留，因為個人記帳也需要類別)
-        add_default_categories_for_user(new_user.id)
+        # 預設類別由所有使用者共用，註冊只需寫入使用者本身，並在同一個交易中完成
+        db.session.flush() # 取得 new_user.id
+        user_id = new_user.id
+        user_data = new_user.to_dict()
+        db.session.commit()
 
         # ====== 開始刪除或註釋以下程式碼塊：自動創建個人群組 ======
         # default_group_name = f"{new_user.username} 的個人群組"
@@ -321,45 +1348,18 @@ def register():
         # db.session.commit() # 提交群組和成員
         # ====== 結束刪除或註釋程式碼塊 ======
 
-        # 刷新 new_user 對象，確保其 group_memberships 關係被加載
-        # 即使沒有群組，這行也應該保留，因為它會載入其他關係
-        db.session.refresh(new_user) 
-        # 或者更保險的方式是重新查詢帶有 eager loading 的用戶
-        # new_user = User.query.options(joinedload(User.group_memberships).joinedload(GroupMember.group)).get(new_user.id)
-
-        access_token = create_access_token(identity=str(new_user.id))
+        access_token = issue_access_token(user_id)
         return jsonify({
             "message": "User registered and logged in successfully",
             "access_token": access_token,
-            "user": new_user.to_dict() # 現在 to_dict() 可能會返回空群組列表
+            "user": user_data # 新使用者的群組列表為空
         }), 201
     except Exception as e:
         db.session.rollback()
         print("Registration failed:", e)
         return jsonify({"error": "Registration failed: " + str(e)}), 500
 
-# server/app.py 中的 add_default_categories_for_user 函數
-def add_default_categories_for_user(user_id):
-    """為新使用者添加一些預設類別"""
-    default_categories = [
-        Category(name='薪資', type='income', user_id=user_id),
-        Category(name='兼職', type='income', user_id=user_id),
-        Category(name='投資收益', type='income', user_id=user_id), # <-- 示例：新增一個收入類別
-        Category(name='禮金', type='income', user_id=user_id),      # <-- 示例：新增另一個收入類別
-        Category(name='餐飲', type='expense', user_id=user_id),
-        Category(name='交通', type='expense', user_id=user_id),
-        Category(name='購物', type='expense', user_id=user_id),
-        Category(name='娛樂', type='expense', user_id=user_id),
-        Category(name='水電費', type='expense', user_id=user_id),
-        Category(name='房租', type='expense', user_id=user_id), # 示例：新增一個支出類別
-        Category(name='醫療', type='expense', user_id=user_id), # 示例：新增一個支出類別
-    ]
-    db.session.add_all(default_categories)
-    db.session.commit()
-    print(f"Default categories added for user {user_id}")
-
-
-@app.route('/api/login', methods=['POST'])
+@api.route('/api/login', methods=['POST'])
 def login():
     data = request.get_json()
     username = data.get('username')
@@ -370,7 +1370,15 @@ def login():
     ).first() # 使用 joinedload 確保關係被載入
 
     if user and user.check_password(password):
-        access_token = create_access_token(identity=str(user.id))
+        if user.password_needs_rehash():
+            # PASSWORD_HASH_METHOD 改變了：趁有明文密碼時以新參數重新雜湊，失敗也不影響登入
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Password rehash failed for user {user.id}: {e}")
+        access_token = issue_access_token(user.id)
         return jsonify({
             "message": "Logged in successfully",
             "access_token": access_token,
@@ -379,12 +1387,13 @@ def login():
     else:
         return jsonify({"error": "名稱或密碼錯誤"}), 401
 
-@app.route('/api/logout', methods=['GET'])
+@api.route('/api/logout', methods=['GET'])
 @jwt_required()
 def logout():
     return jsonify({"message": "Logged out successfully"}), 200
-@app.route('/api/user', methods=['GET'])
+@api.route('/api/user', methods=['GET'])
 @jwt_required()
+@conditional_get('memberships')
 def get_current_user():
     user = User.query.options(
         joinedload(User.group_memberships).joinedload(GroupMember.group)
@@ -395,7 +1404,7 @@ def get_current_user():
     return jsonify(user.to_dict()), 200
 # --- 群組管理 API ---
 
-@app.route('/api/groups', methods=['POST'])
+@api.route('/api/groups', methods=['POST'])
 @jwt_required()
 def create_group():
     data = request.get_json()
@@ -414,38 +1423,85 @@ def create_group():
     group_member = GroupMember(group_id=new_group.id, user_id=get_jwt_identity(), role='admin', status='accepted')
     db.session.add(group_member)
     db.session.commit()
+    invalidate_memberships(new_group.id, [get_jwt_identity()])
 
     return jsonify({"message": "群組創建成功", "group": new_group.to_dict()}), 201
 
-@app.route('/api/groups', methods=['GET'])
+@api.route('/api/groups', methods=['GET'])
 @jwt_required()
+@conditional_get('memberships')
 def get_user_groups():
-    # 獲取當前使用者所屬的所有群組
-    memberships = GroupMember.query.filter_by(user_id=get_jwt_identity(), status='accepted').all()
+    # 獲取當前使用者所屬的所有群組：群組、建立者名稱、成員數 (與選用的收支總計) 在同一個查詢中取得，
+    # 不再逐一載入每個群組的成員列表與建立者
+    user_id = int(get_jwt_identity())
+    include_totals = request.args.get('include_totals', 'false').lower() == 'true'
+    my_group_ids = db.select(GroupMember.group_id).where(
+        GroupMember.user_id == user_id, GroupMember.status == 'accepted'
+    )
+    member_counts = db.select(
+        GroupMember.group_id, func.count().label('member_count')
+    ).where(GroupMember.group_id.in_(my_group_ids)).group_by(GroupMember.group_id).subquery()
+
+    columns = [Group.id, Group.name, Group.description, Group.created_by_user_id, Group.created_at,
+               User.username.label('created_by_username'), GroupMember.role, member_counts.c.member_count]
+    if include_totals:
+        # 總計由每日彙總表計算，不掃描交易明細
+        totals = db.select(
+            DailyRollup.owner_id.label('group_id'),
+            func.sum(case((DailyRollup.type == 'income', DailyRollup.amount), else_=0)).label('income'),
+            func.sum(case((DailyRollup.type == 'expense', DailyRollup.amount), else_=0)).label('expense'),
+            func.max(DailyRollup.date).label('last_transaction_date')
+        ).where(
+            DailyRollup.owner_type == 'group', DailyRollup.owner_id.in_(my_group_ids)
+        ).group_by(DailyRollup.owner_id).subquery()
+        columns += [totals.c.income, totals.c.expense, totals.c.last_transaction_date]
+
+    query = db.session.query(*columns).join(
+        GroupMember, db.and_(GroupMember.group_id == Group.id, GroupMember.user_id == user_id,
+                             GroupMember.status == 'accepted')
+    ).outerjoin(User, User.id == Group.created_by_user_id).outerjoin(
+        member_counts, member_counts.c.group_id == Group.id
+    )
+    if include_totals:
+        query = query.outerjoin(totals, totals.c.group_id == Group.id)
+
     groups_data = []
-    for membership in memberships:
-        group = membership.group # 透過關係獲取 Group 對象
-        if group:
-            group_dict = group.to_dict()
-            group_dict['your_role'] = membership.role # 附加上使用者在該群組的角色
-            group_dict['member_count'] = len(group.group_members) # 成員數量
-            groups_data.append(group_dict)
+    for row in query.order_by(GroupMember.id).all():
+        group_dict = {
+            'id': row.id,
+            'name': row.name,
+            'description': row.description,
+            'created_by_user_id': row.created_by_user_id,
+            'created_by_username': row.created_by_username,
+            'created_at': row.created_at.isoformat(),
+            'your_role': row.role, # 使用者在該群組的角色
+            'member_count': row.member_count or 0 # 成員數量
+        }
+        if include_totals:
+            income = row.income or 0
+            expense = row.expense or 0
+            group_dict['summary'] = {
+                'income': amount_to_json(income),
+                'expense': amount_to_json(expense),
+                'balance': amount_to_json(income - expense),
+                'last_transaction_date': row.last_transaction_date.isoformat() if row.last_transaction_date else None
+            }
+        groups_data.append(group_dict)
     return jsonify(groups_data), 200
 
-@app.route('/api/groups/<int:group_id>', methods=['GET'])
+@api.route('/api/groups/<int:group_id>', methods=['GET'])
 @jwt_required()
+@group_member_required()
+@conditional_get('group')
 def get_group_details(group_id):
-    # 確保使用者是群組成員
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您不是該群組成員"}), 404
-
-    group = group_member.group
+    group = db.session.get(Group, group_id)
     group_details = group.to_dict()
-    group_details['your_role'] = group_member.role
+    group_details['your_role'] = group_role(group_id)
 
     members_data = []
-    for member in group.group_members:
+    # 一次把成員與其使用者名稱載入，避免每位成員各查一次 User
+    members = GroupMember.query.options(joinedload(GroupMember.member_user)).filter_by(group_id=group_id).all()
+    for member in members:
         members_data.append(member.to_dict())
     group_details['members'] = members_data
 
@@ -454,15 +1510,11 @@ def get_group_details(group_id):
 
     return jsonify(group_details), 200
 
-@app.route('/api/groups/<int:group_id>', methods=['PUT'])
+@api.route('/api/groups/<int:group_id>', methods=['PUT'])
 @jwt_required()
+@group_member_required(role='admin', error="群組未找到或您無權修改該群組", status_code=403) # 只有管理員可以修改
 def update_group(group_id):
-    # 檢查使用者是否為群組管理員
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), role='admin', status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您無權修改該群組"}), 403 # Forbidden
-
-    group = group_member.group
+    group = db.session.get(Group, group_id)
     data = request.get_json()
     group.name = data.get('name', group.name)
     group.description = data.get('description', group.description)
@@ -478,14 +1530,10 @@ def update_group(group_id):
 
 # app.py (在 delete_group 函數中)
 
-@app.route('/api/groups/<int:group_id>', methods=['DELETE'])
+@api.route('/api/groups/<int:group_id>', methods=['DELETE'])
 @jwt_required()
+@group_member_required(role='admin', error="群組未找到或您無權刪除該群組", status_code=403) # 只有管理員可以刪除
 def delete_group(group_id):
-    # 檢查使用者是否為群組管理員
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), role='admin', status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您無權刪除該群組"}), 403 # Forbidden
-
     group = Group.query.get(group_id) # 直接查詢群組，確保關係是 lazy 加載的
     if not group: # 再次檢查群組是否存在 (雖然前面 GroupMember 檢查過了，但這是更直接的)
         return jsonify({"error": "群組未找到"}), 404
@@ -507,24 +1555,31 @@ def delete_group(group_id):
     # 所以不再檢查交易記錄，而是直接在 try 塊中刪除。
 
     try:
+        # 批次刪除不會觸發 ORM 事件，先記下成員以便提交後清除權限快取
+        member_user_ids = [user_id for (user_id,) in db.session.query(GroupMember.user_id).filter_by(group_id=group_id)]
+        bump_owner_versions(db.session.connection(), {('membership', user_id) for user_id in member_user_ids})
+
         # 刪除所有相關的 GroupMember 記錄
         GroupMember.query.filter_by(group_id=group_id).delete(synchronize_session=False) # synchronize_session=False 避免競態條件
         
         # 刪除所有相關的 GroupTransaction 記錄 (即使有，也會在這裡被刪除)
         GroupTransaction.query.filter_by(group_id=group_id).delete(synchronize_session=False) # synchronize_session=False 避免競態條件
+        rollup_query('group', group_id).delete(synchronize_session=False) # 批次刪除不會觸發 flush 事件，彙總表需手動清除
+        bump_owner_versions(db.session.connection(), {('group', group_id)})
 
         # 如果你還有 Invitation 或其他與 Group 直接相關的表，也需要在這裡刪除
         Invitation.query.filter_by(group_id=group_id).delete(synchronize_session=False) # 刪除相關邀請
 
         db.session.delete(group) # 最後刪除群組本身
         db.session.commit()
+        invalidate_memberships(group_id, member_user_ids)
         return jsonify({"message": "群組刪除成功"}), 204
     except Exception as e:
         db.session.rollback()
         print(f"Error deleting group {group_id}: {e}")
         return jsonify({"error": "群組刪除失敗: " + str(e)}), 500
 
-@app.route('/api/groups/<int:group_id>/leave', methods=['POST'])
+@api.route('/api/groups/<int:group_id>/leave', methods=['POST'])
 @jwt_required()
 def leave_group(group_id):
     current_user_id = get_jwt_identity()
@@ -561,13 +1616,15 @@ def leave_group(group_id):
 
         db.session.delete(group_member)
         db.session.commit()
+        invalidate_memberships(group_id, [current_user_id])
         return jsonify({"message": "已成功退出群組"}), 200
     except Exception as e:
         db.session.rollback()
         print(f"Error leaving group {group_id} for user {current_user_id}: {e}")
         return jsonify({"error": "退出群組失敗: " + str(e)}), 500
-@app.route('/api/groups/<int:group_id>/members/<int:member_id>/role', methods=['PUT'])
+@api.route('/api/groups/<int:group_id>/members/<int:member_id>/role', methods=['PUT'])
 @jwt_required()
+@group_member_required(role='admin', error="群組未找到或您無權修改成員角色", status_code=403) # 操作者必須是管理員
 def update_group_member_role(group_id, member_id):
     current_user_id = get_jwt_identity()
     data = request.get_json()
@@ -576,15 +1633,7 @@ def update_group_member_role(group_id, member_id):
     if new_role not in ['admin', 'member']:
         return jsonify({"error": "無效的角色。角色必須是 'admin' 或 'member'。"}), 400
 
-    # 1. 檢查操作者 (current_user) 是否為該群組的管理員
-    admin_member = GroupMember.query.filter_by(
-        group_id=group_id,
-        user_id=current_user_id,
-        role='admin',
-        status='accepted'
-    ).first()
-    if not admin_member:
-        return jsonify({"error": "群組未找到或您無權修改成員角色"}), 403
+    # 1. 操作者是否為該群組的管理員已由 group_member_required 檢查
 
     # 2. 獲取要被修改的成員記錄
     member_to_update = GroupMember.query.filter_by(
@@ -616,6 +1665,7 @@ def update_group_member_role(group_id, member_id):
     member_to_update.role = new_role
     try:
         db.session.commit()
+        invalidate_memberships(group_id, [member_id])
         return jsonify({"message": f"成員 {member_to_update.member_user.username} 的角色已更新為 {new_role}"}), 200
     except Exception as e:
         db.session.rollback()
@@ -624,14 +1674,10 @@ def update_group_member_role(group_id, member_id):
 
 # --- 群組邀請 API ---
 
-@app.route('/api/groups/<int:group_id>/invite', methods=['POST'])
+@api.route('/api/groups/<int:group_id>/invite', methods=['POST'])
 @jwt_required()
+@group_member_required(role='admin', error="群組未找到或您無權邀請成員", status_code=403) # 只有管理員可以邀請
 def invite_member(group_id):
-    # 檢查使用者是否為群組管理員 (這部分不變)
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), role='admin', status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您無權邀請成員"}), 403
-
     data = request.get_json()
     invited_username = data.get('username')
     if not invited_username:
@@ -694,14 +1740,19 @@ def invite_member(group_id):
         print(f"發送邀請失敗 (後端異常): {e}")
         return jsonify({"error": "發送邀請失敗: " + str(e)}), 500
 
-@app.route('/api/invitations', methods=['GET'])
+@api.route('/api/invitations', methods=['GET'])
 @jwt_required()
 def get_user_invitations():
     # 獲取當前使用者收到的所有待處理邀請
-    invitations = Invitation.query.filter_by(invited_user_id=get_jwt_identity(), status='pending').all()
+    # to_dict() 會用到 group_obj / sender / receiver，一併 JOIN 載入避免 N+1 查詢
+    invitations = Invitation.query.options(
+        joinedload(Invitation.group_obj),
+        joinedload(Invitation.sender),
+        joinedload(Invitation.receiver)
+    ).filter_by(invited_user_id=get_jwt_identity(), status='pending').all()
     return jsonify([inv.to_dict() for inv in invitations]), 200
 
-@app.route('/api/invitations/<int:invitation_id>/accept', methods=['POST'])
+@api.route('/api/invitations/<int:invitation_id>/accept', methods=['POST'])
 @jwt_required()
 def accept_invitation(invitation_id):
     invitation = Invitation.query.filter_by(id=invitation_id, invited_user_id=get_jwt_identity(), status='pending').first()
@@ -709,7 +1760,7 @@ def accept_invitation(invitation_id):
         return jsonify({"error": "邀請未找到或已失效"}), 404
 
     # 檢查是否已是成員 (以防萬一)
-    if GroupMember.query.filter_by(group_id=invitation.group_id, user_id=get_jwt_identity(), status='accepted').first():
+    if group_role(invitation.group_id) is not None:
         invitation.status = 'rejected' # 如果已是成員，則將邀請狀態設為拒絕
         db.session.commit()
         return jsonify({"error": "您已是該群組成員，邀請已處理"}), 400
@@ -720,12 +1771,13 @@ def accept_invitation(invitation_id):
         db.session.add(new_member)
         invitation.status = 'accepted' # 更新邀請狀態
         db.session.commit()
+        invalidate_memberships(invitation.group_id, [get_jwt_identity()])
         return jsonify({"message": f"已成功接受邀請，加入群組: {invitation.group_obj.name}"}), 200
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "接受邀請失敗: " + str(e)}), 500
 
-@app.route('/api/invitations/<int:invitation_id>/reject', methods=['POST'])
+@api.route('/api/invitations/<int:invitation_id>/reject', methods=['POST'])
 @jwt_required()
 def reject_invitation(invitation_id):
     invitation = Invitation.query.filter_by(id=invitation_id, invited_user_id=get_jwt_identity(), status='pending').first()
@@ -747,21 +1799,12 @@ def reject_invitation(invitation_id):
 
 # app.py (在群組管理 API 區塊內)
 
-@app.route('/api/groups/<int:group_id>/members/<int:member_id>', methods=['DELETE'])
+@api.route('/api/groups/<int:group_id>/members/<int:member_id>', methods=['DELETE'])
 @jwt_required()
+@group_member_required(role='admin', error="群組未找到或您無權執行此操作", status_code=403) # 1. 操作者必須是群組管理員
 def remove_group_member(group_id, member_id):
     current_user_id = get_jwt_identity()
 
-    # 1. 檢查操作者是否為群組管理員
-    admin_member = GroupMember.query.filter_by(
-        group_id=group_id,
-        user_id=current_user_id,
-        role='admin',
-        status='accepted'
-    ).first()
-    if not admin_member:
-        return jsonify({"error": "群組未找到或您無權執行此操作"}), 403 # Forbidden
-
     # 2. 獲取要被移除的成員記錄
     member_to_remove = GroupMember.query.filter_by(
         group_id=group_id,
@@ -793,6 +1836,7 @@ def remove_group_member(group_id, member_id):
     try:
         db.session.delete(member_to_remove)
         db.session.commit()
+        invalidate_memberships(group_id, [member_id])
         return jsonify({"message": "成員已成功從群組中移除"}), 200
     except Exception as e:
         db.session.rollback()
@@ -802,55 +1846,60 @@ def remove_group_member(group_id, member_id):
 # 這些 API 只是佔位符，確保其存在且受到保護。
 # 細節實現將與個人交易類似，但需考慮 group_id 和權限。
 
-@app.route('/api/groups/<int:group_id>/transactions', methods=['GET'])
+@api.route('/api/groups/<int:group_id>/transactions', methods=['GET'])
 @jwt_required()
+@group_member_required()
+@conditional_get('group')
 def get_group_transactions(group_id):
-    # 檢查使用者是否為群組成員
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您不是該群組成員"}), 404
-
-    # 篩選參數 (與個人交易類似)
-    transaction_type = request.args.get('type') # 'income' or 'expense'
-    category_id = request.args.get('category_id', type=int)
-    start_date_str = request.args.get('start_date') # YYYY-MM-DD
-    end_date_str = request.args.get('end_date')     # YYYY-MM-DD
-    search_term = request.args.get('search_term')
-
     # 分頁參數
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
+    if per_page < 1: # 兩種分頁模式都不接受，避免回應中的 per_page 與實際筆數不一致
+        return jsonify({"error": "per_page must be a positive integer."}), 400
 
     query = GroupTransaction.query.filter_by(group_id=group_id) # <-- 關鍵：按 group_id 篩選
 
-    if transaction_type in ['income', 'expense']:
-        query = query.filter_by(type=transaction_type)
-    if category_id:
-        query = query.filter_by(category_id=category_id)
-    if start_date_str:
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            query = query.filter(GroupTransaction.date >= start_date)
-        except ValueError:
-            return jsonify({"error": "Invalid start_date format. Use YYYY-MM-DD."}), 400
-    if end_date_str:
+    # 篩選參數 (與個人交易相同)
+    try:
+        fields = requested_list_fields(GroupTransaction)
+        query = filter_transactions(query, GroupTransaction)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if fields is None:
+        query = query.options(
+            joinedload(GroupTransaction.category), # to_dict() 需要類別名稱與記錄者名稱，一併 JOIN 載入
+            joinedload(GroupTransaction.creator)
+        )
+    else:
+        query = select_list_fields(query, GroupTransaction, fields)
+
+    # cursor 模式：不跑 OFFSET，也只在 include_total=true 時計算總筆數
+    if wants_cursor_pagination():
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
         try:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            query = query.filter(GroupTransaction.date <= end_date)
+            items, next_cursor, total = keyset_paginate(
+                query, GroupTransaction, request.args.get('cursor'), per_page, include_total
+            )
         except ValueError:
-            return jsonify({"error": "Invalid end_date format. Use YYYY-MM-DD."}), 400
-    if search_term:
-        query = query.filter(GroupTransaction.description.ilike(f"%{search_term}%"))
+            return jsonify({"error": "Invalid cursor."}), 400
+        response = {
+            **list_payload(items, fields),
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
+            "per_page": per_page
+        }
+        if include_total:
+            response["total"] = total
+        return jsonify(response), 200
 
     # 排序：最新交易在前
     query = query.order_by(GroupTransaction.date.desc(), GroupTransaction.created_at.desc())
 
     paginated_transactions = query.paginate(page=page, per_page=per_page, error_out=False)
 
-    transactions_data = [t.to_dict() for t in paginated_transactions.items]
-
     return jsonify({
-        "transactions": transactions_data,
+        **list_payload(paginated_transactions.items, fields),
         "total": paginated_transactions.total,
         "pages": paginated_transactions.pages,
         "page": paginated_transactions.page,
@@ -859,17 +1908,13 @@ def get_group_transactions(group_id):
         "has_prev": paginated_transactions.has_prev
     }), 200
 
-@app.route('/api/groups/<int:group_id>/transactions', methods=['POST'])
+@api.route('/api/groups/<int:group_id>/transactions', methods=['POST'])
 @jwt_required()
+@group_member_required()
 def add_group_transaction(group_id):
-    # 檢查使用者是否為群組成員
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您不是該群組成員"}), 404
-
     data = request.get_json()
     try:
-        amount = float(data.get('amount'))
+        amount = parse_amount(data.get('amount'))
         transaction_type = data.get('type')
         category_id = data.get('category_id')
         description = data.get('description')
@@ -907,28 +1952,50 @@ def add_group_transaction(group_id):
         db.session.rollback()
         return jsonify({"error": "新增群組交易失敗: " + str(e)}), 500
 
-@app.route('/api/groups/<int:group_id>/transactions/<int:transaction_id>', methods=['GET'])
+@api.route('/api/groups/<int:group_id>/transactions/export', methods=['GET'])
 @jwt_required()
-def get_group_transaction(group_id, transaction_id):
-    # 檢查使用者是否為群組成員
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您不是該群組成員"}), 404
+@group_member_required()
+def export_group_transactions(group_id):
+    query = GroupTransaction.query.filter_by(group_id=group_id)
+    try:
+        query = filter_transactions(query, GroupTransaction)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return stream_transactions_export(GroupTransaction, query, f'group_{group_id}_transactions')
 
+@api.route('/api/groups/<int:group_id>/transactions/batch', methods=['POST'])
+@jwt_required()
+@group_member_required()
+def import_group_transactions(group_id):
+    def existing_category_ids(category_ids):
+        # 群組交易共用類別，只檢查類別是否存在 (與 add_group_transaction 相同)
+        return set(db.session.execute(db.select(Category.id).where(Category.id.in_(category_ids))).scalars())
+
+    owner_values = {'group_id': group_id, 'created_by_user_id': int(get_jwt_identity())}
+    try:
+        inserted, errors = bulk_import_transactions(GroupTransaction, owner_values, existing_category_ids)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "批次匯入群組交易失敗: " + str(e)}), 500
+    return batch_import_response(inserted, errors)
+
+@api.route('/api/groups/<int:group_id>/transactions/<int:transaction_id>', methods=['GET'])
+@jwt_required()
+@group_member_required()
+@conditional_get('group')
+def get_group_transaction(group_id, transaction_id):
     # 確保交易屬於該群組，且使用者是成員
     transaction = GroupTransaction.query.filter_by(id=transaction_id, group_id=group_id).first()
     if not transaction:
         return jsonify({"error": "交易未找到或不屬於該群組"}), 404
     return jsonify(transaction.to_dict()), 200
 
-@app.route('/api/groups/<int:group_id>/transactions/<int:transaction_id>', methods=['PUT'])
+@api.route('/api/groups/<int:group_id>/transactions/<int:transaction_id>', methods=['PUT'])
 @jwt_required()
+@group_member_required()
 def update_group_transaction(group_id, transaction_id):
-    # 檢查使用者是否為群組管理員
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您不是該群組成員"}), 404
-
     # 確保交易屬於該群組
     transaction = GroupTransaction.query.filter_by(id=transaction_id, group_id=group_id).first()
     if not transaction:
@@ -938,13 +2005,13 @@ def update_group_transaction(group_id, transaction_id):
     # 目前：只要是群組成員就可以修改
     # 考慮：只有管理員能修改其他成員的交易，成員只能修改自己的
     # 簡化：先讓群組成員都可以修改
-    # if transaction.created_by_user_id != get_jwt_identity() and group_member.role != 'admin':
+    # if transaction.created_by_user_id != get_jwt_identity() and group_role(group_id) != 'admin':
     #     return jsonify({"error": "您無權修改此交易"}), 403
 
     data = request.get_json()
     try:
         if 'amount' in data:
-            transaction.amount = float(data.get('amount'))
+            transaction.amount = parse_amount(data.get('amount'))
         if 'type' in data:
             if data.get('type') not in ['income', 'expense']:
                 return jsonify({"error": "無效的交易類型"}), 400
@@ -969,14 +2036,10 @@ def update_group_transaction(group_id, transaction_id):
         db.session.rollback()
         return jsonify({"error": "更新群組交易失敗: " + str(e)}), 500
 
-@app.route('/api/groups/<int:group_id>/transactions/<int:transaction_id>', methods=['DELETE'])
+@api.route('/api/groups/<int:group_id>/transactions/<int:transaction_id>', methods=['DELETE'])
 @jwt_required()
+@group_member_required()
 def delete_group_transaction(group_id, transaction_id):
-    # 檢查使用者是否為群組成員
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您不是該群組成員"}), 404
-
     # 確保交易屬於該群組
     transaction = GroupTransaction.query.filter_by(id=transaction_id, group_id=group_id).first()
     if not transaction:
@@ -984,7 +2047,7 @@ def delete_group_transaction(group_id, transaction_id):
 
     # TODO: 考慮是否只有創建者或管理員才能刪除交易？
     # 簡化：先讓群組成員都可以刪除
-    # if transaction.created_by_user_id != get_jwt_identity() and group_member.role != 'admin':
+    # if transaction.created_by_user_id != get_jwt_identity() and group_role(group_id) != 'admin':
     #     return jsonify({"error": "您無權刪除此交易"}), 403
 
     try:
@@ -998,142 +2061,171 @@ def delete_group_transaction(group_id, transaction_id):
 # --- 群組統計 API (簡化版，詳細實現將在後續步驟) ---
 # 這些 API 也需要填充實際邏輯，類似於個人摘要 API。
 
-@app.route('/api/groups/<int:group_id>/summary', methods=['GET'])
+@api.route('/api/groups/<int:group_id>/summary', methods=['GET'])
 @jwt_required()
+@group_member_required()
+@conditional_get('group')
 def get_group_summary(group_id):
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您不是該群組成員"}), 404
-
-    total_income = db.session.query(func.sum(GroupTransaction.amount)).filter_by(group_id=group_id, type='income').scalar() or 0
-    total_expense = db.session.query(func.sum(GroupTransaction.amount)).filter_by(group_id=group_id, type='expense').scalar() or 0
-
-    return jsonify({
-        "total_income": total_income,
-        "total_expense": total_expense,
-        "balance": total_income - total_expense,
-    }), 200
-
-@app.route('/api/groups/<int:group_id>/summary/category_breakdown', methods=['GET'])
+    # 資料版本沒變就直接回傳快取
+    cache_key = response_cache_key('group', group_id)
+    cached = response_cache.get(cache_key)
+    if cached is not cache.MISSING:
+        return jsonify(cached), 200
+
+    total_income, total_expense = rollup_query('group', group_id).with_entities(
+        *income_expense_sums(DailyRollup)
+    ).one()
+    total_income = total_income or 0
+    total_expense = total_expense or 0
+
+    summary = {
+        "total_income": amount_to_json(total_income),
+        "total_expense": amount_to_json(total_expense),
+        "balance": amount_to_json(total_income - total_expense),
+    }
+    response_cache.set(cache_key, summary)
+    return jsonify(summary), 200
+
+@api.route('/api/groups/<int:group_id>/summary/category_breakdown', methods=['GET'])
 @jwt_required()
+@group_member_required()
+@conditional_get('group')
 def get_group_category_breakdown(group_id):
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您不是該群組成員"}), 404
+    # 資料版本沒變就直接回傳快取
+    cache_key = response_cache_key('group', group_id)
+    cached = response_cache.get(cache_key)
+    if cached is not cache.MISSING:
+        return jsonify(cached), 200
 
     transaction_type = request.args.get('type') # 'income' or 'expense'
     start_date_str = request.args.get('start_date')
     end_date_str = request.args.get('end_date')
 
-    query = db.session.query(
-        Category.name,
-        Category.type,
-        func.sum(GroupTransaction.amount)
-    ).join(GroupTransaction).filter(
-        GroupTransaction.group_id == group_id, # <-- 關鍵：按 group_id 篩選
+    # 從每日彙總表加總，不再掃描群組交易明細
+    query, category_name, category_type = group_category_columns(
+        rollup_query('group', group_id).join(Category, DailyRollup.category_id == Category.id)
     )
+    query = query.with_entities(category_name, category_type, func.sum(DailyRollup.amount))
 
     if transaction_type in ['income', 'expense']:
-        query = query.filter(GroupTransaction.type == transaction_type)
+        query = query.filter(DailyRollup.type == transaction_type)
     if start_date_str:
         try:
             if start_date_str.strip() != "":
                 start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-                query = query.filter(GroupTransaction.date >= start_date)
+                query = query.filter(DailyRollup.date >= start_date)
         except ValueError:
             return jsonify({"error": "Invalid start_date format. Use YYYY-MM-DD."}), 400
     if end_date_str:
         try:
             if end_date_str.strip() != "":
                 end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-                query = query.filter(GroupTransaction.date <= end_date)
+                query = query.filter(DailyRollup.date <= end_date)
         except ValueError:
             return jsonify({"error": "Invalid end_date format. Use YYYY-MM-DD."}), 400
-    category_summary = query.group_by(Category.name, Category.type).all()
+    category_summary = query.group_by(category_name, category_type).all()
 
     summary_by_category = []
     for name, type, total_amount in category_summary:
         summary_by_category.append({
             'category_name': name,
             'type': type,
-            'total_amount': total_amount
+            'total_amount': amount_to_json(total_amount)
         })
 
+    response_cache.set(cache_key, summary_by_category)
     return jsonify(summary_by_category), 200
 
-@app.route('/api/groups/<int:group_id>/summary/trend', methods=['GET'])
+@api.route('/api/groups/<int:group_id>/summary/trend', methods=['GET'])
 @jwt_required()
+@group_member_required()
+@conditional_get('group')
 def get_group_trend_data(group_id):
-    group_member = GroupMember.query.filter_by(group_id=group_id, user_id=get_jwt_identity(), status='accepted').first()
-    if not group_member:
-        return jsonify({"error": "群組未找到或您不是該群組成員"}), 404
-
-    interval = request.args.get('interval', 'month')
-    start_date_str = request.args.get('start_date')
-    end_date_str = request.args.get('end_date')
-
-    query = GroupTransaction.query.filter_by(group_id=group_id)
-
-    if start_date_str:
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            query = query.filter(GroupTransaction.date >= start_date)
-        except ValueError:
-            return jsonify({"error": "Invalid start_date format. Use YYYY-MM-DD."}), 400
-    if end_date_str:
-        try:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            query = query.filter(GroupTransaction.date <= end_date)
-        except ValueError:
-            return jsonify({"error": "Invalid end_date format. Use YYYY-MM-DD."}), 400
-
-    # === 修正點：將 func.strftime 改為 func.to_char 並調整格式字串 ===
-    if interval == 'day':
-        group_by_col = func.to_char(GroupTransaction.date, 'YYYY-MM-DD')
-    elif interval == 'week':
-        group_by_col = func.to_char(GroupTransaction.date, 'IYYY-IW') # PostgreSQL 的 ISO 週格式
-    elif interval == 'month':
-        group_by_col = func.to_char(GroupTransaction.date, 'YYYY-MM')
-    else:
-        return jsonify({"error": "Invalid interval. Must be 'day', 'week', or 'month'."}), 400
-    # ================================================================
-
-    income_data = query.with_entities(
-        group_by_col.label('period'),
-        func.sum(GroupTransaction.amount)
-    ).filter(GroupTransaction.type == 'income').group_by('period').order_by('period').all()
-
-    expense_data = query.with_entities(
-        group_by_col.label('period'),
-        func.sum(GroupTransaction.amount)
-    ).filter(GroupTransaction.type == 'expense').group_by('period').order_by('period').all()
+    # 資料版本沒變就直接回傳快取
+    cache_key = response_cache_key('group', group_id)
+    cached = response_cache.get(cache_key)
+    if cached is not cache.MISSING:
+        return jsonify(cached), 200
 
-    income_map = {item.period: item[1] for item in income_data}
-    expense_map = {item.period: item[1] for item in expense_data}
-
-    all_periods = sorted(list(set(income_map.keys()) | set(expense_map.keys())))
+    try:
+        trend_data = trend_for_owner('group', group_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response_cache.set(cache_key, trend_data)
+    return jsonify(trend_data), 200
 
-    trend_data = []
-    for period in all_periods:
-        trend_data.append({
-            'period': period,
-            'income': income_map.get(period, 0),
-            'expense': expense_map.get(period, 0),
-            'balance': income_map.get(period, 0) - expense_map.get(period, 0)
-        })
+@api.route('/api/groups/<int:group_id>/dashboard', methods=['GET'])
+@jwt_required()
+@group_member_required()
+@conditional_get('group')
+def get_group_dashboard(group_id):
+    # 資料版本沒變就直接回傳快取
+    cache_key = response_cache_key('group', group_id)
+    cached = response_cache.get(cache_key)
+    if cached is not cache.MISSING:
+        return jsonify(cached), 200
+
+    query = GroupTransaction.query.filter_by(group_id=group_id).options(
+        joinedload(GroupTransaction.category),
+        joinedload(GroupTransaction.creator)
+    )
+    try:
+        dashboard = build_dashboard('group', group_id, query, GroupTransaction)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    return jsonify(trend_data), 200
+    response_cache.set(cache_key, dashboard)
+    return jsonify(dashboard), 200
 
 #下面不動
 # --- 類別相關 API (受保護) ---
-
-@app.route('/api/categories', methods=['GET'])
+# 預設類別由所有使用者共用 (user_id 為 NULL，見 migrations.DEFAULT_CATEGORIES)，註冊時不再複製。
+# 使用者修改預設類別時才建立自己的複本 (template_id 指向預設類別)，刪除時則建立 hidden 的遮蔽列。
+# 使用者看得到的類別 = 自己未隱藏的類別 + 沒有被自己的複本遮蔽的預設類別。
+
+def visible_categories(user_id):
+    user_id = int(user_id)
+    overridden = db.select(Category.template_id).where(Category.user_id == user_id, Category.template_id.isnot(None))
+    return Category.query.filter(db.or_(
+        db.and_(Category.user_id == user_id, Category.hidden.is_(False)),
+        db.and_(Category.user_id.is_(None), Category.id.notin_(overridden))
+    ))
+
+def find_user_category(category_id, user_id):
+    return visible_categories(user_id).filter(Category.id == category_id).first()
+
+def copy_default_category(category, user_id, name, category_type, hidden=False):
+    """建立預設類別的個人複本，並把自己的個人交易改指向複本 (群組交易仍使用共用的預設類別)"""
+    user_id = int(user_id)
+    copy = Category(name=name, type=category_type, user_id=user_id, template_id=category.id, hidden=hidden)
+    db.session.add(copy)
+    db.session.flush()
+    db.session.execute(db.update(Transaction).where(
+        Transaction.user_id == user_id, Transaction.category_id == category.id
+    ).values(category_id=copy.id))
+    # 批次 UPDATE 不經過 flush 事件，每日彙總表一併改指向複本
+    db.session.execute(db.update(DailyRollup).where(
+        DailyRollup.owner_type == 'user', DailyRollup.owner_id == user_id, DailyRollup.category_id == category.id
+    ).values(category_id=copy.id))
+    return copy
+
+def group_category_columns(query):
+    """
+    群組統計的類別名稱與類型 (query 需已 JOIN Category)。群組交易共用類別，成員改名預設類別後
+    以自己的複本記錄的交易，一律歸到共用的預設類別 (template_id)，同一類別才不會因成員各自改名而拆成多列。
+    """
+    template = db.aliased(Category)
+    query = query.outerjoin(template, Category.template_id == template.id)
+    return query, func.coalesce(template.name, Category.name), func.coalesce(template.type, Category.type)
+
+@api.route('/api/categories', methods=['GET'])
 @jwt_required()
+@conditional_get('user')
 def get_categories():
-    categories = Category.query.filter_by(user_id=get_jwt_identity()).all()
+    categories = visible_categories(get_jwt_identity()).all()
     return jsonify([c.to_dict() for c in categories])
 
-@app.route('/api/categories', methods=['POST'])
+@api.route('/api/categories', methods=['POST'])
 @jwt_required()
 def add_category():
     data = request.get_json()
@@ -1146,7 +2238,7 @@ def add_category():
         return jsonify({"error": "Invalid category type"}), 400
 
     # 檢查是否已存在相同名稱的類別給當前使用者
-    if Category.query.filter_by(user_id=get_jwt_identity(), name=name).first():
+    if visible_categories(get_jwt_identity()).filter(Category.name == name).first():
         return jsonify({"error": "已存在同名的類別"}), 409
 
     new_category = Category(name=name, type=category_type, user_id=get_jwt_identity())
@@ -1158,10 +2250,10 @@ def add_category():
         db.session.rollback()
         return jsonify({"error": str(e)}), 400
 
-@app.route('/api/categories/<int:category_id>', methods=['PUT'])
+@api.route('/api/categories/<int:category_id>', methods=['PUT'])
 @jwt_required()
 def update_category(category_id):
-    category = Category.query.filter_by(id=category_id, user_id=get_jwt_identity()).first()
+    category = find_user_category(category_id, get_jwt_identity())
     if not category:
         return jsonify({"error": "已存在同名的類別"}), 404
 
@@ -1171,30 +2263,33 @@ def update_category(category_id):
 
     if category_type not in ['income', 'expense']:
         return jsonify({"error": "Invalid category type"}), 400
+    if name == category.name and category_type == category.type:
+        return jsonify(category.to_dict()) # 沒有變更：不建立預設類別的複本，也不遞增資料版本
 
     # 檢查更新後是否會與同使用者下的其他類別名稱重複
-    if Category.query.filter(
-        Category.user_id == get_jwt_identity(),
+    if visible_categories(get_jwt_identity()).filter(
         Category.name == name,
         Category.id != category_id
     ).first():
         return jsonify({"error": "Category with this name already exists for this user"}), 409
 
-
-    category.name = name
-    category.type = category_type
-
     try:
+        if category.user_id is None:
+            # 預設類別是共用的：建立自己的複本，其他使用者不受影響
+            category = copy_default_category(category, get_jwt_identity(), name, category_type)
+        else:
+            category.name = name
+            category.type = category_type
         db.session.commit()
         return jsonify(category.to_dict())
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/categories/<int:category_id>', methods=['DELETE'])
+@api.route('/api/categories/<int:category_id>', methods=['DELETE'])
 @jwt_required()
 def delete_category(category_id):
-    category = Category.query.filter_by(id=category_id, user_id=get_jwt_identity()).first()
+    category = find_user_category(category_id, get_jwt_identity())
     if not category:
         return jsonify({"error": "Category not found or not owned by user"}), 404
 
@@ -1203,7 +2298,12 @@ def delete_category(category_id):
         return jsonify({"error": "Cannot delete category with associated transactions"}), 400
 
     try:
-        db.session.delete(category)
+        if category.user_id is None:
+            copy_default_category(category, get_jwt_identity(), category.name, category.type, hidden=True)
+        elif category.template_id is not None:
+            category.hidden = True # 保留遮蔽列，預設類別才不會重新出現
+        else:
+            db.session.delete(category)
         db.session.commit()
         return jsonify({"message": "Category deleted successfully"}), 204
     except Exception as e:
@@ -1213,44 +2313,49 @@ def delete_category(category_id):
 
 # --- 交易記錄相關 API (受保護，包含篩選和分頁) ---
 
-@app.route('/api/transactions', methods=['GET'])
+@api.route('/api/transactions', methods=['GET'])
 @jwt_required()
+@conditional_get('user')
 def get_transactions():
-    # 篩選參數
-    transaction_type = request.args.get('type') # 'income' or 'expense'
-    category_id = request.args.get('category_id', type=int)
-    start_date_str = request.args.get('start_date') # YYYY-MM-DD
-    end_date_str = request.args.get('end_date')     # YYYY-MM-DD
-    search_term = request.args.get('search_term') # <-- 新增這行：獲取搜索詞
-
     # 分頁參數
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
+    if per_page < 1: # 兩種分頁模式都不接受，避免回應中的 per_page 與實際筆數不一致
+        return jsonify({"error": "per_page must be a positive integer."}), 400
 
     query = Transaction.query.filter_by(user_id=get_jwt_identity())
 
-    if transaction_type in ['income', 'expense']:
-        query = query.filter_by(type=transaction_type)
-    if category_id:
-        query = query.filter_by(category_id=category_id)
-    if start_date_str:
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            query = query.filter(Transaction.date >= start_date)
-        except ValueError:
-            return jsonify({"error": "Invalid start_date format. Use YYYY-MM-DD."}), 400
-    if end_date_str:
+    # 篩選參數 (type, category_id, start_date, end_date, search_term) 與欄位選擇 (fields, format)
+    try:
+        fields = requested_list_fields(Transaction)
+        query = filter_transactions(query, Transaction)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if fields is None:
+        # to_dict() 需要類別名稱，一併 JOIN 載入，避免每筆交易再查一次 Category
+        query = query.options(joinedload(Transaction.category_obj))
+    else:
+        query = select_list_fields(query, Transaction, fields)
+
+    # cursor 模式：不跑 OFFSET，也只在 include_total=true 時計算總筆數
+    if wants_cursor_pagination():
+        include_total = request.args.get('include_total', 'false').lower() == 'true'
         try:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            query = query.filter(Transaction.date <= end_date)
+            items, next_cursor, total = keyset_paginate(
+                query, Transaction, request.args.get('cursor'), per_page, include_total
+            )
         except ValueError:
-            return jsonify({"error": "Invalid end_date format. Use YYYY-MM-DD."}), 400
-
-    # <-- 新增這一段：處理搜索詞
-    if search_term:
-        # 檢查 description 是否包含 search_term (不區分大小寫)
-        query = query.filter(Transaction.description.ilike(f"%{search_term}%"))
-    # <-- 結束新增部分
+            return jsonify({"error": "Invalid cursor."}), 400
+        response = {
+            **list_payload(items, fields),
+            "next_cursor": next_cursor,
+            "has_next": next_cursor is not None,
+            "per_page": per_page
+        }
+        if include_total:
+            response["total"] = total
+        return jsonify(response)
 
     # 排序：最新交易在前
     query = query.order_by(Transaction.date.desc(), Transaction.created_at.desc())
@@ -1258,10 +2363,8 @@ def get_transactions():
     # 執行分頁
     paginated_transactions = query.paginate(page=page, per_page=per_page, error_out=False)
 
-    transactions_data = [t.to_dict() for t in paginated_transactions.items]
-
     return jsonify({
-        "transactions": transactions_data,
+        **list_payload(paginated_transactions.items, fields),
         "total": paginated_transactions.total,
         "pages": paginated_transactions.pages,
         "page": paginated_transactions.page,
@@ -1270,8 +2373,9 @@ def get_transactions():
         "has_prev": paginated_transactions.has_prev
     })
 
-@app.route('/api/transactions/<int:transaction_id>', methods=['GET'])
+@api.route('/api/transactions/<int:transaction_id>', methods=['GET'])
 @jwt_required()
+@conditional_get('user')
 def get_transaction(transaction_id):
     # 確保使用者只能查看自己的交易記錄
     transaction = Transaction.query.filter_by(id=transaction_id, user_id=get_jwt_identity()).first()
@@ -1280,12 +2384,12 @@ def get_transaction(transaction_id):
     return jsonify(transaction.to_dict())
 
 # server/app.py (在 add_transaction 函數內部)
-@app.route('/api/transactions', methods=['POST'])
+@api.route('/api/transactions', methods=['POST'])
 @jwt_required()
 def add_transaction():
     data = request.get_json()
     try:
-        amount = float(data.get('amount'))
+        amount = parse_amount(data.get('amount'))
         transaction_type = data.get('type')
         category_id = data.get('category_id')
         description = data.get('description')
@@ -1297,7 +2401,7 @@ def add_transaction():
             return jsonify({"error": "Invalid transaction type"}), 400
 
         # 檢查 category_id 是否存在且歸屬於當前使用者
-        category = Category.query.filter_by(id=category_id, user_id=get_jwt_identity()).first()
+        category = find_user_category(category_id, get_jwt_identity())
         if not category:
             return jsonify({"error": "Category not found or not owned by user"}), 404
 
@@ -1325,7 +2429,36 @@ def add_transaction():
         db.session.rollback()
         return jsonify({"error": "Failed to add transaction: " + str(e)}), 500
 
-@app.route('/api/transactions/<int:transaction_id>', methods=['PUT'])
+@api.route('/api/transactions/export', methods=['GET'])
+@jwt_required()
+def export_transactions():
+    query = Transaction.query.filter_by(user_id=get_jwt_identity())
+    try:
+        query = filter_transactions(query, Transaction)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return stream_transactions_export(Transaction, query, 'transactions')
+
+@api.route('/api/transactions/batch', methods=['POST'])
+@jwt_required()
+def import_transactions():
+    user_id = get_jwt_identity()
+
+    def owned_category_ids(category_ids):
+        return {category_id for category_id, in visible_categories(user_id).filter(
+            Category.id.in_(category_ids)
+        ).with_entities(Category.id)}
+
+    try:
+        inserted, errors = bulk_import_transactions(Transaction, {'user_id': int(user_id)}, owned_category_ids)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to import transactions: " + str(e)}), 500
+    return batch_import_response(inserted, errors)
+
+@api.route('/api/transactions/<int:transaction_id>', methods=['PUT'])
 @jwt_required()
 def update_transaction(transaction_id):
     transaction = Transaction.query.filter_by(id=transaction_id, user_id=get_jwt_identity()).first()
@@ -1335,7 +2468,7 @@ def update_transaction(transaction_id):
     data = request.get_json()
     try:
         if 'amount' in data:
-            transaction.amount = float(data.get('amount'))
+            transaction.amount = parse_amount(data.get('amount'))
         if 'type' in data:
             if data.get('type') not in ['income', 'expense']:
                 return jsonify({"error": "Invalid transaction type"}), 400
@@ -1346,7 +2479,7 @@ def update_transaction(transaction_id):
             transaction.date = datetime.strptime(data.get('date'), '%Y-%m-%d').date()
         if 'category_id' in data:
             category_id = data.get('category_id')
-            category = Category.query.filter_by(id=category_id, user_id=get_jwt_identity()).first() # 確保類別屬於當前使用者
+            category = find_user_category(category_id, get_jwt_identity()) # 確保當前使用者可以使用此類別
             if not category:
                 return jsonify({"error": "Category not found or not owned by user"}), 404
             transaction.category_id = category_id
@@ -1359,7 +2492,7 @@ def update_transaction(transaction_id):
         db.session.rollback()
         return jsonify({"error": "Failed to update transaction: " + str(e)}), 500
 
-@app.route('/api/transactions/<int:transaction_id>', methods=['DELETE'])
+@api.route('/api/transactions/<int:transaction_id>', methods=['DELETE'])
 @jwt_required()
 def delete_transaction(transaction_id):
     transaction = Transaction.query.filter_by(id=transaction_id, user_id=get_jwt_identity()).first()
@@ -1375,24 +2508,41 @@ def delete_transaction(transaction_id):
 
 # --- 摘要/統計相關 API (受保護，包含篩選) ---
 
-@app.route('/api/summary', methods=['GET'])
+@api.route('/api/summary', methods=['GET'])
 @jwt_required()
+@conditional_get('user')
 def get_summary():
     _ = request.args.get('interval')  # 忽略 interval 參數
+    # 資料版本沒變就直接回傳快取
+    cache_key = response_cache_key('user', get_jwt_identity())
+    cached = response_cache.get(cache_key)
+    if cached is not cache.MISSING:
+        return jsonify(cached)
     user_id = get_jwt_identity()
-    total_income = db.session.query(func.sum(Transaction.amount)).filter_by(user_id=user_id, type='income').scalar() or 0
-    total_expense = db.session.query(func.sum(Transaction.amount)).filter_by(user_id=user_id, type='expense').scalar() or 0
-
-    return jsonify({
-        "total_income": total_income,
-        "total_expense": total_expense,
-        "balance": total_income - total_expense,
-    })
-
-@app.route('/api/summary/category_breakdown', methods=['GET'])
+    total_income, total_expense = rollup_query('user', user_id).with_entities(
+        *income_expense_sums(DailyRollup)
+    ).one()
+    total_income = total_income or 0
+    total_expense = total_expense or 0
+
+    summary = {
+        "total_income": amount_to_json(total_income),
+        "total_expense": amount_to_json(total_expense),
+        "balance": amount_to_json(total_income - total_expense),
+    }
+    response_cache.set(cache_key, summary)
+    return jsonify(summary)
+
+@api.route('/api/summary/category_breakdown', methods=['GET'])
 @jwt_required()
+@conditional_get('user')
 def get_category_breakdown():
     _ = request.args.get('interval')  # 忽略 interval 參數
+    # 資料版本沒變就直接回傳快取
+    cache_key = response_cache_key('user', get_jwt_identity())
+    cached = response_cache.get(cache_key)
+    if cached is not cache.MISSING:
+        return jsonify(cached)
     transaction_type = request.args.get('type') # 'income' or 'expense'
     # 這裡先把空字串轉成 None
     start_date_str = request.args.get('start_date') or None
@@ -1402,27 +2552,29 @@ def get_category_breakdown():
     if end_date_str is not None and end_date_str.strip() == "":
         end_date_str = None
 
-    query = db.session.query(
+    # 從每日彙總表加總，不再掃描交易明細
+    query = rollup_query('user', get_jwt_identity()).join(
+        Category, DailyRollup.category_id == Category.id
+    ).with_entities(
         Category.name,
         Category.type,
-        func.sum(Transaction.amount)
-    ).join(Transaction, Transaction.category_id == Category.id).filter(
-        Transaction.user_id == get_jwt_identity(),
-        Category.user_id == get_jwt_identity()
+        func.sum(DailyRollup.amount)
+    ).filter(
+        db.or_(Category.user_id == get_jwt_identity(), Category.user_id.is_(None))
     )
 
     if transaction_type in ['income', 'expense']:
-        query = query.filter(Transaction.type == transaction_type)
+        query = query.filter(DailyRollup.type == transaction_type)
     if start_date_str is not None:
         try:
             start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            query = query.filter(Transaction.date >= start_date)
+            query = query.filter(DailyRollup.date >= start_date)
         except ValueError:
             return jsonify({"error": "Invalid start_date format. Use YYYY-MM-DD."}), 400
     if end_date_str is not None:
         try:
             end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            query = query.filter(Transaction.date <= end_date)
+            query = query.filter(DailyRollup.date <= end_date)
         except ValueError:
             return jsonify({"error": "Invalid end_date format. Use YYYY-MM-DD."}), 400
 
@@ -1433,78 +2585,135 @@ def get_category_breakdown():
         summary_by_category.append({
             'category_name': name,
             'type': type,
-            'total_amount': total_amount
+            'total_amount': amount_to_json(total_amount)
         })
 
+    response_cache.set(cache_key, summary_by_category)
     return jsonify(summary_by_category)
 
 
 
-@app.route('/api/summary/trend', methods=['GET'])
+@api.route('/api/summary/trend', methods=['GET'])
 @jwt_required()
+@conditional_get('user')
 def get_trend_data():
-    interval = request.args.get('interval', 'month')
-    start_date_str = request.args.get('start_date') or None
-    end_date_str = request.args.get('end_date') or None
-    if start_date_str is not None and start_date_str.strip() == "":
-        start_date_str = None
-    if end_date_str is not None and end_date_str.strip() == "":
-        end_date_str = None
-
-    query = Transaction.query.filter_by(user_id=get_jwt_identity())
-
-    if start_date_str is not None:
-        try:
-            start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-            query = query.filter(Transaction.date >= start_date)
-        except ValueError:
-            return jsonify({"error": "Invalid start_date format. Use YYYY-MM-DD."}), 400
-    if end_date_str is not None:
-        try:
-            end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-            query = query.filter(Transaction.date <= end_date)
-        except ValueError:
-            return jsonify({"error": "Invalid end_date format. Use YYYY-MM-DD."}), 400
-
-    # === 修正點：將 func.strftime 改為 func.to_char 並調整格式字串 ===
-    if interval == 'day':
-        group_by_col = func.to_char(Transaction.date, 'YYYY-MM-DD')
-    elif interval == 'week':
-        group_by_col = func.to_char(Transaction.date, 'IYYY-IW')
-    elif interval == 'month':
-        group_by_col = func.to_char(Transaction.date, 'YYYY-MM')
-    else:
-        return jsonify({"error": "Invalid interval. Must be 'day', 'week', or 'month'."}), 400
-    # ================================================================
-
-    income_data = query.with_entities(
-        group_by_col.label('period'),
-        func.sum(Transaction.amount)
-    ).filter(Transaction.type == 'income').group_by('period').order_by('period').all()
-
-    expense_data = query.with_entities(
-        group_by_col.label('period'),
-        func.sum(Transaction.amount)
-    ).filter(Transaction.type == 'expense').group_by('period').order_by('period').all()
+    # 資料版本沒變就直接回傳快取
+    cache_key = response_cache_key('user', get_jwt_identity())
+    cached = response_cache.get(cache_key)
+    if cached is not cache.MISSING:
+        return jsonify(cached)
+    try:
+        trend_data = trend_for_owner('user', get_jwt_identity())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    response_cache.set(cache_key, trend_data)
+    return jsonify(trend_data)
 
-    income_map = {item.period: item[1] for item in income_data}
-    expense_map = {item.period: item[1] for item in expense_data}
+@api.route('/api/health', methods=['GET'])
+def health_check():
+    # 不需登入；連一次資料庫，可作為 Render 的 health check 與冷啟動量測的目標
+    db.session.execute(db.text('SELECT 1'))
+    return jsonify({"status": "ok"})
 
-    all_periods = sorted(list(set(income_map.keys()) | set(expense_map.keys())))
+@api.route('/api/pool/stats', methods=['GET'])
+@jwt_required()
+def get_pool_stats():
+    return jsonify(dbpool.stats(db.engine))
+
+@api.app_errorhandler(PoolTimeoutError)
+def handle_pool_timeout(e):
+    # 連線池已滿且等待逾時：回 503 讓前端 / 負載平衡器稍後重試，而不是 500
+    dbpool.pool_stats.increment('timeouts')
+    db.session.rollback()
+    response = jsonify({"error": "伺服器忙碌中，請稍後再試"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@api.app_errorhandler(passwords.PasswordHasherBusy)
+def handle_password_hasher_busy(e):
+    # 密碼雜湊的排隊已滿 (登入尖峰)：回 503 讓前端稍後重試
+    response = jsonify({"error": "伺服器忙碌中，請稍後再試"})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+@api.route('/api/cache/stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats():
+    return jsonify({
+        'responses': response_cache.stats(),
+        'memberships': membership_cache.stats(),
+    })
 
-    trend_data = []
-    for period in all_periods:
-        trend_data.append({
-            'period': period,
-            'income': income_map.get(period, 0),
-            'expense': expense_map.get(period, 0),
-            'balance': income_map.get(period, 0) - expense_map.get(period, 0)
-        })
+# --- 批次請求 ---
+# 前端切換頁面時常同時發出好幾個小的 GET。POST /api/batch 把它們合併成一個 HTTP 請求，
+# 在同一個 app context 中依序分派到原本的路由：共用同一個 DB session 與 g (已驗證的 JWT、成員權限的結果)，
+# 外層請求的 hook (效能量測、X-Access-Token) 也只執行一次。只接受 GET，且不能巢狀呼叫 /api/batch。
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', 20))
+BATCH_FORWARDED_HEADERS = ('Accept-Language',) # 不轉送 Authorization：子請求沿用外層已驗證的 JWT
+BATCH_RESPONSE_HEADERS = ('ETag', 'Cache-Control')
+
+def dispatch_batch_item(item):
+    """執行一個子請求，回傳 (status, body, headers)"""
+    method = str(item.get('method', 'GET')).upper()
+    path = item.get('path')
+    if method != 'GET':
+        return 405, {"error": "Only GET requests can be batched"}, {}
+    if not isinstance(path, str) or not path.startswith('/api/') or urlsplit(path).path.rstrip('/') == '/api/batch':
+        return 400, {"error": "Invalid path"}, {}
+
+    headers = {name: request.headers[name] for name in BATCH_FORWARDED_HEADERS if name in request.headers}
+    item_headers = item.get('headers')
+    if isinstance(item_headers, dict) and item_headers.get('If-None-Match'):
+        headers['If-None-Match'] = str(item_headers['If-None-Match'])
+    environ = EnvironBuilder(path=path, method='GET', headers=headers, base_url=request.host_url).get_environ()
+    environ[BATCH_JWT_ENVIRON_KEY] = True
+    app = current_app._get_current_object()
+
+    # 沿用目前的 app context (同一個 session 與 g)，只另外建立子請求的 request context
+    with app.request_context(environ):
+        try:
+            try:
+                rv = app.dispatch_request()
+            except Exception as e:
+                rv = app.handle_user_exception(e) # 404 / 401 / 503 等交給原本的錯誤處理
+            response = app.make_response(rv)
+        except Exception:
+            app.logger.exception("Batch sub-request failed: GET %s", path)
+            db.session.rollback()
+            return 500, {"error": "Internal server error"}, {}
+
+    if isinstance(response.response, types.GeneratorType): # 串流匯出 (stream_with_context)
+        response.close()
+        return 400, {"error": "Streaming responses cannot be batched"}, {}
+    body = response.get_json(silent=True) if response.is_json else (response.get_data(as_text=True) or None)
+    return response.status_code, body, {
+        name: response.headers[name] for name in BATCH_RESPONSE_HEADERS if name in response.headers
+    }
+
+@api.route('/api/batch', methods=['POST'])
+@jwt_required()
+def batch_requests():
+    data = request.get_json(silent=True)
+    items = data.get('requests') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Request body must contain a non-empty 'requests' array"}), 400
+    if len(items) > BATCH_MAX_REQUESTS:
+        return jsonify({"error": f"Too many requests in batch (max {BATCH_MAX_REQUESTS})"}), 400
+
+    responses = []
+    for index, item in enumerate(items):
+        if isinstance(item, dict):
+            status, body, headers = dispatch_batch_item(item)
+            item_id = item.get('id', index)
+        else:
+            status, body, headers = 400, {"error": "Invalid request"}, {}
+            item_id = index
+        responses.append({'id': item_id, 'status': status, 'headers': headers, 'body': body})
+    return jsonify({"responses": responses}), 200
 
-    return jsonify(trend_data)
 # --- 使用者設定 API ---
 
-@app.route('/api/user/username', methods=['PUT'])
+@api.route('/api/user/username', methods=['PUT'])
 @jwt_required()
 def update_username():
     data = request.get_json()
@@ -1526,7 +2735,7 @@ def update_username():
         db.session.rollback()
         return jsonify({"error": "使用者名稱更新失敗: " + str(e)}), 500
 
-@app.route('/api/user/password', methods=['PUT'])
+@api.route('/api/user/password', methods=['PUT'])
 @jwt_required()
 def update_password():
     data = request.get_json()
@@ -1548,24 +2757,54 @@ def update_password():
         db.session.rollback()
         return jsonify({"error": "密碼更新失敗: " + str(e)}), 500
 
+@api.route('/api/dashboard', methods=['GET'])
+@jwt_required()
+@conditional_get('user')
+def get_dashboard():
+    # 資料版本沒變就直接回傳快取
+    cache_key = response_cache_key('user', get_jwt_identity())
+    cached = response_cache.get(cache_key)
+    if cached is not cache.MISSING:
+        return jsonify(cached)
+
+    query = Transaction.query.filter_by(user_id=get_jwt_identity()).options(joinedload(Transaction.category_obj))
+    try:
+        dashboard = build_dashboard('user', get_jwt_identity(), query, Transaction)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response_cache.set(cache_key, dashboard)
+    return jsonify(dashboard)
+
 # 假設你用 Flask
-@app.route('/api/transactions/summary')
+@api.route('/api/transactions/summary')
 @jwt_required()
+@conditional_get('user')
 def transactions_summary():
-    # 查詢當前登入使用者的收入、支出
-    total_income = db.session.query(func.sum(Transaction.amount)).filter_by(user_id=get_jwt_identity(), type='income').scalar() or 0
-    total_expense = db.session.query(func.sum(Transaction.amount)).filter_by(user_id=get_jwt_identity(), type='expense').scalar() or 0
+    # 資料版本沒變就直接回傳快取
+    cache_key = response_cache_key('user', get_jwt_identity())
+    cached = response_cache.get(cache_key)
+    if cached is not cache.MISSING:
+        return jsonify(cached)
+    # 查詢當前登入使用者的收入、支出 (一次掃描)
+    total_income, total_expense = rollup_query('user', get_jwt_identity()).with_entities(
+        *income_expense_sums(DailyRollup)
+    ).one()
+    total_income = total_income or 0
+    total_expense = total_expense or 0
     balance = total_income - total_expense
-    return jsonify({
-        "income": total_income,
-        "expense": total_expense,
-        "balance": balance
-    })
+    summary = {
+        "income": amount_to_json(total_income),
+        "expense": amount_to_json(total_expense),
+        "balance": amount_to_json(balance)
+    }
+    response_cache.set(cache_key, summary)
+    return jsonify(summary)
 
 # ----------------------------------------------------
 # 新增：刪除帳號 API
 # ----------------------------------------------------
-@app.route('/api/user', methods=['DELETE'])
+@api.route('/api/user', methods=['DELETE'])
 @jwt_required()
 def delete_user_account():
     user_id_to_delete = get_jwt_identity()
@@ -1601,14 +2840,20 @@ def delete_user_account():
         # 示例：categories = db.relationship('Category', backref='user', lazy=True, cascade='all, delete-orphan')
         # 如果沒有，則需要手動執行：
         Transaction.query.filter_by(user_id=user_id_to_delete).delete(synchronize_session=False)
+        rollup_query('user', user_id_to_delete).delete(synchronize_session=False)
+        bump_owner_versions(db.session.connection(), {('user', user_id_to_delete)})
         Category.query.filter_by(user_id=user_id_to_delete).delete(synchronize_session=False)
         
         # 刪除發送和接收的邀請 (即使 Invitation 模型沒有 cascade，這裡手動刪除確保乾淨)
         Invitation.query.filter_by(invited_by_user_id=user_id_to_delete).delete(synchronize_session=False)
         Invitation.query.filter_by(invited_user_id=user_id_to_delete).delete(synchronize_session=False)
         
-        # 刪除用戶記錄的群組交易
-        GroupTransaction.query.filter_by(created_by_user_id=user_id_to_delete).delete(synchronize_session=False)
+        # 刪除用戶記錄的群組交易 (先從各群組的彙總表扣回)
+        recorded_group_transactions = GroupTransaction.query.filter_by(created_by_user_id=user_id_to_delete)
+        group_deltas = rollup_deltas_from_query(recorded_group_transactions)
+        apply_rollup_deltas(db.session.connection(), group_deltas)
+        bump_owner_versions(db.session.connection(), {key[:2] for key in group_deltas})
+        recorded_group_transactions.delete(synchronize_session=False)
 
         db.session.delete(user)
         db.session.commit()
@@ -1619,8 +2864,43 @@ def delete_user_account():
         print(f"Error deleting user account: {e}")
         return jsonify({"error": "刪除帳號失敗: " + str(e)}), 500
 
+# --- App factory ---
+# gunicorn 以 "app:create_app()" 啟動，flask CLI (flask --app app ...) 也會自動找到 create_app。
+# 建立 app 只讀取設定並註冊擴充套件與路由，不連線資料庫、不執行 DDL (結構變更一律由 flask db-upgrade 負責)，
+# 所以 worker 開機與冷啟動都很快；gunicorn.conf.py 預設 preload_app，master 建立一次後再 fork 給各 worker。
+def create_app(config=None):
+    app = Flask(__name__)
+    app.config['SESSION_COOKIE_SAMESITE'] = "None"
+    app.config['SESSION_COOKIE_SECURE'] = True
+    # --- Flask 配置 ---
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your_development_secret_key_please_change_me') # 確保這裡的值在 .env 中設置
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///site.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'your_jwt_secret_key')
+    if config:
+        app.config.update(config)
+    app.config.setdefault( # 連線池大小等，見 dbpool.py
+        'SQLALCHEMY_ENGINE_OPTIONS', dbpool.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    )
+
+    jwt.init_app(app)
+    # 啟用 CORS，允許前端應用程式訪問
+    # 在開發階段，可以允許所有來源。生產環境中，請限制為你的前端域名。
+    #CORS(app, supports_credentials=True, origins=["https://accounting-website-j8a3.vercel.app"]) # supports_credentials=True 允許發送 cookie/會話憑證
+    CORS(app, supports_credentials=True, origins=re.compile(r"https://accounting-website-.*\.vercel\.app"),
+         expose_headers=['X-Access-Token']) # 成員異動後重新簽發的 token 放在這個標頭
+    db.init_app(app) # 只建立 engine 物件，第一次查詢時才連線
+    app.register_blueprint(api)
+
+    with app.app_context():
+        metrics.init_app(app, db.engine)
+    return app
+
 # 運行應用程式
 if __name__ == '__main__':
     # Flask-Login 的 Session Protection 預設是 'strong'
     # 這會要求瀏覽器在登入成功後，每次請求都帶上 session_cookie
+    app = create_app()
+    with app.app_context():
+        migrations.upgrade(db.engine, db.metadata) # 本機開發時自動套用遷移
     app.run(debug=True, port=5000)
@@ -0,0 +1,183 @@
+# backend/bench/async_load.py
+"""比較 sync 與 gevent worker 在大量同時連線下的吞吐量
+
+在 backend/ 目錄下執行：
+    python bench/async_load.py --connections 50 --duration 10 --db-latency-ms 20
+
+預設使用暫存的 SQLite 資料庫，並以 bench/latency_app.py 為每個 SQL 加上模擬的網路延遲；
+指定 --database-url 可改對真正的 PostgreSQL 壓測 (此時建議 --db-latency-ms 0)。
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def call(conn, method, path, body=None, token=None):
+    headers = {'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    return response.status, data
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/user')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def start_server(worker_class, port, args, env):
+    env = dict(env,
+               WEB_CONCURRENCY=str(args.workers),
+               GUNICORN_WORKER_CLASS=worker_class,
+               GUNICORN_WORKER_CONNECTIONS=str(max(args.connections, 100)),
+               BENCH_DB_LATENCY_MS=str(args.db_latency_ms))
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+         '--pythonpath', 'bench', '--log-level', 'warning', 'latency_app:app'],
+        cwd=BACKEND_DIR, env=env
+    )
+
+
+def seed(port, transactions):
+    """註冊壓測使用者並匯入交易，回傳 access token"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    username = f'bench-{int(time.time() * 1000)}'
+    status, data = call(conn, 'POST', '/api/register', {'username': username, 'password': 'bench-password'})
+    if status != 201:
+        raise RuntimeError(f"register failed: {status} {data[:200]}")
+    token = json.loads(data)['access_token']
+
+    _, data = call(conn, 'GET', '/api/categories', token=token)
+    categories = json.loads(data)
+    rows = [{
+        'amount': 10 + i % 500,
+        'type': categories[i % len(categories)]['type'],
+        'category_id': categories[i % len(categories)]['id'],
+        'date': f'2024-{1 + i % 12:02d}-{1 + i % 28:02d}',
+        'description': f'bench item {i}',
+    } for i in range(transactions)]
+    status, data = call(conn, 'POST', '/api/transactions/batch', rows, token=token)
+    if status != 201:
+        raise RuntimeError(f"seed import failed: {status} {data[:200]}")
+    return token
+
+
+def run_load(port, path, token, connections, duration):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+        local = []
+        local_errors = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status, _ = call(conn, 'GET', path, token=token)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+                status = None
+            if status == 200:
+                local.append(time.perf_counter() - started)
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client) for _ in range(connections)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1) if latencies else None
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 1) if latencies else None,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--worker-classes', default='sync,gevent')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--db-latency-ms', type=float, default=20)
+    parser.add_argument('--path', default='/api/transactions?per_page=20')
+    parser.add_argument('--transactions', type=int, default=2000)
+    parser.add_argument('--database-url')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--json', help='把結果另存成 JSON 檔')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    tmpdir = None
+    if args.database_url:
+        env['DATABASE_URL'] = args.database_url
+    else:
+        tmpdir = tempfile.mkdtemp(prefix='accweb-bench-')
+        env['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmpdir, 'bench.db')
+    subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db-upgrade'], cwd=BACKEND_DIR, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+
+    results = {}
+    token = None
+    for worker_class in args.worker_classes.split(','):
+        server = start_server(worker_class, args.port, args, env)
+        try:
+            wait_until_up(args.port)
+            if token is None:
+                token = seed(args.port, args.transactions)
+            run_load(args.port, args.path, token, args.connections, 1) # 暖機
+            results[worker_class] = run_load(args.port, args.path, token, args.connections, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"GET {args.path}  workers={args.workers} connections={args.connections} "
+          f"duration={args.duration}s db_latency={args.db_latency_ms}ms")
+    print(f"{'worker':<8} {'req/s':>8} {'requests':>9} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for worker_class, r in results.items():
+        print(f"{worker_class:<8} {r['rps']:>8} {r['requests']:>9} {r['errors']:>7} "
+              f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
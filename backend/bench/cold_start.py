@@ -0,0 +1,116 @@
+# backend/bench/cold_start.py
+"""量測冷啟動：從啟動新的 Python 行程到第一個成功回應 (200) 的時間
+
+在 backend/ 目錄下執行 (資料庫需已跑過 db-upgrade)：
+    python bench/cold_start.py --database-url sqlite:////tmp/bench.db
+    python bench/cold_start.py --database-url sqlite:////tmp/bench.db --server
+    python bench/cold_start.py --database-url sqlite:////tmp/bench.db --server --no-preload
+
+預設在新的子行程中以 Flask test client 發出第一個請求，分別列出 import、建立 app 與第一個請求的時間；
+--server 則實際啟動 gunicorn (使用 gunicorn.conf.py)，輪詢 --path 直到回應 200，量測的是
+Render 等平台從啟動指令到可以服務的時間。每種量測執行 --runs 次，列出中位數與最大值。
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 在全新的子行程中執行，避免本行程已 import 的模組影響結果
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import app as m
+imported = time.perf_counter()
+application = getattr(m, 'app', None) or m.create_app()
+created = time.perf_counter()
+response = application.test_client().get(sys.argv[1])
+done = time.perf_counter()
+print(json.dumps({'status': response.status_code, 'import_ms': (imported - started) * 1000,
+                  'create_app_ms': (created - imported) * 1000, 'first_request_ms': (done - created) * 1000}))
+'''
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def measure_in_process(path, env):
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', PROBE, path], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    total_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        sys.exit(f"probe failed:\n{result.stderr[-2000:]}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    if timings.pop('status') != 200:
+        sys.exit(f"{path} did not return 200")
+    return dict(timings, total_ms=total_ms)
+
+
+def measure_server(path, env, args):
+    port = free_port()
+    env = dict(env, PORT=str(port), GUNICORN_PRELOAD='false' if args.no_preload else 'true')
+    url = f'http://127.0.0.1:{port}{path}'
+    started = time.perf_counter()
+    process = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', args.app_spec], cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        while True:
+            if process.poll() is not None:
+                sys.exit(f"gunicorn exited with {process.returncode}")
+            if time.perf_counter() - started > args.timeout:
+                sys.exit(f"no 200 from {url} within {args.timeout}s")
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return {'total_ms': (time.perf_counter() - started) * 1000}
+            except (urllib.error.URLError, ConnectionError, socket.timeout):
+                pass
+            time.sleep(0.01)
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'))
+    parser.add_argument('--path', default='/api/health', help='第一個請求的路徑 (必須不需登入)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--server', action='store_true', help='啟動 gunicorn 並以 HTTP 量測')
+    parser.add_argument('--app-spec', default='app:create_app()')
+    parser.add_argument('--no-preload', action='store_true')
+    parser.add_argument('--workers', type=int, default=2, help='--server 時的 WEB_CONCURRENCY')
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error('--database-url (or DATABASE_URL) is required')
+
+    env = dict(os.environ, DATABASE_URL=args.database_url, WEB_CONCURRENCY=str(args.workers))
+    runs = []
+    for i in range(args.runs):
+        timings = measure_server(args.path, env, args) if args.server else measure_in_process(args.path, env)
+        runs.append(timings)
+        print(f"run {i + 1}: " + '  '.join(f"{name} {value:.1f}" for name, value in timings.items()))
+
+    mode = (f"gunicorn {args.app_spec} ({'no preload' if args.no_preload else 'preload'}, {args.workers} workers)"
+            if args.server else 'in-process')
+    print(f"\n{mode}, {args.runs} runs, time to first 200 on {args.path}")
+    for name in runs[0]:
+        values = [r[name] for r in runs]
+        print(f"{name:<18} median {statistics.median(values):>8.1f} ms  max {max(values):>8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+# backend/bench/compare.py
+"""比較兩次 bench/run.py 的結果
+
+    python bench/compare.py bench/results/<base>.json bench/results/<head>.json --threshold 10
+
+p95 延遲增加超過 --threshold 百分比，或每個請求的 SQL 數量增加時標示為 REGRESSION；
+加上 --fail-on-regression 時若有退步則以結束碼 1 離開 (可用於 CI)。
+"""
+import argparse
+import json
+import sys
+
+
+def change(base, head):
+    if base is None or head is None:
+        return None
+    if base == 0:
+        return 0.0 if head == 0 else float('inf')
+    return (head - base) / base * 100
+
+def format_change(base, head):
+    pct = change(base, head)
+    if pct is None:
+        return f"{'-':>24}"
+    return f"{base:>8} -> {head:>8} {pct:>+6.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('base')
+    parser.add_argument('head')
+    parser.add_argument('--threshold', type=float, default=10, help='p95 退步多少百分比視為 regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"base: {base['meta']['commit']} ({base['meta']['timestamp']})")
+    print(f"head: {head['meta']['commit']} ({head['meta']['timestamp']})")
+    if base['meta'].get('row_counts') != head['meta'].get('row_counts'):
+        print("warning: the two runs used different data volumes")
+    print(f"{'scenario':<24} {'p50 ms':>24} {'p95 ms':>24} {'p99 ms':>24} {'queries':>18}")
+
+    regressions = []
+    names = list(base['results']) + [name for name in head['results'] if name not in base['results']]
+    for name in names:
+        b = base['results'].get(name)
+        h = head['results'].get(name)
+        if b is None or h is None:
+            print(f"{name:<24} {'only in ' + ('head' if b is None else 'base'):>24}")
+            continue
+        queries = (f"{b['queries_per_request']} -> {h['queries_per_request']}"
+                   if b['queries_per_request'] is not None else '-')
+        flags = []
+        p95_change = change(b['p95_ms'], h['p95_ms'])
+        if p95_change is not None and p95_change > args.threshold:
+            flags.append('p95')
+        if (b['queries_per_request'] is not None and h['queries_per_request'] is not None
+                and h['queries_per_request'] > b['queries_per_request']):
+            flags.append('queries')
+        if h['errors'] > b['errors']:
+            flags.append('errors')
+        if flags:
+            regressions.append(name)
+        print(f"{name:<24} {format_change(b['p50_ms'], h['p50_ms'])} {format_change(b['p95_ms'], h['p95_ms'])} "
+              f"{format_change(b['p99_ms'], h['p99_ms'])} {queries:>18}"
+              + (f"  REGRESSION ({', '.join(flags)})" if flags else ''))
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
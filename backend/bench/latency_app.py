@@ -0,0 +1,19 @@
+# backend/bench/latency_app.py
+# 壓測用的 WSGI 進入點：在每個 SQL 執行前 sleep BENCH_DB_LATENCY_MS 毫秒，
+# 模擬正式環境中與遠端 PostgreSQL 之間的網路往返。gevent worker 下 time.sleep 已被 patch，
+# 與 psycogreen 等待 PostgreSQL 回應時一樣會讓出控制權。
+import os
+import time
+
+from sqlalchemy import event
+
+from app import create_app, db
+
+app = create_app()
+DB_LATENCY = float(os.getenv('BENCH_DB_LATENCY_MS', 0)) / 1000
+
+with app.app_context():
+    @event.listens_for(db.engine, 'before_cursor_execute')
+    def simulate_round_trip(conn, cursor, statement, parameters, context, executemany):
+        if DB_LATENCY:
+            time.sleep(DB_LATENCY)
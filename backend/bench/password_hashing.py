@@ -0,0 +1,83 @@
+# backend/bench/password_hashing.py
+"""量測密碼雜湊 / 登入的吞吐量
+
+在 backend/ 目錄下執行：
+    python bench/password_hashing.py --methods scrypt,pbkdf2:sha256:600000 --concurrency 1,4,16
+
+對每個演算法分別量測：
+  * verify：直接呼叫 passwords.verify_password (經過執行緒池)，得到每秒驗證次數與每核心的吞吐量
+  * login：以 Flask test client 對暫存 SQLite 資料庫發送 POST /api/login (包含查詢與簽發 token)
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def run_concurrently(func, concurrency, duration):
+    """以 concurrency 個執行緒重複呼叫 func，回傳每秒完成次數"""
+    counts = [0] * concurrency
+    deadline = time.monotonic() + duration
+
+    def worker(i):
+        while time.monotonic() < deadline:
+            func()
+            counts[i] += 1
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts) / (time.monotonic() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--methods', default='scrypt,pbkdf2:sha256:600000')
+    parser.add_argument('--concurrency', default='1,4,16')
+    parser.add_argument('--duration', type=float, default=3)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='PASSWORD_HASH_WORKERS')
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    os.environ['PASSWORD_HASH_WORKERS'] = str(args.workers)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(prefix='accweb-bench-'), 'bench.db')
+    os.chdir(BACKEND_DIR)
+    import passwords
+    from app import create_app, db, migrations
+    app = create_app()
+    with app.app_context():
+        migrations.upgrade(db.engine, db.metadata, log=lambda *a: None)
+
+    print(f"cores={cores} PASSWORD_HASH_WORKERS={args.workers} duration={args.duration}s")
+    print(f"{'method':<24} {'mode':<7} {'threads':>7} {'ops/s':>9} {'ops/s/core':>11}")
+    for method in args.methods.split(','):
+        passwords.PASSWORD_HASH_METHOD = method
+        pwhash = passwords.hash_password('bench-password')
+
+        client = app.test_client()
+        username = f'bench-{method}'
+        client.post('/api/register', json={'username': username, 'password': 'bench-password'})
+
+        def verify():
+            assert passwords.verify_password(pwhash, 'bench-password')
+
+        def login():
+            response = app.test_client().post('/api/login', json={'username': username, 'password': 'bench-password'})
+            assert response.status_code == 200, response.status_code
+
+        for mode, func in (('verify', verify), ('login', login)):
+            for concurrency in (int(c) for c in args.concurrency.split(',')):
+                rate = run_concurrently(func, concurrency, args.duration)
+                print(f"{method:<24} {mode:<7} {concurrency:>7} {rate:>9.1f} {rate / min(cores, args.workers or 1, concurrency):>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+# backend/bench/run.py
+"""對真實的 API 路由量測延遲 (p50 / p95 / p99) 與每個請求的 SQL 數量，結果存成 JSON
+
+先用 bench/seed.py 建立資料，再在 backend/ 目錄下執行：
+    python bench/run.py --database-url sqlite:////tmp/bench.db
+    python bench/run.py --base-url http://127.0.0.1:8000 --seeded-users 10000
+
+預設以 Flask test client 在同一個行程內執行 (可以精確計算每個請求的 SQL 數量)；
+指定 --base-url 則改對已啟動的伺服器發送 HTTP 請求 (此時不計算 SQL 數量)。
+預設關閉回應快取 (CACHE_URL=null) 以量測實際的查詢成本，--with-cache 則保留快取。
+
+結果預設寫到 bench/results/<commit>.json，可用 bench/compare.py 比較兩次的結果。
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+PASSWORD = 'bench-password'
+
+# (名稱, 方法, 路徑)；{group_id} 會換成該使用者所屬的群組
+SCENARIOS = [
+    ('login', 'POST', '/api/login'),
+    ('user', 'GET', '/api/user'),
+    ('categories', 'GET', '/api/categories'),
+    ('transactions', 'GET', '/api/transactions?per_page=20'),
+    ('transactions_page_5', 'GET', '/api/transactions?per_page=20&page=5'),
+    ('transactions_cursor', 'GET', '/api/transactions?per_page=20&cursor='),
+    ('transactions_filtered', 'GET', '/api/transactions?per_page=20&type=expense&start_date=2024-01-01'),
+    ('transactions_search', 'GET', '/api/transactions?per_page=20&search_term=coffee'),
+    ('summary', 'GET', '/api/summary'),
+    ('category_breakdown', 'GET', '/api/summary/category_breakdown'),
+    ('trend_day', 'GET', '/api/summary/trend?interval=day'),
+    ('trend_month', 'GET', '/api/summary/trend?interval=month'),
+    ('dashboard', 'GET', '/api/dashboard'),
+    ('groups', 'GET', '/api/groups'),
+    ('group_details', 'GET', '/api/groups/{group_id}'),
+    ('group_transactions', 'GET', '/api/groups/{group_id}/transactions?per_page=20'),
+    ('group_summary', 'GET', '/api/groups/{group_id}/summary'),
+    ('group_trend_month', 'GET', '/api/groups/{group_id}/summary/trend?interval=month'),
+    ('group_dashboard', 'GET', '/api/groups/{group_id}/dashboard'),
+]
+
+
+class InProcessClient:
+    def __init__(self, app, engine):
+        from sqlalchemy import event
+        self.client = app.test_client()
+        self.queries = 0
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def count_query(*args):
+            self.queries += 1
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = self.client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    queries = None
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.conn = connection_class(parts.netloc, timeout=60)
+        self.prefix = parts.path.rstrip('/')
+
+    def request(self, method, path, body=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        self.conn.request(method, self.prefix + path, body=json.dumps(body) if body is not None else None,
+                          headers=headers)
+        response = self.conn.getresponse()
+        return response.status, response.read()
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+def summarize(latencies, queries, errors):
+    latencies = sorted(latencies)
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'mean_ms': ms(statistics.mean(latencies)) if latencies else None,
+        'p50_ms': ms(percentile(latencies, 0.50)),
+        'p95_ms': ms(percentile(latencies, 0.95)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+        'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=BACKEND_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'))
+    parser.add_argument('--base-url')
+    parser.add_argument('--seeded-users', type=int, help='seed.py 建立的使用者數 (--base-url 模式需要)')
+    parser.add_argument('--users', type=int, default=20, help='輪流使用幾位使用者')
+    parser.add_argument('--iterations', type=int, default=100, help='每個情境的請求數')
+    parser.add_argument('--login-iterations', type=int, default=10)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--scenarios', help='以逗號分隔，只執行指定的情境')
+    parser.add_argument('--with-cache', action='store_true')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    row_counts = None
+    dialect = None
+    if args.base_url:
+        if not args.seeded_users:
+            parser.error('--seeded-users is required with --base-url')
+        client = HttpClient(args.base_url)
+        seeded_users = args.seeded_users
+    else:
+        if not args.database_url:
+            parser.error('--database-url (or DATABASE_URL) is required')
+        os.environ['DATABASE_URL'] = args.database_url
+        if not args.with_cache:
+            os.environ['CACHE_URL'] = 'null'
+        os.chdir(BACKEND_DIR)
+        from app import create_app, db
+        app = create_app()
+        # 只在這裡使用 app context；量測的請求各自建立新的 context (g 與 session 不會沿用，查詢數才準確)
+        with app.app_context():
+            engine = db.engine
+            dialect = engine.dialect.name
+            row_counts = {name: db.session.execute(db.select(db.func.count()).select_from(db.metadata.tables[name])).scalar()
+                          for name in ('user', 'transaction', 'group', 'group_member', 'group_transaction', 'daily_rollup')}
+            seeded_users = db.session.execute(
+                db.select(db.func.count()).select_from(db.metadata.tables['user'])
+                .where(db.metadata.tables['user'].c.username.like('bench_user_%'))
+            ).scalar()
+        client = InProcessClient(app, engine)
+        if not seeded_users:
+            sys.exit('No bench users found; run bench/seed.py first.')
+
+    # 平均分散選取使用者 (交易量有多有少)，登入取得 token 與所屬群組
+    step = max(1, seeded_users // args.users)
+    users = []
+    for user_id in range(1, seeded_users + 1, step)[:args.users]:
+        username = f'bench_user_{user_id}'
+        status, data = client.request('POST', '/api/login', {'username': username, 'password': PASSWORD})
+        if status != 200:
+            sys.exit(f"login failed for {username}: {status} {data[:200]}")
+        token = json.loads(data)['access_token']
+        _, data = client.request('GET', '/api/groups', token=token)
+        groups = json.loads(data)
+        users.append({'username': username, 'token': token, 'group_id': groups[0]['id'] if groups else None})
+
+    selected = set(args.scenarios.split(',')) if args.scenarios else None
+    results = {}
+    for name, method, path in SCENARIOS:
+        if selected is not None and name not in selected:
+            continue
+        candidates = [u for u in users if u['group_id'] is not None] if '{group_id}' in path else users
+        if not candidates:
+            print(f"skip {name}: no sampled user belongs to a group")
+            continue
+        iterations = args.login_iterations if name == 'login' else args.iterations
+
+        latencies, queries, errors = [], [], 0
+        for i in range(-args.warmup, iterations):
+            user = candidates[i % len(candidates)]
+            url = path.format(group_id=user['group_id'])
+            body = {'username': user['username'], 'password': PASSWORD} if name == 'login' else None
+            queries_before = client.queries
+            started = time.perf_counter()
+            status, _ = client.request(method, url, body, token=None if name == 'login' else user['token'])
+            elapsed = time.perf_counter() - started
+            if i < 0:
+                continue # 暖機
+            if status != 200:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            if client.queries is not None:
+                queries.append(client.queries - queries_before)
+        results[name] = summarize(latencies, queries, errors)
+        r = results[name]
+        print(f"{name:<24} p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  p99 {r['p99_ms']:>8} ms  "
+              f"queries {r['queries_per_request']}  errors {errors}")
+
+    commit = git_commit()
+    report = {
+        'meta': {
+            'commit': commit,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'mode': 'http' if args.base_url else 'in-process',
+            'dialect': dialect,
+            'row_counts': row_counts,
+            'python': platform.python_version(),
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(BACKEND_DIR, 'bench', 'results', f'{commit}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"saved {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+# backend/bench/seed.py
+"""建立壓測用的資料 (使用者、個人交易、群組、群組成員、群組交易；類別使用共用的預設類別)
+
+在 backend/ 目錄下執行：
+    python bench/seed.py --database-url sqlite:////tmp/bench.db --preset small
+    python bench/seed.py --database-url postgresql://localhost/accweb_bench --preset large
+
+資料由固定的亂數種子產生，同一組參數每次產生的內容相同，方便在不同 commit 之間比較。
+目標資料庫必須是空的 (只跑過 db-upgrade)；所有使用者的密碼都是 bench-password，
+使用者名稱為 bench_user_1 ... bench_user_N。
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+PRESETS = {
+    'small': {'users': 100, 'transactions': 20000, 'groups': 10},
+    'medium': {'users': 1000, 'transactions': 500000, 'groups': 100},
+    'large': {'users': 10000, 'transactions': 5000000, 'groups': 1000},
+}
+PASSWORD = 'bench-password'
+CHUNK_SIZE = 5000
+
+DESCRIPTION_WORDS = ['早餐', '午餐', '晚餐', '咖啡', '捷運', '計程車', '超市', '電費', '網路', '電影',
+                     '書店', '藥局', '加油', '停車', 'lunch', 'coffee', 'taxi', 'grocery', 'salary', 'bonus']
+
+
+def insert_chunks(conn, table, rows):
+    """rows 是 generator，分批以 executemany 寫入，回傳筆數"""
+    total = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            conn.execute(table.insert(), chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+        total += len(chunk)
+    return total
+
+
+def random_transaction(rng, categories, today, days):
+    """categories: {'income': [id, ...], 'expense': [id, ...]} (共用的預設類別)"""
+    if rng.random() < 0.2:
+        kind, amount = 'income', rng.randint(1000, 60000)
+    else:
+        kind, amount = 'expense', rng.randint(20, 3000)
+    day = today - timedelta(days=rng.randrange(days))
+    return {
+        'amount': float(amount),
+        'type': kind,
+        'description': f"{rng.choice(DESCRIPTION_WORDS)} {rng.randint(1, 9999)}",
+        'date': day,
+        'created_at': datetime(day.year, day.month, day.day, rng.randrange(24), rng.randrange(60)),
+        'category_id': rng.choice(categories[kind]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default=os.getenv('DATABASE_URL'))
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='small')
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--transactions', type=int)
+    parser.add_argument('--groups', type=int)
+    parser.add_argument('--group-transactions', type=int, help='預設為個人交易數的 10%%')
+    parser.add_argument('--days', type=int, default=730, help='交易日期分佈在最近幾天內')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error('--database-url (or DATABASE_URL) is required')
+
+    counts = dict(PRESETS[args.preset])
+    for name in ('users', 'transactions', 'groups'):
+        if getattr(args, name) is not None:
+            counts[name] = getattr(args, name)
+    counts['group_transactions'] = (args.group_transactions if args.group_transactions is not None
+                                    else counts['transactions'] // 10)
+
+    os.environ['DATABASE_URL'] = args.database_url
+    os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+    os.chdir(BACKEND_DIR)
+    import passwords
+    from app import create_app, db, migrations
+
+    rng = random.Random(args.seed)
+    today = date.today()
+    started = time.monotonic()
+    with create_app().app_context():
+        migrations.upgrade(db.engine, db.metadata, log=lambda *a: None)
+        tables = db.metadata.tables
+        password_hash = passwords.hash_password(PASSWORD) # 所有使用者共用，避免雜湊一萬次
+
+        with db.engine.begin() as conn:
+            if conn.execute(tables['user'].select().limit(1)).first() is not None:
+                sys.exit('Target database is not empty; seed a fresh database.')
+            if conn.dialect.name == 'sqlite':
+                conn.exec_driver_sql('PRAGMA synchronous = OFF')
+
+            users = counts['users']
+            insert_chunks(conn, tables['user'], ({
+                'id': user_id, 'username': f'bench_user_{user_id}', 'password_hash': password_hash,
+                'created_at': datetime.utcnow(), 'is_active': True,
+            } for user_id in range(1, users + 1)))
+            print(f"users: {users}")
+
+            category = tables['category']
+            categories = {'income': [], 'expense': []}
+            for category_id, kind in conn.execute(
+                db.select(category.c.id, category.c.type).where(category.c.user_id.is_(None)).order_by(category.c.id)
+            ):
+                categories[kind].append(category_id)
+
+            # 個人交易：每位使用者的筆數有高有低 (少數重度使用者)，總數固定
+            weights = [rng.paretovariate(1.5) for _ in range(users)]
+            scale = counts['transactions'] / sum(weights)
+            per_user = [int(w * scale) for w in weights]
+            per_user[0] += counts['transactions'] - sum(per_user)
+            inserted = insert_chunks(conn, tables['transaction'], (
+                dict(random_transaction(rng, categories, today, args.days), user_id=user_id)
+                for user_id, n in enumerate(per_user, start=1) for _ in range(n)
+            ))
+            print(f"transactions: {inserted}")
+
+            # 群組：2~8 位成員，第一位是建立者兼管理員
+            group_members = {}
+            for group_id in range(1, counts['groups'] + 1):
+                group_members[group_id] = rng.sample(range(1, users + 1), min(users, rng.randint(2, 8)))
+            insert_chunks(conn, tables['group'], ({
+                'id': group_id, 'name': f'bench group {group_id}', 'description': None,
+                'created_by_user_id': members[0], 'created_at': datetime.utcnow(),
+            } for group_id, members in group_members.items()))
+            insert_chunks(conn, tables['group_member'], ({
+                'group_id': group_id, 'user_id': user_id, 'role': 'admin' if i == 0 else 'member',
+                'status': 'accepted', 'joined_at': datetime.utcnow(),
+            } for group_id, members in group_members.items() for i, user_id in enumerate(members)))
+            print(f"groups: {len(group_members)}, members: {sum(len(m) for m in group_members.values())}")
+
+            group_ids = list(group_members)
+            def group_transactions():
+                for _ in range(counts['group_transactions'] if group_ids else 0):
+                    group_id = rng.choice(group_ids)
+                    user_id = rng.choice(group_members[group_id])
+                    row = random_transaction(rng, categories, today, args.days)
+                    yield dict(row, group_id=group_id, created_by_user_id=user_id)
+            inserted = insert_chunks(conn, tables['group_transaction'], group_transactions())
+            print(f"group transactions: {inserted}")
+
+            if conn.dialect.name == 'postgresql':
+                # 明確指定了 id，序列要跟上，之後經由 API 新增才不會衝突
+                for table_name in ('user', 'transaction', 'group', 'group_member', 'group_transaction'):
+                    conn.exec_driver_sql(
+                        f"SELECT setval(pg_get_serial_sequence('\"{table_name}\"', 'id'), "
+                        f"(SELECT COALESCE(MAX(id), 1) FROM \"{table_name}\"))"
+                    )
+
+            # 批次寫入不經過 ORM 的 flush 事件，每日彙總表一次重建
+            rows = migrations.backfill_daily_rollups(conn, db.metadata, replace=True)
+            print(f"daily rollup rows: {rows}")
+
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql('ANALYZE')
+
+    print(f"done in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
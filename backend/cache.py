@@ -0,0 +1,136 @@
+# backend/cache.py
+# 儀表板 API 的回應快取。
+#
+# 預設使用行程內 (in-process) 的 LRU 快取；設定 CACHE_URL=redis://... 時改用 Redis，
+# 讓多個 gunicorn worker / 實例共用同一份快取。CACHE_URL=null 可完全停用。
+#
+# 快取本身不負責失效：呼叫端會把擁有者的資料版本號放進鍵值，
+# 版本號在寫入時遞增後，舊的鍵就不會再被讀到，最後由 TTL / LRU 淘汰。
+# 不適合放版本號的資料 (例如群組成員權限) 則由呼叫端在寫入後 delete。
+import json
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict() # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (ttl or self.ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._data)
+        return {
+            'backend': 'memory',
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+        }
+
+
+class RedisCache:
+    def __init__(self, url, ttl=300, prefix='accweb:'):
+        import redis # 選用套件，只有設定 redis:// 時才需要安裝
+        self._client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        # 命中率為各 worker 自己的統計；淘汰由 Redis 的 maxmemory-policy 決定
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return MISSING
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self.prefix + key, json.dumps(value), ex=ttl or self.ttl)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + '*'):
+            self._client.delete(key)
+
+    def stats(self):
+        return {
+            'backend': 'redis',
+            'hits': self.hits,
+            'misses': self.misses,
+            'ttl': self.ttl,
+        }
+
+
+class NullCache:
+    def __init__(self):
+        self.misses = 0
+
+    def get(self, key):
+        self.misses += 1
+        return MISSING
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {'backend': 'null', 'hits': 0, 'misses': self.misses}
+
+
+def create_cache(url=None, max_entries=1024, ttl=300):
+    if not url or url == 'memory':
+        return LRUCache(max_entries=max_entries, ttl=ttl)
+    if url == 'null':
+        return NullCache()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url, ttl=ttl)
+    raise ValueError(f"Unsupported CACHE_URL: {url}")
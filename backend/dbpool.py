@@ -0,0 +1,111 @@
+# backend/dbpool.py
+# 資料庫連線池的設定與統計。
+#
+# 每個 gunicorn worker 都有自己的連線池，所以總連線數 = WEB_CONCURRENCY × (pool_size + max_overflow)。
+# 沒有指定 DB_POOL_SIZE 時，會把 DB_MAX_CONNECTIONS (扣掉 DB_RESERVED_CONNECTIONS 留給 release 階段的遷移、
+# 手動 psql 等) 平均分給各 worker，並且不使用 overflow：overflow 連線用完即關，正是連線頻繁建立/關閉的來源。
+# 連線池滿時請求會排隊最多 DB_POOL_TIMEOUT 秒，逾時則回應 503。
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def increment(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'invalidations': self.invalidations,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': round(self.wait_seconds_total, 6),
+                'wait_seconds_max': round(self.wait_seconds_max, 6),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """記錄每次取得連線等待多久的 QueuePool (包含池滿時排隊與建立新連線的時間)"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record_wait(time.perf_counter() - started)
+
+
+@event.listens_for(TimedQueuePool, 'connect')
+def count_connect(dbapi_connection, connection_record):
+    pool_stats.increment('connects')
+
+@event.listens_for(TimedQueuePool, 'invalidate')
+def count_invalidation(dbapi_connection, connection_record, exception):
+    pool_stats.increment('invalidations')
+
+
+def env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+def engine_options(database_uri):
+    """依環境變數產生 SQLALCHEMY_ENGINE_OPTIONS"""
+    if database_uri.startswith('sqlite') and (database_uri in ('sqlite://', 'sqlite:///') or ':memory:' in database_uri):
+        return {} # 記憶體資料庫由 Flask-SQLAlchemy 使用 StaticPool，不適用連線池設定
+
+    workers = max(1, env_int('WEB_CONCURRENCY', 2))
+    budget = env_int('DB_MAX_CONNECTIONS', 20) - env_int('DB_RESERVED_CONNECTIONS', 2)
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': env_int('DB_POOL_SIZE', max(1, budget // workers)),
+        'max_overflow': env_int('DB_MAX_OVERFLOW', 0),
+        'pool_timeout': env_int('DB_POOL_TIMEOUT', 10),
+        'pool_recycle': env_int('DB_POOL_RECYCLE', 1800), # 秒；早於雲端代理切斷閒置連線的時間
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true', # 閒置後的失效連線在取用時先偵測並重連
+    }
+    if database_uri.startswith('postgres'):
+        connect_args = {'connect_timeout': env_int('DB_CONNECT_TIMEOUT', 10)}
+        statement_timeout = env_int('DB_STATEMENT_TIMEOUT_MS', 30000)
+        if statement_timeout:
+            connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+        options['connect_args'] = connect_args
+    return options
+
+
+def stats(engine):
+    pool = engine.pool
+    current = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        current.update({
+            'pool_size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'timeout': pool.timeout(),
+        })
+    current.update(pool_stats.snapshot())
+    return current
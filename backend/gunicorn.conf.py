@@ -0,0 +1,40 @@
+# backend/gunicorn.conf.py
+# gunicorn 會自動讀取工作目錄下的這個檔案 (Procfile: gunicorn -c gunicorn.conf.py "app:create_app()")。
+#
+# 預設 preload_app：master 行程 import 並建立 app 一次，再 fork 出各 worker，worker 開機不必再 import 一次
+# (建立 app 不會連線資料庫，見 app.create_app)。GUNICORN_PRELOAD=false 則由每個 worker 各自載入。
+#
+# 預設仍是 sync worker：每個 worker 同時只處理一個請求，等待資料庫回應時整個 worker 被佔住。
+# 設定 GUNICORN_WORKER_CLASS=gevent 改用協程 worker：gevent 會 monkey patch socket 等標準函式庫，
+# psycopg2 則由 psycogreen 改成在等待 PostgreSQL 時讓出控制權，一個 worker 可以同時服務
+# GUNICORN_WORKER_CONNECTIONS 個連線。
+#
+# 注意：gevent 只能讓「等待 I/O」變成非阻塞，密碼雜湊等 CPU 密集的工作仍會卡住該 worker。
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 100))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+if worker_class == 'gevent' and preload_app:
+    # preload 時 app 在 master 中 import；必須在那之前 patch，否則 import 時建立的鎖與 socket 仍是原生的
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        # master 建立的 engine 被複製到每個 worker；連線不能跨行程共用，丟掉繼承來的連線 (不關閉 master 的)
+        from app import db
+        with worker.app.wsgi().app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+    if worker_class == 'gevent':
+        # gunicorn 的 gevent worker 已經 patch 了標準函式庫，這裡再讓 psycopg2 支援協程
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+        server.log.info("psycopg2 patched for gevent (worker %s)", worker.pid)
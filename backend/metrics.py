@@ -0,0 +1,192 @@
+# backend/metrics.py
+# 請求層級的效能量測 (選用)。
+#
+# 設定 METRICS_ENABLED=true 後才會註冊 Flask 與 SQLAlchemy 的 hook，未啟用時完全沒有額外負擔。
+# 啟用後記錄：
+#   * 每個路由的延遲直方圖與狀態碼計數
+#   * 每個請求執行的 SQL 數量與時間 (before/after_cursor_execute 事件)
+#   * 超過 SLOW_REQUEST_MS 的請求，連同其 SQL 寫入 log
+# 並由 GET /metrics 以 Prometheus 文字格式輸出。設定 METRICS_TOKEN 時需帶 Authorization: Bearer <token>。
+#
+# 注意：數據存在各 worker 行程的記憶體中，多個 gunicorn worker 時每次抓取只會看到其中一個 worker。
+import os
+import threading
+import time
+from collections import defaultdict
+
+from flask import g, request, has_app_context, current_app, Response
+from sqlalchemy import event
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_MAX_STATEMENTS = 50 # 慢請求 log 中最多列出的 SQL 數
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket', dict(labels, le=format_number(bound)), cumulative
+        yield f'{name}_bucket', dict(labels, le='+Inf'), self.count
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, self.count
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.request_latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS)) # (method, endpoint)
+        self.request_statements = defaultdict(lambda: Histogram(STATEMENT_BUCKETS)) # (method, endpoint)
+        self.requests = defaultdict(int) # (method, endpoint, status)
+        self.sql_seconds = defaultdict(float) # (method, endpoint)
+        self.slow_requests = defaultdict(int) # (method, endpoint)
+        self.collectors = []
+
+    def record(self, method, endpoint, status, seconds, statements, sql_seconds, slow):
+        key = (method, endpoint)
+        with self._lock:
+            self.request_latency[key].observe(seconds)
+            self.request_statements[key].observe(statements)
+            self.requests[(method, endpoint, status)] += 1
+            self.sql_seconds[key] += sql_seconds
+            if slow:
+                self.slow_requests[key] += 1
+
+    def render(self):
+        lines = []
+
+        def family(name, kind, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample_name, labels, value in samples:
+                lines.append(f'{sample_name}{format_labels(labels)} {format_number(value)}')
+
+        def endpoint_labels(key):
+            return {'method': key[0], 'endpoint': key[1]}
+
+        with self._lock:
+            family('accweb_http_request_duration_seconds', 'histogram', 'Request latency by endpoint.',
+                   [s for key, h in sorted(self.request_latency.items())
+                    for s in h.samples('accweb_http_request_duration_seconds', endpoint_labels(key))])
+            family('accweb_http_requests_total', 'counter', 'Requests by endpoint and status.',
+                   [('accweb_http_requests_total', {'method': m, 'endpoint': e, 'status': str(s)}, v)
+                    for (m, e, s), v in sorted(self.requests.items())])
+            family('accweb_sql_statements_per_request', 'histogram', 'SQL statements executed per request.',
+                   [s for key, h in sorted(self.request_statements.items())
+                    for s in h.samples('accweb_sql_statements_per_request', endpoint_labels(key))])
+            family('accweb_sql_duration_seconds_total', 'counter', 'Time spent executing SQL by endpoint.',
+                   [('accweb_sql_duration_seconds_total', endpoint_labels(key), v)
+                    for key, v in sorted(self.sql_seconds.items())])
+            family('accweb_slow_requests_total', 'counter', f'Requests slower than {SLOW_REQUEST_MS:g}ms.',
+                   [('accweb_slow_requests_total', endpoint_labels(key), v)
+                    for key, v in sorted(self.slow_requests.items())])
+
+        # 其他子系統 (快取、連線池) 的數據，在抓取時才讀取
+        for name, kind, help_text, collect in self.collectors:
+            family(name, kind, help_text, [(name, labels, value) for labels, value in collect()])
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def format_number(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def register_collector(name, kind, help_text, collect):
+    """collect() 回傳 [(labels dict, value), ...]"""
+    registry.collectors.append((name, kind, help_text, collect))
+
+
+# --- Flask / SQLAlchemy hooks ---
+
+def start_request():
+    g.metrics_started = time.perf_counter()
+    g.metrics_sql_count = 0
+    g.metrics_sql_seconds = 0.0
+    g.metrics_statements = []
+
+def finish_request(response):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return response
+    seconds = time.perf_counter() - started
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched' # 用路由樣板避免 ID 造成標籤爆量
+    slow = seconds * 1000 >= SLOW_REQUEST_MS
+    registry.record(request.method, endpoint, response.status_code, seconds,
+                    g.metrics_sql_count, g.metrics_sql_seconds, slow)
+    if slow:
+        log_slow_request(endpoint, response.status_code, seconds)
+    return response
+
+def log_slow_request(endpoint, status, seconds):
+    statements = '\n'.join(
+        f'    {duration * 1000:8.1f}ms  {" ".join(statement.split())[:300]}'
+        for statement, duration in g.metrics_statements
+    )
+    omitted = g.metrics_sql_count - len(g.metrics_statements)
+    if omitted > 0:
+        statements += f'\n    ... {omitted} more statements'
+    current_app.logger.warning(
+        "Slow request: %s %s (%s) -> %s in %.1fms, %d SQL statements (%.1fms)\n%s",
+        request.method, request.full_path.rstrip('?'), endpoint, status, seconds * 1000,
+        g.metrics_sql_count, g.metrics_sql_seconds * 1000, statements
+    )
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_app_context() and 'metrics_started' in g:
+        context.metrics_query_started = time.perf_counter()
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'metrics_query_started', None)
+    if started is None or not has_app_context() or 'metrics_started' not in g:
+        return
+    duration = time.perf_counter() - started
+    g.metrics_sql_count += 1
+    g.metrics_sql_seconds += duration
+    if len(g.metrics_statements) < SLOW_REQUEST_MAX_STATEMENTS:
+        g.metrics_statements.append((statement, duration))
+
+
+def metrics_view():
+    if METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICS_TOKEN}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app, engine):
+    """註冊量測用的 hook 與 /metrics；METRICS_ENABLED 未開啟時不做任何事"""
+    if not METRICS_ENABLED:
+        return
+    app.before_request(start_request)
+    app.after_request(finish_request)
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -0,0 +1,341 @@
+# backend/migrations.py
+# 版本化的資料庫遷移，取代原本在 import 時執行的 db.create_all()。
+#
+# 每個遷移以遞增的版本號登錄在 MIGRATIONS 中，已套用的版本記錄在 schema_migrations 表。
+# 執行方式：flask --app app db-upgrade
+#
+# 注意：每個遷移都必須可重複執行 (idempotent)。全新資料庫會先由版本 1 依照「目前」的模型
+# 建立所有表與索引，之後的遷移再執行時必須能辨識出物件已存在並略過。
+from datetime import datetime
+
+from sqlalchemy import Table, Column, Integer, String, DateTime, Float, MetaData, inspect, select, text, literal, func
+from sqlalchemy.schema import CreateTable
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('name', String(255), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+# pg_advisory_lock 使用的鍵值，避免多個實例同時執行遷移
+_ADVISORY_LOCK_KEY = 7240316
+
+
+class Migration:
+    def __init__(self, version, name, func, transactional):
+        self.version = version
+        self.name = name
+        self.func = func
+        # PostgreSQL 的 CREATE INDEX CONCURRENTLY 不能在交易中執行，這類遷移需設為 False
+        self.transactional = transactional
+
+
+def migration(version, name, transactional=True):
+    def decorator(func):
+        MIGRATIONS.append(Migration(version, name, func, transactional))
+        return func
+    return decorator
+
+
+# --- 工具函數 ---
+
+def has_table(conn, table_name):
+    return inspect(conn).has_table(table_name)
+
+def has_index(conn, table_name, index_name):
+    return any(ix['name'] == index_name for ix in inspect(conn).get_indexes(table_name))
+
+def create_index(conn, index):
+    """建立索引；PostgreSQL 上使用 CONCURRENTLY，不會鎖住寫入"""
+    table_name = index.table.name
+    if has_index(conn, table_name, index.name):
+        return
+    if conn.dialect.name == 'postgresql':
+        quote = conn.dialect.identifier_preparer.quote
+        columns = ', '.join(quote(c.name) for c in index.columns)
+        unique = 'UNIQUE ' if index.unique else ''
+        # 若先前的 CONCURRENTLY 中途失敗會留下 INVALID 索引，這裡先清掉再重建
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {quote(index.name)}'))
+        conn.execute(text(
+            f'CREATE {unique}INDEX CONCURRENTLY {quote(index.name)} ON {quote(table_name)} ({columns})'
+        ))
+    else:
+        index.create(conn)
+
+
+# --- 遷移定義 ---
+
+@migration(1, 'initial schema')
+def initial_schema(conn, metadata):
+    # 既有的正式資料庫已有這些表，checkfirst 會直接略過
+    metadata.create_all(conn, checkfirst=True)
+
+
+@migration(2, 'composite indexes for hot filter columns', transactional=False)
+def hot_filter_indexes(conn, metadata):
+    for table_name in ('transaction', 'group_transaction', 'group_member', 'category', 'invitation', 'group'):
+        for index in sorted(metadata.tables[table_name].indexes, key=lambda ix: ix.name):
+            create_index(conn, index)
+
+
+@migration(3, 'daily rollup table')
+def daily_rollup_table(conn, metadata):
+    table = metadata.tables['daily_rollup']
+    if not has_table(conn, table.name):
+        table.create(conn)
+    backfill_daily_rollups(conn, metadata, replace=True)
+
+
+@migration(4, 'owner version counters')
+def owner_version_table(conn, metadata):
+    table = metadata.tables['owner_version']
+    if not has_table(conn, table.name):
+        table.create(conn)
+
+
+@migration(5, 'description search indexes', transactional=False)
+def description_search_indexes(conn, metadata):
+    # 交易說明的搜尋原本是 ILIKE '%term%'，無法使用一般索引
+    if conn.dialect.name == 'postgresql':
+        # pg_trgm 的 GIN 索引可以直接加速 ILIKE '%term%'，並提供相似度排序
+        try:
+            conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        except Exception as e:
+            print(f"pg_trgm unavailable, description search stays unindexed: {e}")
+            return
+        quote = conn.dialect.identifier_preparer.quote
+        for table_name in ('transaction', 'group_transaction'):
+            index_name = f'ix_{table_name}_description_trgm'
+            if has_index(conn, table_name, index_name):
+                continue
+            conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS {quote(index_name)}'))
+            conn.execute(text(
+                f'CREATE INDEX CONCURRENTLY {quote(index_name)} ON {quote(table_name)} '
+                f'USING gin (description gin_trgm_ops)'
+            ))
+    elif conn.dialect.name == 'sqlite':
+        # 本機開發用 FTS5 (trigram 分詞，需 SQLite 3.34+)，與 PostgreSQL 一樣是子字串比對
+        if conn.dialect.dbapi.sqlite_version_info < (3, 34, 0):
+            print("SQLite is older than 3.34, description search stays unindexed")
+            return
+        for table_name in ('transaction', 'group_transaction'):
+            create_sqlite_fts(conn, table_name)
+
+def create_sqlite_fts(conn, table_name):
+    fts = f'{table_name}_fts'
+    if has_table(conn, fts):
+        return
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE {fts} USING fts5("
+        f"description, content='{table_name}', content_rowid='id', tokenize='trigram')"
+    ))
+    # external content 表需要觸發器維持同步
+    conn.execute(text(
+        f'CREATE TRIGGER {fts}_ai AFTER INSERT ON "{table_name}" BEGIN '
+        f'INSERT INTO {fts}(rowid, description) VALUES (new.id, new.description); END'
+    ))
+    conn.execute(text(
+        f'CREATE TRIGGER {fts}_ad AFTER DELETE ON "{table_name}" BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, description) VALUES ('delete', old.id, old.description); END"
+    ))
+    conn.execute(text(
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE OF description ON "{table_name}" BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, description) VALUES ('delete', old.id, old.description); "
+        f'INSERT INTO {fts}(rowid, description) VALUES (new.id, new.description); END'
+    ))
+    conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+@migration(6, 'fixed-point amounts')
+def fixed_point_amounts(conn, metadata):
+    # Float -> Numeric(14, 2)；每日彙總表的金額也改為 Numeric，並從四捨五入後的明細重新彙總
+    converted = False
+    for table_name in ('transaction', 'group_transaction', 'daily_rollup'):
+        column = metadata.tables[table_name].c.amount
+        reflected = next(c for c in inspect(conn).get_columns(table_name) if c['name'] == 'amount')
+        if not isinstance(reflected['type'], Float):
+            continue # 全新資料庫在版本 1 已依目前的模型建立
+        quote = conn.dialect.identifier_preparer.quote
+        if conn.dialect.name == 'postgresql':
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(
+                f'ALTER TABLE {quote(table_name)} ALTER COLUMN amount TYPE {column_type} '
+                f'USING round(amount::numeric, {column.type.scale})'
+            ))
+        else:
+            # SQLite 無法變更欄位型別 (數值仍以 REAL 儲存)，只把既有資料四捨五入到相同精度
+            conn.execute(text(f'UPDATE {quote(table_name)} SET amount = round(amount, {column.type.scale})'))
+        converted = True
+    if converted:
+        backfill_daily_rollups(conn, metadata, replace=True)
+
+
+# 所有使用者共用的預設類別 (user_id 為 NULL)。版本 7 之前註冊時會為每位使用者各複製一份。
+DEFAULT_CATEGORIES = [
+    ('薪資', 'income'), ('兼職', 'income'), ('投資收益', 'income'), ('禮金', 'income'),
+    ('餐飲', 'expense'), ('交通', 'expense'), ('購物', 'expense'), ('娛樂', 'expense'),
+    ('水電費', 'expense'), ('房租', 'expense'), ('醫療', 'expense'),
+]
+
+@migration(7, 'shared default categories')
+def shared_default_categories(conn, metadata):
+    category = metadata.tables['category']
+    if 'template_id' not in {c['name'] for c in inspect(conn).get_columns('category')}:
+        add_category_template_columns(conn, category)
+
+    if conn.execute(select(category.c.id).where(category.c.user_id.is_(None)).limit(1)).first() is not None:
+        return # 預設類別已建立
+    conn.execute(category.insert(), [
+        {'name': name, 'type': kind, 'user_id': None, 'template_id': None, 'hidden': False}
+        for name, kind in DEFAULT_CATEGORIES
+    ])
+    defaults = conn.execute(
+        select(category.c.id, category.c.name, category.c.type).where(category.c.user_id.is_(None))
+    ).all()
+
+    # 既有使用者：已刪除或改名的預設類別以 hidden 列遮蔽，登入後看到的類別與之前相同；
+    # 名稱、類型都與預設相同的複本則合併到共用類別 (交易改指向共用類別後刪除複本)
+    user = metadata.tables['user']
+    merged = False
+    for default_id, name, kind in defaults:
+        is_copy = (category.c.name == name) & (category.c.type == kind) & category.c.template_id.is_(None)
+        has_copy = select(category.c.id).where(category.c.user_id == user.c.id, is_copy).exists()
+        conn.execute(category.insert().from_select(
+            ['name', 'type', 'user_id', 'template_id', 'hidden'],
+            select(literal(name), literal(kind), user.c.id, literal(default_id), literal(True)).where(~has_copy)
+        ))
+
+        copies = select(category.c.id).where(category.c.user_id.isnot(None), is_copy)
+        for table_name in ('transaction', 'group_transaction'):
+            table = metadata.tables[table_name]
+            result = conn.execute(table.update().where(table.c.category_id.in_(copies)).values(category_id=default_id))
+            merged = merged or (result.rowcount or 0) > 0
+        conn.execute(category.delete().where(category.c.id.in_(copies)))
+
+    if merged:
+        backfill_daily_rollups(conn, metadata, replace=True)
+    # 回應快取中可能還有舊的類別 ID，遞增所有版本號讓它們失效
+    conn.execute(metadata.tables['owner_version'].update().values(
+        version=metadata.tables['owner_version'].c.version + 1
+    ))
+
+def add_category_template_columns(conn, category):
+    quote = conn.dialect.identifier_preparer.quote
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text(f'ALTER TABLE {quote(category.name)} ALTER COLUMN user_id DROP NOT NULL'))
+        conn.execute(text(
+            f'ALTER TABLE {quote(category.name)} ADD COLUMN template_id INTEGER REFERENCES {quote(category.name)} (id)'
+        ))
+        conn.execute(text(f'ALTER TABLE {quote(category.name)} ADD COLUMN hidden BOOLEAN NOT NULL DEFAULT false'))
+        return
+    # SQLite 無法移除 NOT NULL，依目前的模型重建類別表 (外鍵檢查預設關閉，其他表的參照不受影響)
+    create = str(CreateTable(category).compile(dialect=conn.dialect))
+    conn.execute(text(create.replace(
+        f'CREATE TABLE {quote(category.name)} ', f'CREATE TABLE {quote(category.name + "_new")} ', 1
+    )))
+    conn.execute(text(
+        f'INSERT INTO {quote(category.name + "_new")} (id, name, type, user_id, template_id, hidden) '
+        f'SELECT id, name, type, user_id, NULL, 0 FROM {quote(category.name)}'
+    ))
+    conn.execute(text(f'DROP TABLE {quote(category.name)}'))
+    conn.execute(text(f'ALTER TABLE {quote(category.name + "_new")} RENAME TO {quote(category.name)}'))
+    for index in category.indexes:
+        index.create(conn)
+
+
+# --- 資料回填 ---
+
+def backfill_daily_rollups(conn, metadata, owner_type=None, owner_id=None, replace=False):
+    """以 INSERT ... SELECT 從交易明細重新彙總每日彙總表，回傳寫入的列數"""
+    rollup = metadata.tables['daily_rollup']
+    sources = {
+        'user': (metadata.tables['transaction'], 'user_id'),
+        'group': (metadata.tables['group_transaction'], 'group_id'),
+    }
+    total = 0
+    for source_type, (source, owner_column) in sources.items():
+        if owner_type is not None and owner_type != source_type:
+            continue
+        owner_col = source.c[owner_column]
+        if replace:
+            delete = rollup.delete().where(rollup.c.owner_type == source_type)
+            if owner_id is not None:
+                delete = delete.where(rollup.c.owner_id == owner_id)
+            conn.execute(delete)
+
+        aggregated = select(
+            literal(source_type), owner_col, source.c.date, source.c.category_id, source.c.type,
+            func.sum(source.c.amount), func.count(source.c.id)
+        ).group_by(owner_col, source.c.date, source.c.category_id, source.c.type)
+        if owner_id is not None:
+            aggregated = aggregated.where(owner_col == owner_id)
+
+        result = conn.execute(rollup.insert().from_select(
+            ['owner_type', 'owner_id', 'date', 'category_id', 'type', 'amount', 'transaction_count'],
+            aggregated
+        ))
+        total += max(result.rowcount or 0, 0)
+    return total
+
+
+# --- 執行 ---
+
+def applied_versions(engine):
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+def upgrade(engine, metadata, log=print):
+    """套用所有尚未執行的遷移，回傳本次套用的版本號列表"""
+    lock_conn = None
+    if engine.dialect.name == 'postgresql':
+        lock_conn = engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+        _disable_statement_timeout(lock_conn) # 等待其他實例的遷移完成可能超過 statement_timeout
+        lock_conn.execute(text('SELECT pg_advisory_lock(:key)'), {'key': _ADVISORY_LOCK_KEY})
+
+    try:
+        done = applied_versions(engine)
+        newly_applied = []
+        for m in sorted(MIGRATIONS, key=lambda m: m.version):
+            if m.version in done:
+                continue
+            log(f"Applying migration {m.version}: {m.name}")
+            if m.transactional:
+                with engine.begin() as conn:
+                    _disable_statement_timeout(conn)
+                    m.func(conn, metadata)
+                    _record(conn, m)
+                    _restore_statement_timeout(conn)
+            else:
+                with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                    _disable_statement_timeout(conn)
+                    try:
+                        m.func(conn, metadata)
+                        _record(conn, m)
+                    finally:
+                        _restore_statement_timeout(conn)
+            newly_applied.append(m.version)
+        return newly_applied
+    finally:
+        if lock_conn is not None:
+            lock_conn.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': _ADVISORY_LOCK_KEY})
+            _restore_statement_timeout(lock_conn)
+            lock_conn.close()
+
+def _disable_statement_timeout(conn):
+    # 建立索引、回填資料可能很久，不受 DB_STATEMENT_TIMEOUT_MS 限制
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text('SET statement_timeout = 0'))
+
+def _restore_statement_timeout(conn):
+    # 連線會回到連線池，恢復成連線參數 (-c statement_timeout) 中的預設值
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text('RESET statement_timeout'))
+
+def _record(conn, m):
+    conn.execute(schema_migrations.insert().values(
+        version=m.version, name=m.name, applied_at=datetime.utcnow()
+    ))
@@ -0,0 +1,87 @@
+# backend/passwords.py
+# 密碼雜湊。
+#
+# scrypt / pbkdf2 是刻意設計成很耗 CPU 的運算，原本直接在請求中執行，登入尖峰時每個 worker 都被佔滿。
+# 這裡改交給一個大小固定的執行緒池：hashlib 的 scrypt / pbkdf2_hmac 執行時會釋放 GIL，
+# 所以能真正平行使用多核心，而池的大小 (PASSWORD_HASH_WORKERS) 限制了同時進行的雜湊數量，
+# 排隊超過 PASSWORD_HASH_MAX_PENDING 個時直接回報忙碌，不讓請求無限堆積。
+#
+# 演算法與成本由 PASSWORD_HASH_METHOD 設定 (werkzeug 的格式，例如 scrypt:32768:8:1、pbkdf2:sha256:600000)。
+# 設定改變後，使用者下次登入時會以新參數重新雜湊。
+import concurrent.futures
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 64))
+PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+
+def _create_executor():
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            # gevent worker 下標準的執行緒已被換成協程，改用 gevent 提供的原生執行緒池
+            from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+            return GeventThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+    except ImportError:
+        pass
+    return ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+
+def _get_executor():
+    global _executor, _executor_pid
+    # gunicorn fork 之後，父行程的執行緒不會帶到子行程，每個 worker 各自建立
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = _create_executor()
+                _executor_pid = os.getpid()
+    return _executor
+
+def _run(func, *args):
+    if PASSWORD_HASH_WORKERS <= 0:
+        return func(*args) # 設為 0 則在請求中直接計算
+    if not _pending.acquire(blocking=False):
+        raise PasswordHasherBusy()
+    try:
+        future = _get_executor().submit(func, *args)
+    except BaseException:
+        _pending.release()
+        raise
+    # 名額在工作結束 (或被取消) 時才釋放：請求逾時放棄等待後，已開始的雜湊仍佔用執行緒池
+    future.add_done_callback(lambda _: _pending.release())
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        future.cancel() # 還在排隊的工作不必再計算
+        raise PasswordHasherBusy()
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+def verify_password(pwhash, password):
+    return _run(check_password_hash, pwhash, password)
+
+@lru_cache(maxsize=None)
+def method_prefix(method):
+    # 完整的參數字串 (例如 'scrypt' -> 'scrypt:32768:8:1')，用來判斷既有的雜湊是否需要更新
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+def needs_rehash(pwhash):
+    return pwhash.split('$', 1)[0] != method_prefix(PASSWORD_HASH_METHOD)
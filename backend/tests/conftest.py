@@ -0,0 +1,88 @@
+# backend/tests/conftest.py
+# 在 repo 根目錄執行 python -m pytest backend/tests；預設使用暫存的 SQLite 檔案。
+# 設定 TEST_POSTGRES_URL (例如 postgresql://localhost/accweb_test，需為已存在的資料庫) 時，
+# 使用 backend_apps 的測試 (兩種資料庫必須得到相同結果) 也會對 PostgreSQL 執行一次。
+import os
+import sys
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# 這些設定在 import app 時讀取，必須先設好
+os.environ['CACHE_URL'] = 'null' # 每個請求都實際查詢資料庫，查詢數與結果才有意義
+os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+os.environ.setdefault('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000') # 測試不需要耗時的雜湊
+
+import app as accweb # noqa: E402
+from sqlalchemy import event # noqa: E402
+
+PASSWORD = 'test-password'
+
+
+def make_app(database_url):
+    app = accweb.create_app({'SQLALCHEMY_DATABASE_URI': database_url, 'TESTING': True})
+    with app.app_context():
+        accweb.migrations.upgrade(accweb.db.engine, accweb.db.metadata, log=lambda *a: None)
+    return app
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    return make_app('sqlite:///' + str(tmp_path_factory.mktemp('db') / 'test.db'))
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def backend_apps(tmp_path_factory):
+    """{名稱: app}：SQLite 一定有，PostgreSQL 只在設定 TEST_POSTGRES_URL 時加入"""
+    apps = {'sqlite': make_app('sqlite:///' + str(tmp_path_factory.mktemp('db') / 'shared.db'))}
+    if os.getenv('TEST_POSTGRES_URL'):
+        apps['postgresql'] = make_app(os.environ['TEST_POSTGRES_URL'])
+    return apps
+
+
+def register(client, prefix='user'):
+    """註冊一位新使用者 (名稱不重複，資料庫可重複使用)，回傳 (user dict, Authorization 標頭)"""
+    response = client.post('/api/register', json={'username': f'{prefix}-{uuid.uuid4().hex[:12]}',
+                                                   'password': PASSWORD})
+    assert response.status_code == 201, response.get_json()
+    data = response.get_json()
+    return data['user'], {'Authorization': f"Bearer {data['access_token']}"}
+
+
+def login(client, username):
+    response = client.post('/api/login', json={'username': username, 'password': PASSWORD})
+    assert response.status_code == 200, response.get_json()
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+@pytest.fixture
+def count_queries(app):
+    """count_queries(client.get, url, ...) 回傳 (response, 該請求執行的 SQL 數)"""
+    with app.app_context():
+        engine = accweb.db.engine
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+
+    def run(method, *args, **kwargs):
+        counter.count = 0
+        response = method(*args, **kwargs)
+        return response, counter.count
+
+    yield run
+    event.remove(engine, 'before_cursor_execute', counter)
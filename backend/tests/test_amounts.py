@@ -0,0 +1,70 @@
+# backend/tests/test_amounts.py
+# 金額以 Numeric + Decimal 計算：0.1 + 0.2 在所有統計中都必須剛好是 0.3 (不是 0.30000000000000004)，
+# 輸入依幣別的小數位數四捨五入，不合法的金額回 400。
+import pytest
+
+from conftest import login, register
+
+
+@pytest.fixture
+def owner(client):
+    user, headers = register(client, 'amounts')
+    categories = {c['type']: c['id'] for c in client.get('/api/categories', headers=headers).get_json()}
+    group = client.post('/api/groups', headers=headers, json={'name': 'amounts'}).get_json()['group']
+    return {'headers': login(client, user['username']), 'group_id': group['id'], 'categories': categories}
+
+
+def owner_paths(owner, kind):
+    prefix = '/api' if kind == 'personal' else f"/api/groups/{owner['group_id']}"
+    return f'{prefix}/transactions', f'{prefix}/summary', f'{prefix}/dashboard'
+
+
+@pytest.mark.parametrize('kind', ['personal', 'group'])
+def test_decimal_sums_round_trip(client, owner, kind):
+    transactions, summary, dashboard = owner_paths(owner, kind)
+    expense = owner['categories']['expense']
+    for amount in ('0.1', '0.2', 0.1, 0.2): # 字串與 JSON 數字都要精確
+        body = {'amount': amount, 'type': 'expense', 'category_id': expense, 'date': '2024-05-01'}
+        response = client.post(transactions, headers=owner['headers'], json=body)
+        assert response.status_code == 201, response.get_json()
+        assert response.get_json()['amount'] == float(amount)
+    body = {'amount': '0.6', 'type': 'income', 'category_id': owner['categories']['income'], 'date': '2024-05-02'}
+    assert client.post(transactions, headers=owner['headers'], json=body).status_code == 201
+
+    totals = client.get(summary, headers=owner['headers']).get_json()
+    assert totals == {'total_income': 0.6, 'total_expense': 0.6, 'balance': 0.0}
+    breakdown = client.get(f'{summary}/category_breakdown?type=expense', headers=owner['headers']).get_json()
+    assert [row['total_amount'] for row in breakdown] == [0.6]
+    trend = client.get(f'{summary}/trend?interval=day', headers=owner['headers']).get_json()
+    assert [(row['income'], row['expense'], row['balance']) for row in trend] == [(0, 0.6, -0.6), (0.6, 0, 0.6)]
+    assert client.get(dashboard, headers=owner['headers']).get_json()['summary'] == totals
+
+
+def test_three_way_split_balances(client, owner):
+    transactions, summary, _ = owner_paths(owner, 'personal')
+    expense = owner['categories']['expense']
+    for _ in range(3):
+        body = {'amount': '0.1', 'type': 'expense', 'category_id': expense, 'date': '2024-05-01'}
+        assert client.post(transactions, headers=owner['headers'], json=body).status_code == 201
+    body = {'amount': '0.3', 'type': 'income', 'category_id': owner['categories']['income'], 'date': '2024-05-01'}
+    assert client.post(transactions, headers=owner['headers'], json=body).status_code == 201
+    assert client.get(summary, headers=owner['headers']).get_json()['balance'] == 0
+
+
+@pytest.mark.parametrize('amount, stored', [
+    ('1.005', 1.01), # 四捨五入 (ROUND_HALF_UP)，不是二進位浮點的 1.00
+    ('2.675', 2.68),
+    ('0.015', 0.02),
+    (' 12.5 ', 12.5),
+])
+def test_amount_rounding(client, owner, amount, stored):
+    body = {'amount': amount, 'type': 'expense', 'category_id': owner['categories']['expense'], 'date': '2024-05-01'}
+    response = client.post('/api/transactions', headers=owner['headers'], json=body)
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['amount'] == stored
+
+
+@pytest.mark.parametrize('amount', ['abc', 'NaN', 'Infinity', '1e400', '1000000000000', True, [1]])
+def test_invalid_amounts(client, owner, amount):
+    body = {'amount': amount, 'type': 'expense', 'category_id': owner['categories']['expense'], 'date': '2024-05-01'}
+    assert client.post('/api/transactions', headers=owner['headers'], json=body).status_code == 400
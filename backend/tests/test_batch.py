@@ -0,0 +1,138 @@
+# backend/tests/test_batch.py
+# POST /api/batch：每個子請求的結果與單獨呼叫相同；整個批次只驗證一次 JWT，
+# 並共用同一個 DB session 與連線。
+import flask_jwt_extended.view_decorators
+import pytest
+from sqlalchemy import event
+
+import app as accweb
+from conftest import login, register
+
+
+@pytest.fixture(scope='module')
+def owner(app):
+    client = app.test_client()
+    user, headers = register(client, 'batch')
+    category = client.get('/api/categories', headers=headers).get_json()[0]
+    group = client.post('/api/groups', headers=headers, json={'name': 'batch'}).get_json()['group']
+    headers = login(client, user['username'])
+    body = {'amount': '12.5', 'type': category['type'], 'category_id': category['id'], 'date': '2024-05-01'}
+    for path in ('/api/transactions', f"/api/groups/{group['id']}/transactions"):
+        assert client.post(path, headers=headers, json=body).status_code == 201
+    return {'headers': headers, 'group_id': group['id']}
+
+
+def batch(client, headers, items):
+    response = client.post('/api/batch', headers=headers, json={'requests': items})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['responses']
+
+
+def test_mixed_success_and_not_found(client, owner):
+    paths = [
+        '/api/summary',
+        '/api/transactions/999999999',
+        f"/api/groups/{owner['group_id']}/summary",
+        f"/api/groups/{owner['group_id']}/transactions?per_page=5",
+        '/api/groups/999999999',
+        '/api/user',
+    ]
+    responses = batch(client, owner['headers'], [{'id': f'r{i}', 'path': path} for i, path in enumerate(paths)])
+    assert [r['id'] for r in responses] == [f'r{i}' for i in range(len(paths))]
+    for path, item in zip(paths, responses):
+        direct = client.get(path, headers=owner['headers'])
+        assert item['status'] == direct.status_code, path
+        assert item['body'] == direct.get_json(), path
+        if direct.status_code == 200:
+            assert item['headers']['ETag'] == direct.headers['ETag'], path
+    assert [r['status'] for r in responses] == [200, 404, 200, 200, 404, 200]
+
+
+def test_if_none_match_per_item(client, owner):
+    etag = client.get('/api/summary', headers=owner['headers']).headers['ETag']
+    responses = batch(client, owner['headers'], [
+        {'path': '/api/summary', 'headers': {'If-None-Match': etag}},
+        {'path': '/api/summary'},
+    ])
+    assert [r['status'] for r in responses] == [304, 200]
+
+
+@pytest.mark.parametrize('item, status', [
+    ({'path': '/api/batch'}, 400),
+    ({'path': '/api/batch/'}, 400),
+    ({'path': '/api/batch?x=1'}, 400),
+    ({'method': 'POST', 'path': '/api/transactions'}, 405),
+    ({'method': 'delete', 'path': '/api/transactions/1'}, 405),
+    ({'path': 'http://example.com/api/summary'}, 400),
+    ({'path': '/static/index.html'}, 400),
+    ({}, 400),
+    ('/api/summary', 400),
+    ({'path': '/api/transactions/export'}, 400), # 串流回應無法合併
+])
+def test_rejected_items(client, owner, item, status):
+    responses = batch(client, owner['headers'], [item, {'path': '/api/summary'}])
+    assert responses[0]['status'] == status
+    assert 'error' in responses[0]['body']
+    assert responses[1]['status'] == 200 # 其他子請求不受影響
+
+
+def test_request_limit(client, owner):
+    items = [{'path': '/api/summary'}] * accweb.BATCH_MAX_REQUESTS
+    assert len(batch(client, owner['headers'], items)) == accweb.BATCH_MAX_REQUESTS
+    response = client.post('/api/batch', headers=owner['headers'], json={'requests': items + [{'path': '/api/summary'}]})
+    assert response.status_code == 400
+    for body in ({'requests': []}, {'requests': 'x'}, None):
+        assert client.post('/api/batch', headers=owner['headers'], json=body).status_code == 400
+
+
+def test_requires_authentication(client):
+    response = client.post('/api/batch', json={'requests': [{'path': '/api/summary'}]})
+    assert response.status_code == 401
+    # 子請求不會轉送 Authorization，只能靠外層請求驗證過的 JWT
+    response = client.post('/api/batch', headers={'Authorization': 'Bearer invalid'},
+                           json={'requests': [{'path': '/api/summary'}]})
+    assert response.status_code == 422
+
+
+def test_one_jwt_decode_session_and_connection(app, client, owner, count_queries, monkeypatch):
+    decoded, checkouts, sessions = [], [], set()
+    decode_token = flask_jwt_extended.view_decorators.decode_token
+
+    def counting_decode_token(*args, **kwargs):
+        decoded.append(1)
+        return decode_token(*args, **kwargs)
+
+    def record_checkout(*args):
+        checkouts.append(1)
+
+    def record_session(session, transaction, connection):
+        sessions.add(id(session))
+
+    monkeypatch.setattr(flask_jwt_extended.view_decorators, 'decode_token', counting_decode_token)
+    with app.app_context():
+        engine = accweb.db.engine
+    event.listen(engine, 'checkout', record_checkout)
+    event.listen(accweb.db.session, 'after_begin', record_session)
+
+    paths = ['/api/summary', '/api/summary/category_breakdown', f"/api/groups/{owner['group_id']}/summary",
+             f"/api/groups/{owner['group_id']}/summary/category_breakdown", '/api/transactions?per_page=5']
+    try:
+        direct = 0
+        for path in paths:
+            _, queries = count_queries(client.get, path, headers=owner['headers'])
+            direct += queries
+        decoded.clear()
+        checkouts.clear()
+        sessions.clear()
+        response, queries = count_queries(client.post, '/api/batch', headers=owner['headers'],
+                                          json={'requests': [{'path': path} for path in paths]})
+    finally:
+        event.remove(engine, 'checkout', record_checkout)
+        event.remove(accweb.db.session, 'after_begin', record_session)
+
+    assert [r['status'] for r in response.get_json()['responses']] == [200] * len(paths)
+    assert len(decoded) == 1
+    assert len(checkouts) == 1
+    assert len(sessions) == 1
+    # 版本號等同一請求內只查一次，批次的查詢數比逐一呼叫少
+    assert queries < direct
@@ -0,0 +1,34 @@
+# backend/tests/test_cache_versions.py
+# 使用者資料變更時只讓真正受影響的回應 (ETag / 回應快取) 失效。
+from conftest import PASSWORD, login, register
+
+
+def etags(client, headers, group_id):
+    return {path: client.get(path, headers=headers).headers['ETag']
+            for path in ('/api/user', f'/api/groups/{group_id}', f'/api/groups/{group_id}/transactions')}
+
+
+def test_password_change_keeps_group_etags(client):
+    user, headers = register(client, 'versions')
+    group = client.post('/api/groups', headers=headers, json={'name': 'versions'}).get_json()['group']
+    headers = login(client, user['username'])
+    before = etags(client, headers, group['id'])
+
+    response = client.put('/api/user/password', headers=headers,
+                          json={'old_password': PASSWORD, 'new_password': 'another-password'})
+    assert response.status_code == 200
+    assert etags(client, headers, group['id']) == before
+
+
+def test_username_change_invalidates_group_etags(client):
+    user, headers = register(client, 'versions')
+    group = client.post('/api/groups', headers=headers, json={'name': 'versions'}).get_json()['group']
+    headers = login(client, user['username'])
+    before = etags(client, headers, group['id'])
+
+    response = client.put('/api/user/username', headers=headers, json={'new_username': user['username'] + '-renamed'})
+    assert response.status_code == 200
+    after = etags(client, headers, group['id'])
+    assert all(after[path] != before[path] for path in before)
+    members = client.get(f"/api/groups/{group['id']}", headers=headers).get_json()['members']
+    assert [m['username'] for m in members] == [user['username'] + '-renamed']
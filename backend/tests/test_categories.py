@@ -0,0 +1,132 @@
+# backend/tests/test_categories.py
+# 預設類別由所有使用者共用 (copy-on-write)：修改或刪除時只建立自己的複本 / 遮蔽列，
+# 其他使用者看到的類別與統計不受影響，自己的交易與統計改用複本且總計不變。
+import pytest
+
+from conftest import login, register
+
+
+def categories_by_name(client, headers):
+    return {c['name']: c for c in client.get('/api/categories', headers=headers).get_json()}
+
+
+@pytest.fixture
+def users(client):
+    return {name: register(client, name)[1] for name in ('alice', 'bob')}
+
+
+def add_transactions(client, headers, category, amounts, path='/api/transactions'):
+    for amount in amounts:
+        body = {'amount': amount, 'type': category['type'], 'category_id': category['id'], 'date': '2024-05-01'}
+        assert client.post(path, headers=headers, json=body).status_code == 201
+
+
+def test_defaults_are_shared(client, users):
+    alice, bob = categories_by_name(client, users['alice']), categories_by_name(client, users['bob'])
+    assert alice == bob # 同一組共用的預設類別 (相同的 ID)
+    assert {c['user_id'] for c in alice.values()} == {None}
+
+
+def test_rename_creates_private_copy(client, users):
+    food = categories_by_name(client, users['alice'])['餐飲']
+    add_transactions(client, users['alice'], food, ['10.5', '4.5'])
+    add_transactions(client, users['bob'], food, ['7'])
+    bob_etag = client.get('/api/categories', headers=users['bob']).headers['ETag']
+
+    response = client.put(f"/api/categories/{food['id']}", headers=users['alice'], json={'name': '外食'})
+    assert response.status_code == 200, response.get_json()
+    copy = response.get_json()
+    assert copy['id'] != food['id'] and copy['name'] == '外食' and copy['type'] == 'expense'
+
+    alice = categories_by_name(client, users['alice'])
+    assert '餐飲' not in alice and alice['外食']['id'] == copy['id']
+    # bob 的類別、交易與快取都不受影響
+    assert client.get('/api/categories', headers=dict(users['bob'], **{'If-None-Match': bob_etag})).status_code == 304
+    assert categories_by_name(client, users['bob'])['餐飲'] == food
+
+    # alice 的交易改指向複本，總計不變；類別分佈顯示新名稱
+    transactions = client.get('/api/transactions', headers=users['alice']).get_json()['transactions']
+    assert {(t['category_id'], t['category_name']) for t in transactions} == {(copy['id'], '外食')}
+    assert client.get('/api/summary', headers=users['alice']).get_json()['total_expense'] == 15
+    breakdown = client.get('/api/summary/category_breakdown', headers=users['alice']).get_json()
+    assert [(row['category_name'], row['total_amount']) for row in breakdown] == [('外食', 15)]
+    dashboard = client.get('/api/dashboard', headers=users['alice']).get_json()
+    assert [(row['category_name'], row['total_amount']) for row in dashboard['category_breakdown']['expense']] == \
+        [('外食', 15)]
+    assert client.get(f"/api/transactions?category_id={copy['id']}", headers=users['alice']).get_json()['total'] == 2
+
+    breakdown = client.get('/api/summary/category_breakdown', headers=users['bob']).get_json()
+    assert [(row['category_name'], row['total_amount']) for row in breakdown] == [('餐飲', 7)]
+
+    # 共用的預設類別 ID 對 alice 不再可用；複本再改名時直接修改，不會再建立複本
+    body = {'amount': 1, 'type': 'expense', 'category_id': food['id'], 'date': '2024-05-01'}
+    assert client.post('/api/transactions', headers=users['alice'], json=body).status_code == 404
+    response = client.put(f"/api/categories/{copy['id']}", headers=users['alice'], json={'name': '外食費'})
+    assert response.get_json()['id'] == copy['id']
+
+
+def test_unchanged_update_keeps_the_default(client, users):
+    food = categories_by_name(client, users['alice'])['餐飲']
+    etag = client.get('/api/categories', headers=users['alice']).headers['ETag']
+    for body in ({}, {'name': '餐飲'}, {'name': '餐飲', 'type': 'expense'}):
+        response = client.put(f"/api/categories/{food['id']}", headers=users['alice'], json=body)
+        assert response.status_code == 200
+        assert response.get_json() == food
+    assert categories_by_name(client, users['alice'])['餐飲'] == food
+    assert client.get('/api/categories', headers=dict(users['alice'], **{'If-None-Match': etag})).status_code == 304
+
+
+def test_delete_default_hides_it_for_one_user(client, users):
+    fun = categories_by_name(client, users['alice'])['娛樂']
+    response = client.delete(f"/api/categories/{fun['id']}", headers=users['alice'])
+    assert response.status_code == 204
+
+    assert '娛樂' not in categories_by_name(client, users['alice'])
+    assert categories_by_name(client, users['bob'])['娛樂'] == fun
+    add_transactions(client, users['bob'], fun, ['3'])
+    body = {'amount': 1, 'type': 'expense', 'category_id': fun['id'], 'date': '2024-05-01'}
+    assert client.post('/api/transactions', headers=users['alice'], json=body).status_code == 404
+    assert client.delete(f"/api/categories/{fun['id']}", headers=users['alice']).status_code == 404
+
+    # 刪除後可以再建立同名的個人類別
+    response = client.post('/api/categories', headers=users['alice'], json={'name': '娛樂', 'type': 'expense'})
+    assert response.status_code == 201
+    assert response.get_json()['id'] != fun['id']
+
+
+def test_delete_default_with_transactions_is_rejected(client, users):
+    rent = categories_by_name(client, users['alice'])['房租']
+    add_transactions(client, users['alice'], rent, ['100'])
+    assert client.delete(f"/api/categories/{rent['id']}", headers=users['alice']).status_code == 400
+    assert '房租' in categories_by_name(client, users['alice'])
+
+
+def test_group_statistics_merge_member_copies(client, users):
+    headers = users['alice']
+    group = client.post('/api/groups', headers=headers, json={'name': 'categories'}).get_json()['group']
+    user = client.get('/api/user', headers=headers).get_json()
+    headers = login(client, user['username']) # 取得含新群組的成員 claims
+    path = f"/api/groups/{group['id']}"
+    food = categories_by_name(client, headers)['餐飲']
+    add_transactions(client, headers, food, ['10'], path=f'{path}/transactions')
+
+    # 改名後以複本記錄群組交易：群組統計仍歸在共用的「餐飲」，不會拆成兩列
+    copy = client.put(f"/api/categories/{food['id']}", headers=headers, json={'name': '外食'}).get_json()
+    add_transactions(client, headers, copy, ['5.5'], path=f'{path}/transactions')
+    breakdown = client.get(f'{path}/summary/category_breakdown', headers=headers).get_json()
+    assert [(row['category_name'], row['type'], row['total_amount']) for row in breakdown] == [('餐飲', 'expense', 15.5)]
+    dashboard = client.get(f'{path}/dashboard', headers=headers).get_json()
+    assert [(row['category_name'], row['total_amount']) for row in dashboard['category_breakdown']['expense']] == \
+        [('餐飲', 15.5)]
+    assert client.get(f'{path}/summary', headers=headers).get_json()['total_expense'] == 15.5
+
+    # 群組交易明細顯示記錄時所選的類別；複本不會搬動群組交易
+    transactions = client.get(f'{path}/transactions', headers=headers).get_json()['transactions']
+    assert sorted((t['category_id'], t['category_name']) for t in transactions) == \
+        sorted([(food['id'], '餐飲'), (copy['id'], '外食')])
+
+    # 成員自己的個人類別 (不是預設類別的複本) 在群組中照原名稱列出
+    own = client.post('/api/categories', headers=headers, json={'name': '寵物', 'type': 'expense'}).get_json()
+    add_transactions(client, headers, own, ['2'], path=f'{path}/transactions')
+    breakdown = client.get(f'{path}/summary/category_breakdown', headers=headers).get_json()
+    assert sorted((row['category_name'], row['total_amount']) for row in breakdown) == [('寵物', 2), ('餐飲', 15.5)]
@@ -0,0 +1,96 @@
+# backend/tests/test_export.py
+# 串流匯出：CSV (含 BOM，讓 Excel 以 UTF-8 開啟) 與 NDJSON，跨越多個 EXPORT_BATCH_SIZE 分批時
+# 筆數、標頭、排序與內容都必須完整，不因分批而重複或遺漏。
+import csv
+import io
+import json
+
+import pytest
+
+import app as accweb
+from conftest import login, register
+
+ROWS = accweb.EXPORT_BATCH_SIZE * 2 + 17 # 跨越兩個分批邊界
+PERSONAL_HEADER = ['id', 'date', 'type', 'amount', 'category_id', 'category_name', 'description', 'created_at']
+GROUP_HEADER = PERSONAL_HEADER + ['created_by_user_id', 'created_by_username']
+# 需要跳脫的內容：逗號、雙引號、換行與中文
+TRICKY_DESCRIPTION = '午餐, "便當"\n第二行'
+
+
+@pytest.fixture(scope='module')
+def owner(app):
+    client = app.test_client()
+    user, headers = register(client, 'export')
+    categories = client.get('/api/categories', headers=headers).get_json()
+    group = client.post('/api/groups', headers=headers, json={'name': 'export'}).get_json()['group']
+    headers = login(client, user['username'])
+    rows = [{'amount': f'{i}.25', 'type': categories[i % 2]['type'], 'category_id': categories[i % 2]['id'],
+             'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}',
+             'description': TRICKY_DESCRIPTION if i == 3 else f'row {i}'} for i in range(ROWS)]
+    for path in ('/api/transactions/batch', f"/api/groups/{group['id']}/transactions/batch"):
+        response = client.post(path, headers=headers, json=rows)
+        assert response.status_code == 201, response.get_json()
+    return {'user': user, 'headers': headers, 'group_id': group['id']}
+
+
+def export_path(owner, kind):
+    if kind == 'personal':
+        return '/api/transactions/export', PERSONAL_HEADER
+    return f"/api/groups/{owner['group_id']}/transactions/export", GROUP_HEADER
+
+
+def sort_key(row):
+    return (row['date'], row['created_at'], int(row['id']))
+
+
+@pytest.mark.parametrize('kind', ['personal', 'group'])
+def test_csv_export(client, owner, kind):
+    path, header = export_path(owner, kind)
+    response = client.get(path, headers=owner['headers'])
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'].endswith('.csv')
+    body = response.get_data(as_text=True)
+    assert body.startswith('\ufeff') and not body.startswith('\ufeff\ufeff')
+
+    reader = csv.reader(io.StringIO(body[1:]))
+    assert next(reader) == header
+    rows = [dict(zip(header, values)) for values in reader]
+    assert len(rows) == ROWS
+    assert len({row['id'] for row in rows}) == ROWS
+    assert rows == sorted(rows, key=sort_key, reverse=True)
+    assert [row['description'] for row in rows].count(TRICKY_DESCRIPTION) == 1
+    if kind == 'group':
+        assert {row['created_by_username'] for row in rows} == {owner['user']['username']}
+
+
+@pytest.mark.parametrize('kind', ['personal', 'group'])
+def test_ndjson_export(client, owner, kind):
+    path, header = export_path(owner, kind)
+    response = client.get(f'{path}?format=ndjson', headers=owner['headers'])
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    rows = [json.loads(line) for line in lines]
+    assert len(rows) == ROWS
+    assert all(list(row) == header for row in rows)
+    assert len({row['id'] for row in rows}) == ROWS
+    assert rows == sorted(rows, key=sort_key, reverse=True)
+    assert sum(row['amount'] for row in rows) == pytest.approx(sum(i + 0.25 for i in range(ROWS)))
+    assert [row['description'] for row in rows].count(TRICKY_DESCRIPTION) == 1
+
+
+def test_export_filters_and_format_validation(client, owner):
+    path = '/api/transactions/export?format=ndjson&start_date=2024-03-01&end_date=2024-03-31'
+    rows = [json.loads(line) for line in client.get(path, headers=owner['headers']).get_data(as_text=True).splitlines()]
+    assert rows and all(row['date'].startswith('2024-03') for row in rows)
+    assert len(rows) == sum(1 for i in range(ROWS) if i % 12 == 2)
+
+    response = client.get('/api/transactions/export?format=xlsx', headers=owner['headers'])
+    assert response.status_code == 400
+
+
+def test_export_requires_membership(client, owner):
+    _, headers = register(client, 'export-outsider')
+    response = client.get(f"/api/groups/{owner['group_id']}/transactions/export", headers=headers)
+    assert response.status_code == 404 # 不透露群組是否存在
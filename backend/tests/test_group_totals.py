@@ -0,0 +1,74 @@
+# backend/tests/test_group_totals.py
+# GET /api/groups?include_totals=true 在同一個查詢中附上各群組的收支總計：
+# 每個群組的數字都必須與 /api/groups/<id>/summary 相同，且交易新增、修改、刪除後立即反映。
+from conftest import login, register
+
+
+def transaction_body(categories, kind, amount, day):
+    return {'amount': amount, 'type': kind, 'category_id': categories[kind], 'date': day}
+
+
+def assert_totals_match_summaries(client, headers):
+    groups = client.get('/api/groups?include_totals=true', headers=headers).get_json()
+    assert groups
+    for group in groups:
+        summary = client.get(f"/api/groups/{group['id']}/summary", headers=headers).get_json()
+        assert {
+            'total_income': group['summary']['income'],
+            'total_expense': group['summary']['expense'],
+            'balance': group['summary']['balance'],
+        } == summary, group['name']
+        transactions = client.get(f"/api/groups/{group['id']}/transactions?per_page=100",
+                                  headers=headers).get_json()['transactions']
+        assert group['summary']['last_transaction_date'] == max((t['date'] for t in transactions), default=None)
+        members = client.get(f"/api/groups/{group['id']}", headers=headers).get_json()['members']
+        assert group['member_count'] == len(members), group['name']
+    # 沒有 include_totals 時不附上總計
+    assert all('summary' not in group for group in client.get('/api/groups', headers=headers).get_json())
+    return {group['name']: group['summary'] for group in groups}
+
+
+def test_include_totals_matches_group_summary(client):
+    user, headers = register(client, 'totals')
+    other, other_headers = register(client, 'totals-other')
+    categories = {c['type']: c['id'] for c in client.get('/api/categories', headers=headers).get_json()}
+    busy = client.post('/api/groups', headers=headers, json={'name': 'busy'}).get_json()['group']
+    client.post('/api/groups', headers=headers, json={'name': 'empty'})
+    # 別人建立、自己是一般成員的群組，交易由兩人分別記錄
+    shared = client.post('/api/groups', headers=other_headers, json={'name': 'shared'}).get_json()['group']
+    assert client.post(f"/api/groups/{shared['id']}/invite", headers=other_headers,
+                       json={'username': user['username']}).status_code == 201
+    invitation = client.get('/api/invitations', headers=headers).get_json()[0]
+    assert client.post(f"/api/invitations/{invitation['id']}/accept", headers=headers).status_code == 200
+    # 另一個群組中只有待處理的邀請：不列出，也不計入成員數
+    pending = client.post('/api/groups', headers=other_headers, json={'name': 'pending'}).get_json()['group']
+    assert client.post(f"/api/groups/{pending['id']}/invite", headers=other_headers,
+                       json={'username': user['username']}).status_code == 201
+    headers, other_headers = login(client, user['username']), login(client, other['username'])
+
+    for path, member_headers, rows in (
+        (f"/api/groups/{busy['id']}/transactions", headers,
+         [('income', '1000', '2024-01-05'), ('expense', '0.1', '2024-01-06'), ('expense', '0.2', '2024-03-01')]),
+        (f"/api/groups/{shared['id']}/transactions", other_headers,
+         [('expense', '50.25', '2023-12-31'), ('income', '20', '2024-02-29')]),
+        (f"/api/groups/{shared['id']}/transactions", headers, [('expense', '9.75', '2024-02-01')]),
+    ):
+        for kind, amount, day in rows:
+            response = client.post(path, headers=member_headers, json=transaction_body(categories, kind, amount, day))
+            assert response.status_code == 201, response.get_json()
+
+    totals = assert_totals_match_summaries(client, headers)
+    assert set(totals) == {'busy', 'empty', 'shared'}
+    assert totals['busy'] == {'income': 1000, 'expense': 0.3, 'balance': 999.7, 'last_transaction_date': '2024-03-01'}
+    assert totals['empty'] == {'income': 0, 'expense': 0, 'balance': 0, 'last_transaction_date': None}
+    assert totals['shared'] == {'income': 20, 'expense': 60, 'balance': -40, 'last_transaction_date': '2024-02-29'}
+
+    # 修改與刪除後，總計與最後交易日期跟著改變
+    path = f"/api/groups/{busy['id']}/transactions"
+    latest = client.get(f'{path}?per_page=1', headers=headers).get_json()['transactions'][0]
+    assert client.put(f"{path}/{latest['id']}", headers=headers, json={'amount': '5'}).status_code == 200
+    assert assert_totals_match_summaries(client, headers)['busy']['expense'] == 5.1
+    assert client.delete(f"{path}/{latest['id']}", headers=headers).status_code in (200, 204)
+    assert assert_totals_match_summaries(client, headers)['busy'] == {
+        'income': 1000, 'expense': 0.1, 'balance': 999.9, 'last_transaction_date': '2024-01-06',
+    }
@@ -0,0 +1,101 @@
+# backend/tests/test_import.py
+# 批次匯入 (JSON 陣列 / NDJSON)：不合法的列逐筆回報錯誤、其餘照常寫入；
+# 彙總表與資料版本在同一交易中更新，統計正確且先前的 ETag 不再回 304。
+import json
+
+import pytest
+
+from conftest import login, register
+
+
+@pytest.fixture
+def owner(client):
+    user, headers = register(client, 'import')
+    categories = {c['type']: c['id'] for c in client.get('/api/categories', headers=headers).get_json()}
+    group = client.post('/api/groups', headers=headers, json={'name': 'import'}).get_json()['group']
+    _, other_headers = register(client, 'import-other')
+    # 預設類別是共用的，必須用其他使用者自訂的類別
+    other_category = client.post('/api/categories', headers=other_headers,
+                                 json={'name': 'private', 'type': 'expense'}).get_json()['id']
+    return {'headers': login(client, user['username']), 'group_id': group['id'],
+            'categories': categories, 'other_category': other_category}
+
+
+def import_rows(owner, kind):
+    # 個人交易只能用自己的類別；群組交易共用類別，只檢查類別是否存在
+    bad_category = owner['other_category'] if kind == 'personal' else 10 ** 9
+    income, expense = owner['categories']['income'], owner['categories']['expense']
+    return [
+        {'amount': '100.10', 'type': 'income', 'category_id': income, 'date': '2024-01-05'},
+        {'amount': 'abc', 'type': 'income', 'category_id': income, 'date': '2024-01-05'},
+        {'amount': '25.05', 'type': 'expense', 'category_id': expense, 'date': '2024-01-06', 'description': 'ok'},
+        {'amount': '5', 'type': 'expense', 'category_id': bad_category, 'date': '2024-01-06'},
+        {'amount': '5', 'type': 'transfer', 'category_id': expense, 'date': '2024-01-06'},
+        {'amount': '5', 'type': 'expense', 'category_id': expense},
+        {'amount': '0.20', 'type': 'expense', 'category_id': expense, 'date': '2024-01-07'},
+    ]
+
+
+EXPECTED_ERRORS = [
+    {'index': 1, 'error': 'Invalid amount or date format'},
+    {'index': 3, 'error': 'Category not found or not owned by user'},
+    {'index': 4, 'error': 'Invalid transaction type'},
+    {'index': 5, 'error': 'Missing required fields (amount, type, category_id, date)'},
+]
+
+
+def summary_paths(owner, kind):
+    if kind == 'personal':
+        return '/api/transactions/batch', '/api/summary'
+    return (f"/api/groups/{owner['group_id']}/transactions/batch",
+            f"/api/groups/{owner['group_id']}/summary")
+
+
+@pytest.mark.parametrize('kind', ['personal', 'group'])
+@pytest.mark.parametrize('encoding', ['json', 'wrapped', 'ndjson'])
+def test_import_reports_bad_rows_and_updates_summary(client, owner, kind, encoding):
+    batch_path, summary_path = summary_paths(owner, kind)
+    headers = owner['headers']
+    before = client.get(summary_path, headers=headers)
+    etag = before.headers['ETag']
+    assert before.get_json() == {'total_income': 0, 'total_expense': 0, 'balance': 0}
+    assert client.get(summary_path, headers=dict(headers, **{'If-None-Match': etag})).status_code == 304
+
+    rows = import_rows(owner, kind)
+    errors = list(EXPECTED_ERRORS)
+    if encoding == 'json':
+        response = client.post(batch_path, headers=headers, json=rows)
+    elif encoding == 'wrapped':
+        response = client.post(batch_path, headers=headers, json={'transactions': rows})
+    else:
+        lines = [json.dumps(row) for row in rows]
+        lines.insert(2, '')  # 空行略過，不佔 index
+        lines.append('{not json')
+        lines.append('[1, 2]')
+        response = client.post(batch_path, headers=dict(headers, **{'Content-Type': 'application/x-ndjson'}),
+                               data='\n'.join(lines) + '\n')
+        errors += [{'index': 7, 'error': 'Invalid JSON object'}, {'index': 8, 'error': 'Invalid JSON object'}]
+
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json() == {'inserted': 3, 'failed': len(errors), 'errors': errors}
+
+    # 先前的 ETag 不能再得到 304，統計包含剛匯入的資料
+    after = client.get(summary_path, headers=dict(headers, **{'If-None-Match': etag}))
+    assert after.status_code == 200
+    assert after.headers['ETag'] != etag
+    assert after.get_json() == {'total_income': 100.1, 'total_expense': 25.25, 'balance': 74.85}
+
+
+def test_import_without_valid_rows_changes_nothing(client, owner):
+    etag = client.get('/api/summary', headers=owner['headers']).headers['ETag']
+    response = client.post('/api/transactions/batch', headers=owner['headers'], json=[{'amount': 'abc'}])
+    assert response.status_code == 400
+    assert response.get_json()['inserted'] == 0
+    assert client.get('/api/summary', headers=dict(owner['headers'], **{'If-None-Match': etag})).status_code == 304
+
+
+@pytest.mark.parametrize('body', [{'rows': []}, 'not json', 42])
+def test_import_rejects_non_list_payload(client, owner, body):
+    response = client.post('/api/transactions/batch', headers=owner['headers'], json=body)
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
@@ -0,0 +1,100 @@
+# backend/tests/test_list_fields.py
+# 交易列表的 fields= (只回傳指定欄位) 與 format=compact (欄位名稱只出現一次，每筆是一個陣列)：
+# 內容必須與完整的 to_dict() 輸出一致，分頁與篩選照常運作，未知的欄位回 400。
+import pytest
+
+from conftest import login, register
+
+PAGINATIONS = ['', '&cursor=']
+# format=compact 沒有指定 fields 時的欄位順序 (與 to_dict() 相同)
+COMPACT_FIELDS = {
+    'personal': ['id', 'amount', 'type', 'description', 'date', 'created_at', 'category_id', 'category_name',
+                 'user_id'],
+    'group': ['id', 'group_id', 'amount', 'type', 'description', 'date', 'created_at', 'category_id',
+              'category_name', 'created_by_user_id', 'created_by_username'],
+}
+
+
+@pytest.fixture(scope='module')
+def owner(app):
+    client = app.test_client()
+    user, headers = register(client, 'fields')
+    categories = client.get('/api/categories', headers=headers).get_json()
+    group = client.post('/api/groups', headers=headers, json={'name': 'fields'}).get_json()['group']
+    headers = login(client, user['username'])
+    for i in range(7):
+        category = categories[i % len(categories)]
+        body = {'amount': f'{i + 1}.5', 'type': category['type'], 'category_id': category['id'],
+                'date': f'2024-05-{i % 3 + 1:02d}', 'description': None if i == 2 else f'item {i}'}
+        for path in ('/api/transactions', f"/api/groups/{group['id']}/transactions"):
+            assert client.post(path, headers=headers, json=body).status_code == 201
+    return {'headers': headers, 'group_id': group['id']}
+
+
+def list_path(owner, kind):
+    return '/api/transactions' if kind == 'personal' else f"/api/groups/{owner['group_id']}/transactions"
+
+
+def get_list(client, owner, kind, query, per_page=4):
+    response = client.get(f'{list_path(owner, kind)}?per_page={per_page}&{query}', headers=owner['headers'])
+    assert response.status_code == 200, (query, response.get_json())
+    return response.get_json()
+
+
+@pytest.mark.parametrize('pagination', PAGINATIONS)
+@pytest.mark.parametrize('kind', ['personal', 'group'])
+def test_field_projection(client, owner, kind, pagination):
+    full = get_list(client, owner, kind, pagination.lstrip('&'))
+    data = get_list(client, owner, kind, f'fields=category_name, amount,amount,description{pagination}')
+    # 重複的欄位只出現一次
+    assert [set(t) for t in data['transactions']] == [{'category_name', 'amount', 'description'}] * 4
+    assert data['transactions'] == [
+        {name: t[name] for name in ('category_name', 'amount', 'description')} for t in full['transactions']
+    ]
+    # 分頁資訊與完整輸出相同
+    assert {k: v for k, v in data.items() if k != 'transactions'} == \
+        {k: v for k, v in full.items() if k != 'transactions'}
+
+
+@pytest.mark.parametrize('pagination', PAGINATIONS)
+@pytest.mark.parametrize('kind', ['personal', 'group'])
+def test_compact_format(client, owner, kind, pagination):
+    full = get_list(client, owner, kind, pagination.lstrip('&'))
+    data = get_list(client, owner, kind, f'format=compact{pagination}')
+    assert 'transactions' not in data
+    # 沒有指定 fields 時包含 to_dict() 的所有欄位
+    assert data['fields'] == COMPACT_FIELDS[kind]
+    assert set(data['fields']) == set(full['transactions'][0])
+    assert [dict(zip(data['fields'], row)) for row in data['rows']] == full['transactions']
+    assert {k: v for k, v in data.items() if k not in ('fields', 'rows')} == \
+        {k: v for k, v in full.items() if k != 'transactions'}
+
+    # 指定 fields 時依參數的順序
+    data = get_list(client, owner, kind, f'format=compact&fields=amount,id{pagination}')
+    assert data['fields'] == ['amount', 'id']
+    assert data['rows'] == [[t['amount'], t['id']] for t in full['transactions']]
+
+
+def test_fields_follow_filters_and_pages(client, owner):
+    query = 'fields=id,date&start_date=2024-05-02&cursor='
+    first = get_list(client, owner, 'personal', query, per_page=3)
+    second = get_list(client, owner, 'personal', query + first['next_cursor'], per_page=3)
+    rows = first['transactions'] + second['transactions']
+    assert first['has_next'] and not second['has_next']
+    assert len(rows) == len({t['id'] for t in rows}) == 4
+    assert all(t['date'] >= '2024-05-02' for t in rows)
+
+
+@pytest.mark.parametrize('kind, query', [
+    ('personal', 'fields=amount,secret'),
+    ('personal', 'fields=password_hash'),
+    ('personal', 'fields=,'),
+    ('personal', 'fields=created_by_username'), # 只有群組交易有的欄位
+    ('group', 'fields=user_id'), # 只有個人交易有的欄位
+    ('group', 'format=compact&fields=amount,nope'),
+])
+def test_unknown_fields_are_rejected(client, owner, kind, query):
+    for pagination in PAGINATIONS:
+        response = client.get(f'{list_path(owner, kind)}?{query}{pagination}', headers=owner['headers'])
+        assert response.status_code == 400
+        assert response.get_json()['error'].startswith('Invalid fields')
@@ -0,0 +1,137 @@
+# backend/tests/test_memberships.py
+# 群組權限的快取 (membership_cache) 以資料庫中的成員版本號驗證：成員異動若發生在其他 worker
+# (本行程的快取沒有被清除)，下一個請求仍必須依資料庫中的最新狀態授權。
+# token 內的成員 claims 版本仍是最新時直接授權，不查詢 group_member；版本過期時退回資料庫並重新簽發。
+import re
+
+import pytest
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+
+import app as accweb
+import cache
+from conftest import login, register
+
+
+@pytest.fixture
+def process_cache(monkeypatch):
+    # 測試預設 CACHE_URL=null；這裡換成行程內的 LRU 快取，重現多個 worker 各自快取的情況
+    monkeypatch.setattr(accweb, 'membership_cache', cache.LRUCache(max_entries=100, ttl=300))
+    return accweb.membership_cache
+
+
+@pytest.fixture
+def group(client):
+    """admin 建立群組並邀請 member；回傳 member 接受邀請前後的兩個 token (前者的 claims 已過期)"""
+    admin, admin_headers = register(client, 'admin')
+    member, stale_headers = register(client, 'member')
+    group = client.post('/api/groups', headers=admin_headers, json={'name': 'memberships'}).get_json()['group']
+    admin_headers = login(client, admin['username'])
+    assert client.post(f"/api/groups/{group['id']}/invite", headers=admin_headers,
+                       json={'username': member['username']}).status_code == 201
+    invitation = client.get('/api/invitations', headers=stale_headers).get_json()[0]
+    assert client.post(f"/api/invitations/{invitation['id']}/accept", headers=stale_headers).status_code == 200
+    return {'id': group['id'], 'admin': admin_headers, 'member_id': member['id'],
+            'fresh': login(client, member['username']), 'stale': stale_headers}
+
+
+def on_other_worker(monkeypatch):
+    # 異動發生在另一個 worker：本行程的快取不會被 invalidate_memberships 清除
+    monkeypatch.setattr(accweb, 'invalidate_memberships', lambda group_id, user_ids: None)
+
+
+def test_revoked_member_is_rejected_despite_cached_role(client, monkeypatch, process_cache, group):
+    path = f"/api/groups/{group['id']}"
+    for headers in (group['fresh'], group['stale']):
+        assert client.get(path, headers=headers).status_code == 200
+    # stale token 的 claims 版本已過期，角色從資料庫讀出後放進快取
+    assert process_cache.get(accweb.membership_cache_key(group['id'], group['member_id'])) is not cache.MISSING
+
+    on_other_worker(monkeypatch)
+    response = client.delete(f"{path}/members/{group['member_id']}", headers=group['admin'])
+    assert response.status_code == 200, response.get_json()
+
+    for headers in (group['fresh'], group['stale']):
+        response = client.get(path, headers=headers)
+        assert response.status_code == 404
+        assert client.get(f'{path}/transactions', headers=headers).status_code == 404
+
+
+def test_role_change_on_other_worker_applies_immediately(client, monkeypatch, process_cache, group):
+    path = f"/api/groups/{group['id']}/members/{group['member_id']}/role"
+    # member 不是管理員：不能變更角色，結果 (member) 放進快取
+    assert client.put(path, headers=group['stale'], json={'role': 'admin'}).status_code == 403
+
+    on_other_worker(monkeypatch)
+    assert client.put(path, headers=group['admin'], json={'role': 'admin'}).status_code == 200
+
+    # 升級後不需要重新登入就能執行管理員操作，之後再被降級也立即生效
+    assert client.put(path, headers=group['stale'], json={'role': 'admin'}).status_code == 200
+    assert client.put(path, headers=group['admin'], json={'role': 'member'}).status_code == 200
+    assert client.put(path, headers=group['stale'], json={'role': 'admin'}).status_code == 403
+
+
+@pytest.fixture
+def statements(app):
+    """記錄請求執行的 SQL，用來確認是否查詢了 group_member"""
+    with app.app_context():
+        engine = accweb.db.engine
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    yield executed
+    event.remove(engine, 'before_cursor_execute', record)
+
+
+def queries_group_member(executed):
+    return any(re.search(r'\bgroup_member\b', statement) for statement in executed)
+
+
+def test_current_claims_authorize_without_member_query(client, group, statements):
+    for path in (f"/api/groups/{group['id']}/summary", f"/api/groups/{group['id']}/transactions"):
+        statements.clear()
+        response = client.get(path, headers=group['fresh'])
+        assert response.status_code == 200
+        assert not queries_group_member(statements), statements
+        assert 'X-Access-Token' not in response.headers
+
+    # claims 過期的 token 退回資料庫，並在回應中附上新的 token；新 token 不需再查詢成員
+    statements.clear()
+    response = client.get(f"/api/groups/{group['id']}/summary", headers=group['stale'])
+    assert response.status_code == 200
+    assert queries_group_member(statements)
+    reissued = {'Authorization': f"Bearer {response.headers['X-Access-Token']}"}
+    statements.clear()
+    assert client.get(f"/api/groups/{group['id']}/summary", headers=reissued).status_code == 200
+    assert not queries_group_member(statements)
+
+
+def test_removal_invalidates_claims(client, app, group):
+    path = f"/api/groups/{group['id']}/summary"
+    assert client.get(path, headers=group['fresh']).status_code == 200
+    response = client.delete(f"/api/groups/{group['id']}/members/{group['member_id']}", headers=group['admin'])
+    assert response.status_code == 200, response.get_json()
+
+    # token 仍宣稱是成員，但成員版本號已過期：依資料庫拒絕，並附上不含此群組的新 token
+    response = client.get(path, headers=group['fresh'])
+    assert response.status_code == 404
+    with app.app_context():
+        assert str(group['id']) not in decode_token(response.headers['X-Access-Token'])['groups']
+    reissued = {'Authorization': f"Bearer {response.headers['X-Access-Token']}"}
+    response = client.get(path, headers=reissued)
+    assert response.status_code == 404
+    assert 'X-Access-Token' not in response.headers
+
+
+def test_token_newer_than_database_is_not_reissued(client, app, group):
+    # 例如讀到落後的資料庫副本：不信任 claims，也不把 token 換成較舊的版本
+    with app.app_context():
+        claims = accweb.membership_claims(group['member_id'])
+        token = create_access_token(identity=str(group['member_id']),
+                                    additional_claims=dict(claims, mv=claims['mv'] + 1, groups={}))
+    response = client.get(f"/api/groups/{group['id']}/summary", headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200 # 依資料庫授權，不是依 token 內 (空的) groups
+    assert 'X-Access-Token' not in response.headers
@@ -0,0 +1,186 @@
+# backend/tests/test_migrations.py
+# 遷移 7 (共用預設類別)：以舊版的類別表與「註冊時複製預設類別」的資料升級，
+# 每位使用者看到的類別與統計必須不變，預設類別的複本合併到共用類別後刪除。
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import select, text
+
+import app as accweb
+from conftest import login, register
+from migrations import DEFAULT_CATEGORIES
+
+DEFAULTS = set(DEFAULT_CATEGORIES)
+# 遷移 7 之前的類別表：每位使用者都有自己的一份預設類別
+LEGACY_CATEGORY_TABLE = '''
+CREATE TABLE category (
+    id INTEGER NOT NULL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES "user" (id)
+)'''
+
+
+@pytest.fixture
+def legacy(tmp_path, monkeypatch):
+    app = accweb.create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'legacy.db'), 'TESTING': True})
+    with app.app_context():
+        engine, metadata = accweb.db.engine, accweb.db.metadata
+        with monkeypatch.context() as m:
+            m.setattr(accweb.migrations, 'MIGRATIONS', [mg for mg in accweb.migrations.MIGRATIONS if mg.version < 7])
+            accweb.migrations.upgrade(engine, metadata, log=lambda *a: None)
+        with engine.begin() as conn:
+            conn.execute(text('DROP TABLE category'))
+            conn.execute(text(LEGACY_CATEGORY_TABLE))
+            conn.execute(text('CREATE INDEX ix_category_user_name ON category (user_id, name)'))
+
+    client = app.test_client()
+    users = {name: register(client, name)[0] for name in ('alice', 'bob', 'carol', 'dave')}
+    headers = login(client, users['alice']['username'])
+    group = client.post('/api/groups', headers=headers, json={'name': 'legacy'}).get_json()['group']
+    assert client.post(f"/api/groups/{group['id']}/invite", headers=headers,
+                       json={'username': users['bob']['username']}).status_code == 201
+    bob_headers = login(client, users['bob']['username'])
+    invitation = client.get('/api/invitations', headers=bob_headers).get_json()[0]
+    assert client.post(f"/api/invitations/{invitation['id']}/accept", headers=bob_headers).status_code == 200
+
+    with app.app_context(), engine.begin() as conn:
+        categories = {}
+        for name, user in users.items():
+            if name == 'dave':
+                continue # 刪除了所有預設類別
+            for category_name, kind in DEFAULT_CATEGORIES:
+                if (name, category_name) == ('bob', '娛樂'):
+                    continue # 刪除
+                if (name, category_name) == ('carol', '兼職'):
+                    kind = 'expense' # 改了類型：不是複本
+                conn.execute(text('INSERT INTO category (name, type, user_id) VALUES (:name, :type, :user_id)'),
+                             {'name': category_name, 'type': kind, 'user_id': user['id']})
+        conn.execute(text("UPDATE category SET name = '外食' WHERE name = '餐飲' AND user_id = :user_id"),
+                     {'user_id': users['alice']['id']})
+        conn.execute(text("INSERT INTO category (name, type, user_id) VALUES ('寵物', 'expense', :user_id)"),
+                     {'user_id': users['alice']['id']})
+        for category_id, name, user_id in conn.execute(text('SELECT id, name, user_id FROM category')):
+            categories[user_id, name] = category_id
+
+        def category_id(user, name):
+            return categories[users[user]['id'], name]
+
+        transaction, group_transaction = metadata.tables['transaction'], metadata.tables['group_transaction']
+        for user, name, kind, amount, day in (
+            ('alice', '薪資', 'income', '1000', date(2024, 1, 5)),
+            ('alice', '外食', 'expense', '12.5', date(2024, 1, 6)),
+            ('alice', '交通', 'expense', '0.1', date(2024, 1, 6)),
+            ('alice', '交通', 'expense', '0.2', date(2024, 1, 6)),
+            ('alice', '寵物', 'expense', '3', date(2024, 2, 1)),
+            ('bob', '餐飲', 'expense', '7', date(2024, 1, 6)),
+            ('bob', '交通', 'expense', '5', date(2024, 1, 7)),
+            ('carol', '兼職', 'expense', '8', date(2024, 1, 8)),
+        ):
+            conn.execute(transaction.insert().values(
+                amount=Decimal(amount), type=kind, date=day, created_at=datetime.utcnow(),
+                category_id=category_id(user, name), user_id=users[user]['id'],
+            ))
+        for user, name, amount in (('bob', '餐飲', '20'), ('alice', '交通', '4'), ('alice', '外食', '9')):
+            conn.execute(group_transaction.insert().values(
+                group_id=group['id'], amount=Decimal(amount), type='expense', date=date(2024, 1, 9),
+                created_at=datetime.utcnow(), category_id=category_id(user, name), created_by_user_id=users[user]['id'],
+            ))
+        accweb.migrations.backfill_daily_rollups(conn, metadata, replace=True)
+        versions = dict(conn.execute(text('SELECT owner_type || owner_id, version FROM owner_version')).all())
+
+    return {'app': app, 'client': client, 'users': users, 'group_id': group['id'], 'categories': categories,
+            'versions': versions}
+
+
+def upgrade(app):
+    with app.app_context():
+        return accweb.migrations.upgrade(accweb.db.engine, accweb.db.metadata, log=lambda *a: None)
+
+
+def breakdown(client, headers, prefix='/api'):
+    rows = client.get(f'{prefix}/summary/category_breakdown', headers=headers).get_json()
+    return sorted((row['category_name'], row['total_amount']) for row in rows)
+
+
+def test_upgrade_merges_default_copies(legacy):
+    app, client, users = legacy['app'], legacy['client'], legacy['users']
+    assert upgrade(app) == [7]
+
+    headers = {name: login(client, user['username']) for name, user in users.items()}
+    with app.app_context(), accweb.db.engine.connect() as conn:
+        defaults = {(name, kind): category_id for category_id, name, kind in conn.execute(
+            text('SELECT id, name, type FROM category WHERE user_id IS NULL')
+        )}
+    assert set(defaults) == DEFAULTS
+
+    # 每位使用者看到的類別 (名稱與類型) 與遷移前相同
+    visible = {name: {(c['name'], c['type']) for c in client.get('/api/categories', headers=h).get_json()}
+               for name, h in headers.items()}
+    assert visible == {
+        'alice': DEFAULTS - {('餐飲', 'expense')} | {('外食', 'expense'), ('寵物', 'expense')},
+        'bob': DEFAULTS - {('娛樂', 'expense')},
+        'carol': DEFAULTS - {('兼職', 'income')} | {('兼職', 'expense')},
+        'dave': set(),
+    }
+
+    # 複本上的交易改指向共用類別；改名、改類型或自訂的類別保留原本的 ID
+    def transaction_categories(user):
+        transactions = client.get('/api/transactions', headers=headers[user]).get_json()['transactions']
+        return sorted((t['category_name'], t['category_id']) for t in transactions)
+
+    old = legacy['categories']
+    alice_id, carol_id = users['alice']['id'], users['carol']['id']
+    assert transaction_categories('alice') == sorted([
+        ('交通', defaults['交通', 'expense']), ('交通', defaults['交通', 'expense']),
+        ('外食', old[alice_id, '外食']), ('寵物', old[alice_id, '寵物']), ('薪資', defaults['薪資', 'income']),
+    ])
+    assert transaction_categories('bob') == sorted([('交通', defaults['交通', 'expense']),
+                                                    ('餐飲', defaults['餐飲', 'expense'])])
+    assert transaction_categories('carol') == [('兼職', old[carol_id, '兼職'])]
+    group_path = f"/api/groups/{legacy['group_id']}"
+    transactions = client.get(f'{group_path}/transactions', headers=headers['alice']).get_json()['transactions']
+    assert sorted((t['category_name'], t['category_id']) for t in transactions) == sorted([
+        ('餐飲', defaults['餐飲', 'expense']), ('交通', defaults['交通', 'expense']), ('外食', old[alice_id, '外食']),
+    ])
+
+    # 統計 (由重建的每日彙總表計算) 與遷移前的交易相符
+    assert client.get('/api/summary', headers=headers['alice']).get_json() == \
+        {'total_income': 1000, 'total_expense': 15.8, 'balance': 984.2}
+    assert breakdown(client, headers['alice']) == [('交通', 0.3), ('外食', 12.5), ('寵物', 3), ('薪資', 1000)]
+    assert breakdown(client, headers['bob']) == [('交通', 5), ('餐飲', 7)]
+    assert breakdown(client, headers['carol']) == [('兼職', 8)]
+    assert breakdown(client, headers['alice'], group_path) == [('交通', 4), ('外食', 9), ('餐飲', 20)]
+    assert client.get(f'{group_path}/summary', headers=headers['bob']).get_json()['total_expense'] == 33
+
+    # 刪除過的預設類別仍不可使用
+    body = {'amount': 1, 'type': 'expense', 'category_id': defaults['娛樂', 'expense'], 'date': '2024-05-01'}
+    assert client.post('/api/transactions', headers=headers['bob'], json=body).status_code == 404
+
+    with app.app_context(), accweb.db.engine.connect() as conn:
+        category = accweb.db.metadata.tables['category']
+        # 沒有殘留的複本，彙總表也不再參照已刪除的類別
+        copies = conn.execute(select(category.c.name, category.c.type).where(
+            category.c.user_id.isnot(None), category.c.template_id.is_(None)
+        )).all()
+        assert not DEFAULTS & set(copies)
+        assert conn.execute(text(
+            'SELECT COUNT(*) FROM daily_rollup WHERE category_id NOT IN (SELECT id FROM category)'
+        )).scalar() == 0
+        # 所有版本號遞增，回應快取中的舊類別 ID 失效
+        versions = dict(conn.execute(text('SELECT owner_type || owner_id, version FROM owner_version')).all())
+        assert set(versions) >= set(legacy['versions'])
+        assert all(versions[key] > version for key, version in legacy['versions'].items())
+
+
+def test_upgrade_is_idempotent(legacy):
+    app = legacy['app']
+    assert upgrade(app) == [7]
+    with app.app_context(), accweb.db.engine.begin() as conn:
+        before = conn.execute(text('SELECT id, name, type, user_id, template_id, hidden FROM category ORDER BY id')).all()
+        accweb.migrations.shared_default_categories(conn, accweb.db.metadata)
+        assert conn.execute(text(
+            'SELECT id, name, type, user_id, template_id, hidden FROM category ORDER BY id'
+        )).all() == before
+    assert upgrade(app) == []
@@ -0,0 +1,85 @@
+# backend/tests/test_pagination.py
+# cursor 分頁以 (date, created_at, id) 為鍵：逐頁走完必須剛好涵蓋每一筆、不重複也不遺漏，
+# 順序依 (date, created_at, id) 由新到舊；被竄改的 cursor 回傳 400。
+import base64
+import json
+
+import pytest
+
+from conftest import login, register
+
+# 同一天有多筆 (created_at 相同時以 id 決定順序)，批次匯入的列會在同一個交易中寫入
+DATES = ['2024-05-01'] * 7 + ['2024-04-30'] * 5 + ['2024-06-01'] * 3 + ['2023-12-31']
+
+
+@pytest.fixture(scope='module')
+def owner(app):
+    client = app.test_client()
+    user, headers = register(client, 'pages')
+    categories = client.get('/api/categories', headers=headers).get_json()
+    group = client.post('/api/groups', headers=headers, json={'name': 'pages'}).get_json()['group']
+    headers = login(client, user['username'])
+    rows = [{'amount': i + 1, 'type': categories[0]['type'], 'category_id': categories[0]['id'],
+             'date': day, 'description': f'row {i}'} for i, day in enumerate(DATES)]
+    for path in ('/api/transactions/batch', f"/api/groups/{group['id']}/transactions/batch"):
+        response = client.post(path, headers=headers, json=rows)
+        assert response.status_code == 201, response.get_json()
+    # 另外逐筆新增幾筆同一天的交易 (created_at 各不相同)
+    for i in range(3):
+        body = dict(rows[0], description=f'single {i}')
+        assert client.post('/api/transactions', headers=headers, json=body).status_code == 201
+        assert client.post(f"/api/groups/{group['id']}/transactions", headers=headers, json=body).status_code == 201
+    return {'headers': headers, 'group_id': group['id']}
+
+
+def list_path(owner, kind):
+    return '/api/transactions' if kind == 'personal' else f"/api/groups/{owner['group_id']}/transactions"
+
+
+@pytest.mark.parametrize('kind', ['personal', 'group'])
+@pytest.mark.parametrize('per_page', [1, 2, 5, 100])
+def test_cursor_walk_matches_offset_pagination(client, owner, kind, per_page):
+    path = list_path(owner, kind)
+    seen, cursor, pages = [], '', 0
+    while True:
+        data = client.get(f'{path}?per_page={per_page}&cursor={cursor}', headers=owner['headers']).get_json()
+        assert len(data['transactions']) <= per_page
+        assert data['has_next'] == (data['next_cursor'] is not None)
+        seen += [t['id'] for t in data['transactions']]
+        pages += 1
+        if not data['has_next']:
+            break
+        cursor = data['next_cursor']
+
+    everything = client.get(f'{path}?per_page=100', headers=owner['headers']).get_json()['transactions']
+    expected = [t['id'] for t in sorted(everything, key=lambda t: (t['date'], t['created_at'], t['id']), reverse=True)]
+    assert len(expected) == len(DATES) + 3
+    assert len(seen) == len(set(seen)) # 沒有重複
+    assert seen == expected # 沒有遺漏，依 (date, created_at, id) 由新到舊
+    assert pages == -(-len(expected) // per_page) # 最後一頁剛好滿時也不會多出一個空白頁
+
+
+def test_cursor_include_total(client, owner):
+    data = client.get('/api/transactions?cursor=&per_page=3&include_total=true', headers=owner['headers']).get_json()
+    assert data['total'] == len(DATES) + 3
+    assert 'total' not in client.get('/api/transactions?cursor=&per_page=3', headers=owner['headers']).get_json()
+
+
+def encode(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('cursor', [
+    'zzz',
+    '測試',
+    encode([1, 2]),
+    encode(['2024-05-01', 'not-a-time', 3]),
+    encode([None, None, 1]),
+    encode({'date': '2024-05-01'}),
+    encode(['2024-05-01', '2024-05-01T00:00:00', 'x']),
+])
+@pytest.mark.parametrize('kind', ['personal', 'group'])
+def test_tampered_cursor_is_rejected(client, owner, kind, cursor):
+    response = client.get(f"{list_path(owner, kind)}?per_page=5&cursor={cursor}", headers=owner['headers'])
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Invalid cursor.'}
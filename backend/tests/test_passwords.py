@@ -0,0 +1,84 @@
+# backend/tests/test_passwords.py
+# 密碼雜湊的執行緒池：排隊名額在工作真正結束時才歸還，逾時而仍在排隊的工作會被取消。
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import passwords
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(passwords, 'PASSWORD_HASH_WORKERS', 1)
+    monkeypatch.setattr(passwords, 'PASSWORD_HASH_TIMEOUT', 0.2)
+    monkeypatch.setattr(passwords, '_pending', threading.BoundedSemaphore(2))
+    monkeypatch.setattr(passwords, '_executor', executor)
+    monkeypatch.setattr(passwords, '_executor_pid', passwords.os.getpid())
+    release = threading.Event()
+    yield release
+    release.set()
+    executor.shutdown(wait=True)
+
+
+def free_slots():
+    count = 0
+    while passwords._pending.acquire(blocking=False):
+        count += 1
+    for _ in range(count):
+        passwords._pending.release()
+    return count
+
+
+def settled_slots(expected):
+    # 完成的回呼在工作執行緒中執行，可能比 result() 返回稍晚一點
+    deadline = time.monotonic() + 2
+    while free_slots() != expected and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return free_slots()
+
+
+def test_result_and_slot_release(pool):
+    assert passwords._run(lambda a, b: a + b, 1, 2) == 3
+    assert settled_slots(2) == 2
+
+
+def test_timed_out_hash_keeps_its_slot_until_done(pool):
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        pool.wait()
+
+    with pytest.raises(passwords.PasswordHasherBusy):
+        passwords._run(slow)
+    assert started.is_set()
+    assert free_slots() == 1 # 仍在執行的雜湊佔用名額，不能讓更多請求排進來
+
+    # 排在後面的工作逾時後被取消，名額立即歸還，工作本身不會執行
+    ran = []
+    with pytest.raises(passwords.PasswordHasherBusy):
+        passwords._run(ran.append, 'queued')
+    assert free_slots() == 1
+
+    # 名額用完時直接回報忙碌
+    passwords._pending.acquire()
+    with pytest.raises(passwords.PasswordHasherBusy):
+        passwords._run(ran.append, 'rejected')
+    passwords._pending.release()
+
+    pool.set()
+    passwords._executor.shutdown(wait=True)
+    assert free_slots() == 2
+    assert ran == []
+
+
+def test_exceptions_release_the_slot(pool):
+    def fail():
+        raise ValueError('bad hash')
+
+    with pytest.raises(ValueError):
+        passwords._run(fail)
+    assert settled_slots(2) == 2
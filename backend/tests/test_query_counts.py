@@ -0,0 +1,101 @@
+# backend/tests/test_query_counts.py
+# 列表與統計端點每個請求的 SQL 數量必須是固定的上限，不隨資料筆數增加 (防止 N+1 查詢再出現)。
+# 上限包含 JWT 成員版本檢查等固定成本；改善後可以調低，但不應該調高。
+import pytest
+
+from conftest import login, register
+
+TRANSACTIONS = 30
+GROUP_TRANSACTIONS = 12
+INVITATIONS = 3
+
+# (路徑, 查詢數上限)；{group_id} 換成擁有者所屬的群組。
+# 每個請求都先讀一次 owner_version (ETag 與回應快取的鍵)，群組端點另外讀一次使用者的成員版本。
+BUDGETS = [
+    ('/api/transactions?per_page={n}', 3), # 版本、列表、COUNT
+    ('/api/transactions?per_page={n}&cursor=', 2),
+    ('/api/transactions?per_page={n}&fields=amount,category_name', 3),
+    ('/api/groups/{group_id}/transactions?per_page={n}', 4),
+    ('/api/groups/{group_id}/transactions?per_page={n}&cursor=', 3),
+    ('/api/invitations', 1),
+    ('/api/groups', 3),
+    ('/api/groups?include_totals=true', 3), # 總計以彙總表的子查詢併入同一個查詢
+    ('/api/groups/{group_id}', 5), # 群組、建立者、成員 (含使用者)
+    ('/api/summary', 2),
+    ('/api/summary/category_breakdown', 2),
+    ('/api/summary/trend?interval=month', 2),
+    ('/api/groups/{group_id}/summary', 3),
+    ('/api/groups/{group_id}/summary/category_breakdown', 3),
+    ('/api/groups/{group_id}/summary/trend?interval=month', 3),
+    ('/api/dashboard', 3),
+    ('/api/groups/{group_id}/dashboard', 4),
+]
+
+
+@pytest.fixture(scope='module')
+def owner(app):
+    client = app.test_client()
+    user, headers = register(client, 'owner')
+    categories = client.get('/api/categories', headers=headers).get_json()
+    for i in range(TRANSACTIONS):
+        category = categories[i % len(categories)]
+        response = client.post('/api/transactions', headers=headers, json={
+            'amount': 10 + i, 'type': category['type'], 'category_id': category['id'],
+            'date': f'2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}', 'description': f'item {i}',
+        })
+        assert response.status_code == 201, response.get_json()
+
+    group = client.post('/api/groups', headers=headers, json={'name': 'budget group'}).get_json()['group']
+    members = [register(client, 'member') for _ in range(2)]
+    for member, member_headers in members:
+        assert client.post(f"/api/groups/{group['id']}/invite", headers=headers,
+                           json={'username': member['username']}).status_code == 201
+        invitation = client.get('/api/invitations', headers=member_headers).get_json()[0]
+        assert client.post(f"/api/invitations/{invitation['id']}/accept", headers=member_headers).status_code == 200
+    for i in range(GROUP_TRANSACTIONS):
+        _, member_headers = members[i % len(members)]
+        category = categories[i % len(categories)]
+        response = client.post(f"/api/groups/{group['id']}/transactions", headers=member_headers, json={
+            'amount': 5 + i, 'type': category['type'], 'category_id': category['id'],
+            'date': f'2024-{i % 12 + 1:02d}-15', 'description': f'group item {i}',
+        })
+        assert response.status_code == 201, response.get_json()
+
+    # 來自不同群組與邀請者的待處理邀請
+    for _ in range(INVITATIONS):
+        sender, sender_headers = register(client, 'sender')
+        other = client.post('/api/groups', headers=sender_headers, json={'name': 'other'}).get_json()['group']
+        response = client.post(f"/api/groups/{other['id']}/invite", headers=sender_headers,
+                               json={'username': user['username']})
+        assert response.status_code == 201, response.get_json()
+
+    # 重新登入取得最新的成員 claims，量測時不會因 token 過期而多查詢
+    return {'headers': login(client, user['username']), 'group_id': group['id']}
+
+
+@pytest.mark.parametrize('path, budget', BUDGETS, ids=[path for path, _ in BUDGETS])
+def test_query_budget(client, count_queries, owner, path, budget):
+    counts = []
+    for page_size in (5, 50):
+        url = path.format(n=page_size, group_id=owner['group_id'])
+        response, queries = count_queries(client.get, url, headers=owner['headers'])
+        assert response.status_code == 200, response.get_json()
+        counts.append(queries)
+    assert counts[0] == counts[1], f"query count grows with page size: {counts}"
+    assert counts[0] <= budget, f"{counts[0]} queries, budget {budget}"
+
+
+def test_list_payloads_are_complete(client, owner):
+    # 查詢數固定的同時，關聯資料仍須正確帶出 (不是因為漏掉欄位才少查詢)
+    transactions = client.get('/api/transactions?per_page=50', headers=owner['headers']).get_json()['transactions']
+    assert len(transactions) == TRANSACTIONS
+    assert all(t['category_name'] for t in transactions)
+
+    group_transactions = client.get(f"/api/groups/{owner['group_id']}/transactions?per_page=50",
+                                    headers=owner['headers']).get_json()['transactions']
+    assert len(group_transactions) == GROUP_TRANSACTIONS
+    assert all(t['category_name'] and t['created_by_username'] for t in group_transactions)
+
+    invitations = client.get('/api/invitations', headers=owner['headers']).get_json()
+    assert len(invitations) == INVITATIONS
+    assert all(i['group_name'] and i['invited_by_username'] for i in invitations)
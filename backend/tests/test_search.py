@@ -0,0 +1,126 @@
+# backend/tests/test_search.py
+# 交易說明搜尋：SQLite 用 FTS5 trigram、PostgreSQL 用 pg_trgm，兩者都是不分大小寫的子字串比對，
+# 多個詞之間為 AND；少於 3 個字元的詞退回 LIKE。結果必須與沒有索引時的 ILIKE 相同，
+# 且 FTS 表透過觸發器與交易表保持同步。
+import pytest
+
+import app as accweb
+from conftest import login, register
+
+DESCRIPTIONS = [
+    'coffee',
+    'Coffee beans 1kg',
+    'Iced COFFEE with a long tail of other words about the morning commute and the weather',
+    'tea',
+    'bus to work',
+    '午餐便當',
+    '便利商店',
+    '100% "quoted" beans',
+    None,
+]
+
+# (搜尋詞, 預期命中的說明)
+SEARCHES = [
+    ('coffee', {'coffee', 'Coffee beans 1kg', DESCRIPTIONS[2]}),
+    ('COFFEE beans', {'Coffee beans 1kg'}), # 多個詞為 AND
+    ('ffe', {'coffee', 'Coffee beans 1kg', DESCRIPTIONS[2]}), # 子字串，不是前綴
+    ('co', {'coffee', 'Coffee beans 1kg', DESCRIPTIONS[2]}), # 短詞退回 LIKE
+    ('便當', {'午餐便當'}),
+    ('便', {'午餐便當', '便利商店'}),
+    ('午餐便', {'午餐便當'}), # 中文 3 個字元以上走 trigram 索引
+    ('bus w', {'bus to work'}), # 長詞走索引、短詞在命中結果內再用 LIKE 篩選
+    ('"quoted"', {'100% "quoted" beans'}), # 雙引號不能破壞 MATCH 語法
+    ('tea coffee', set()),
+    ('xyz', set()),
+]
+
+
+def search(client, headers, path, term, **params):
+    response = client.get(path, headers=headers, query_string={'search_term': term, 'per_page': 100, **params})
+    assert response.status_code == 200, (term, params, response.get_json())
+    return [t['description'] for t in response.get_json()['transactions']]
+
+
+@pytest.fixture(scope='module')
+def owners(backend_apps):
+    """{資料庫名稱: (client, headers, [個人列表路徑, 群組列表路徑])}"""
+    results = {}
+    for name, app in backend_apps.items():
+        client = app.test_client()
+        user, headers = register(client, 'search')
+        category = client.get('/api/categories', headers=headers).get_json()[0]
+        group = client.post('/api/groups', headers=headers, json={'name': 'search'}).get_json()['group']
+        headers = login(client, user['username'])
+        paths = ['/api/transactions', f"/api/groups/{group['id']}/transactions"]
+        for i, description in enumerate(DESCRIPTIONS):
+            body = {'amount': 1 + i, 'type': category['type'], 'category_id': category['id'],
+                    'date': '2024-05-01', 'description': description}
+            for path in paths:
+                assert client.post(path, headers=headers, json=body).status_code == 201
+        results[name] = (client, headers, paths)
+    return results
+
+
+@pytest.mark.parametrize('term, expected', SEARCHES, ids=[term for term, _ in SEARCHES])
+def test_search_matches_substrings(owners, term, expected):
+    for name, (client, headers, paths) in owners.items():
+        for path in paths:
+            found = search(client, headers, path, term)
+            assert len(found) == len(set(found)), (name, path)
+            assert set(found) == expected, (name, path)
+
+
+@pytest.mark.parametrize('term, expected', SEARCHES, ids=[term for term, _ in SEARCHES])
+def test_index_agrees_with_ilike_fallback(backend_apps, owners, monkeypatch, term, expected):
+    for name, (client, headers, paths) in owners.items():
+        with backend_apps[name].app_context():
+            url = accweb.db.engine.url
+            assert accweb.description_search_backend() in ('sqlite_fts', 'pg_trgm')
+        for path in paths:
+            indexed = search(client, headers, path, term)
+            monkeypatch.setitem(accweb._search_backends, url, None) # 模擬沒有索引的資料庫
+            fallback = search(client, headers, path, term)
+            monkeypatch.undo()
+            assert sorted(indexed, key=str) == sorted(fallback, key=str) == sorted(expected, key=str)
+
+
+def test_relevance_sort(owners):
+    for name, (client, headers, paths) in owners.items():
+        for path in paths:
+            default = search(client, headers, path, 'coffee')
+            ranked = search(client, headers, path, 'coffee', sort='relevance')
+            assert sorted(ranked) == sorted(default)
+            if name == 'sqlite':
+                # bm25：完全相符的短說明排在最前，在長句中只出現一次的排最後
+                assert ranked[0] == 'coffee' and ranked[-1] == DESCRIPTIONS[2], path
+            # 沒有搜尋詞時 sort=relevance 不影響原本的排序
+            assert search(client, headers, path, '', sort='relevance') == search(client, headers, path, '')
+
+
+def test_fts_follows_updates_and_deletes(client):
+    user, headers = register(client, 'search-sync')
+    category = client.get('/api/categories', headers=headers).get_json()[0]
+    group = client.post('/api/groups', headers=headers, json={'name': 'sync'}).get_json()['group']
+    headers = login(client, user['username'])
+    for path in ('/api/transactions', f"/api/groups/{group['id']}/transactions"):
+        body = {'amount': 1, 'type': category['type'], 'category_id': category['id'],
+                'date': '2024-05-01', 'description': 'original breakfast'}
+        transaction_id = client.post(path, headers=headers, json=body).get_json()['id']
+        assert search(client, headers, path, 'breakfast') == ['original breakfast']
+
+        response = client.put(f'{path}/{transaction_id}', headers=headers, json={'description': 'renamed dinner'})
+        assert response.status_code == 200, response.get_json()
+        assert search(client, headers, path, 'breakfast') == []
+        assert search(client, headers, path, 'dinner') == ['renamed dinner']
+
+        # 只改金額 (不改說明) 時索引內容不變
+        assert client.put(f'{path}/{transaction_id}', headers=headers, json={'amount': 2}).status_code == 200
+        assert search(client, headers, path, 'dinner') == ['renamed dinner']
+
+        assert client.delete(f'{path}/{transaction_id}', headers=headers).status_code in (200, 204)
+        assert search(client, headers, path, 'dinner') == []
+
+        # 批次匯入 (Core executemany) 同樣經由觸發器寫入索引
+        response = client.post(f'{path}/batch', headers=headers, json=[dict(body, description='batched lunch')])
+        assert response.status_code == 201
+        assert search(client, headers, path, 'lunch') == ['batched lunch']
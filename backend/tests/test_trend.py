@@ -0,0 +1,126 @@
+# backend/tests/test_trend.py
+# 趨勢分期在 Python 中進行：SQLite 與 PostgreSQL 對同一份資料必須得到完全相同的結果，
+# 且日期範圍過大或超出範圍時回傳 400，而不是 500 或巨大的回應。
+import pytest
+
+from conftest import login, register
+
+# (日期, 類型, 金額)：包含跨年的 ISO 週 (2020-12-31 與 2021-01-03 同屬 2020-53)、季末與季初、沒有資料的月份
+TRANSACTIONS = [
+    ('2020-12-31', 'expense', '100.50'),
+    ('2021-01-03', 'expense', '20.25'),
+    ('2021-01-04', 'income', '1000'),
+    ('2021-03-31', 'expense', '30'),
+    ('2021-04-01', 'income', '200.10'),
+    ('2021-06-15', 'expense', '0.05'),
+    ('2022-02-10', 'income', '50'),
+]
+
+QUERIES = [
+    'interval=day&start_date=2020-12-30&end_date=2021-01-05',
+    'interval=week',
+    'interval=month',
+    'interval=quarter',
+    'interval=year',
+    'interval=month&start_date=2021-02-01&end_date=2021-07-31',
+    'interval=quarter&start_date=2019-11-01',
+    'interval=year&end_date=2021-12-31',
+]
+
+
+@pytest.fixture(scope='module')
+def trends(backend_apps):
+    """{資料庫名稱: {查詢: (個人趨勢, 群組趨勢, 儀表板的趨勢)}}"""
+    results = {}
+    for name, app in backend_apps.items():
+        client = app.test_client()
+        user, headers = register(client, 'trend')
+        categories = {c['type']: c['id'] for c in client.get('/api/categories', headers=headers).get_json()}
+        group = client.post('/api/groups', headers=headers, json={'name': 'trend'}).get_json()['group']
+        headers = login(client, user['username'])
+        for day, kind, amount in TRANSACTIONS:
+            body = {'amount': amount, 'type': kind, 'category_id': categories[kind], 'date': day}
+            assert client.post('/api/transactions', headers=headers, json=body).status_code == 201
+            assert client.post(f"/api/groups/{group['id']}/transactions", headers=headers, json=body).status_code == 201
+
+        results[name] = {}
+        for query in QUERIES:
+            responses = [client.get(path, headers=headers) for path in (
+                f'/api/summary/trend?{query}',
+                f"/api/groups/{group['id']}/summary/trend?{query}",
+                f'/api/dashboard?{query}',
+            )]
+            assert all(r.status_code == 200 for r in responses), [r.get_json() for r in responses]
+            personal, group_trend, dashboard = (r.get_json() for r in responses)
+            results[name][query] = (personal, group_trend, dashboard['trend'])
+    return results
+
+
+def test_backends_agree(trends):
+    expected = trends['sqlite']
+    for name, results in trends.items():
+        assert results == expected, f"{name} differs from sqlite"
+
+
+def test_personal_group_and_dashboard_agree(trends):
+    for query, (personal, group_trend, dashboard) in trends['sqlite'].items():
+        assert personal == group_trend == dashboard, query
+
+
+def periods(trends, query):
+    return {row['period']: (row['income'], row['expense'], row['balance']) for row in trends['sqlite'][query][0]}
+
+
+def test_bucket_values(trends):
+    day = periods(trends, QUERIES[0])
+    assert list(day) == ['2020-12-30', '2020-12-31', '2021-01-01', '2021-01-02', '2021-01-03', '2021-01-04', '2021-01-05']
+    assert day['2020-12-30'] == (0, 0, 0) # 範圍內沒有資料的日子也補 0
+    assert day['2020-12-31'] == (0, 100.5, -100.5)
+
+    week = periods(trends, 'interval=week')
+    assert week['2020-53'] == (0, 120.75, -120.75) # ISO 週跨年
+    assert week['2021-01'] == (1000, 0, 1000)
+
+    month = periods(trends, 'interval=month')
+    assert list(month)[0] == '2020-12' and list(month)[-1] == '2022-02' and len(month) == 15
+    assert month['2021-05'] == (0, 0, 0)
+
+    assert periods(trends, 'interval=quarter') == {
+        '2020-Q4': (0, 100.5, -100.5), '2021-Q1': (1000, 50.25, 949.75), '2021-Q2': (200.1, 0.05, 200.05),
+        '2021-Q3': (0, 0, 0), '2021-Q4': (0, 0, 0), '2022-Q1': (50, 0, 50),
+    }
+    assert periods(trends, 'interval=year') == {
+        '2020': (0, 100.5, -100.5), '2021': (1200.1, 50.3, 1149.8), '2022': (50, 0, 50),
+    }
+    assert list(periods(trends, 'interval=month&start_date=2021-02-01&end_date=2021-07-31')) == [
+        '2021-02', '2021-03', '2021-04', '2021-05', '2021-06', '2021-07',
+    ]
+    assert list(periods(trends, 'interval=quarter&start_date=2019-11-01'))[:2] == ['2019-Q4', '2020-Q1']
+    assert list(periods(trends, 'interval=year&end_date=2021-12-31')) == ['2020', '2021']
+
+
+@pytest.mark.parametrize('query, status', [
+    ('interval=year&start_date=9990-01-01&end_date=9999-12-31', 200), # 最後一期在 9999 年，不能算出 10000 年
+    ('interval=week&start_date=9999-12-01&end_date=9999-12-31', 200),
+    ('interval=quarter&start_date=0001-01-01&end_date=0001-12-31', 200),
+    ('interval=year&end_date=9999-12-31', 400), # 從最早的資料到 9999 年超過期別上限
+    ('interval=day&start_date=0001-01-01&end_date=2024-01-01', 400),
+    ('interval=day&start_date=2024-01-02&end_date=2024-01-01', 400),
+    ('interval=month&start_date=2024-13-01', 400),
+    ('interval=decade', 400),
+])
+def test_range_validation(client, query, status):
+    user, headers = register(client, 'range')
+    categories = {c['type']: c['id'] for c in client.get('/api/categories', headers=headers).get_json()}
+    group = client.post('/api/groups', headers=headers, json={'name': 'range'}).get_json()['group']
+    headers = login(client, user['username'])
+    body = {'amount': '1', 'type': 'income', 'category_id': categories['income'], 'date': '2024-03-01'}
+    assert client.post('/api/transactions', headers=headers, json=body).status_code == 201
+    assert client.post(f"/api/groups/{group['id']}/transactions", headers=headers, json=body).status_code == 201
+
+    for path in ('/api/summary/trend', f"/api/groups/{group['id']}/summary/trend", '/api/dashboard',
+                 f"/api/groups/{group['id']}/dashboard"):
+        response = client.get(f'{path}?{query}', headers=headers)
+        assert response.status_code == status, (path, response.get_json())
+        if status == 400:
+            assert 'out of range' not in response.get_json()['error'] # 不回傳 Python 的例外訊息
@@ -6,7 +6,14 @@ import { useNotificationStore } from "../stores/notificationStore";
 
 export function setupAxiosInterceptors() {
   axios.interceptors.response.use(
-    (response) => response,
+    (response) => {
+      // 群組成員身份改變後，後端會在這個標頭附上重新簽發的 token
+      const refreshedToken = response.headers["x-access-token"];
+      if (refreshedToken) {
+        localStorage.setItem("access_token", refreshedToken);
+      }
+      return response;
+    },
     async (error) => {
       const originalRequest = error.config;
 
@@ -58,6 +58,7 @@ export const useGroupStore = defineStore("group", {
       try {
         const response = await axios.get(`${API_BASE_URL}/groups`, {
           headers: this.getAuthHeaders(),
+          params: { include_totals: true }, // 一次取得各群組的收支總計
         });
         this.groups = response.data;
       } catch (err) {